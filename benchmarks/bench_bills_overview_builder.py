@@ -0,0 +1,81 @@
+"""
+Compares building bills_overview_data page by page with pd.concat against BillsOverviewBuilder, on a synthetic listing
+of 5,000 bills in pages of 20
+
+Run from the repository root:
+    python -m benchmarks.bench_bills_overview_builder
+"""
+import datetime
+import time
+import tracemalloc
+
+import numpy
+import pandas as pd
+
+from parlpy.bills.bill_list_fetcher import BillsOverview
+from parlpy.bills.overview_builder import BillsOverviewBuilder
+
+N_BILLS = 5000
+BILLS_PER_PAGE = 20
+COLUMNS = BillsOverviewBuilder.columns
+
+
+def make_pages():
+    sessions = [["2019-21"], ["2019-21", "2021-22"], ["2017-19", "2019-19", "2019-21"], ["2021-22"]]
+    newest = datetime.datetime(2021, 9, 16, 18, 0)
+
+    bills = [
+        (f"Example Number {i}",
+         "Bill",
+         BillsOverview.OriginatingHouse.HOUSE_OF_LORDS if i % 3 == 0 else BillsOverview.OriginatingHouse.HOUSE_OF_COMMONS,
+         newest - datetime.timedelta(hours=i),
+         f"/bills/{1000 + i}",
+         list(sessions[i % len(sessions)]))
+        for i in range(N_BILLS)
+    ]
+
+    return [bills[i:i + BILLS_PER_PAGE] for i in range(0, N_BILLS, BILLS_PER_PAGE)]
+
+
+# the approach used before BillsOverviewBuilder
+def build_with_concat(pages):
+    data = pd.DataFrame([], columns=COLUMNS)
+    for page in pages:
+        page_df = pd.DataFrame(numpy.array(page, dtype=object), columns=COLUMNS)
+        page_df.index = range(len(data.index), len(data.index) + len(page_df))
+        data = pd.concat([data, page_df])
+
+    return data
+
+
+def build_with_builder(pages):
+    builder = BillsOverviewBuilder(BillsOverview.OriginatingHouse)
+    for page in pages:
+        builder.extend(page)
+
+    return builder.build()
+
+
+def measure(build, pages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = build(pages)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return data, elapsed, peak
+
+
+def main():
+    pages = make_pages()
+
+    for name, build in (("pd.concat per page", build_with_concat), ("BillsOverviewBuilder", build_with_builder)):
+        data, elapsed, peak = measure(build, pages)
+        frame_bytes = data.memory_usage(deep=True).sum()
+        print(f"{name:<22} time {elapsed * 1000:8.1f} ms   peak traced {peak / 2**20:6.2f} MiB   "
+              f"frame {frame_bytes / 2**20:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark of listing page parsing against the saved listing page in parlpy/test/data
+
+Compares the previous approach (full html.parser parse, four walks over the cards, strptime per card) with
+parlpy.bills.listing_parser using each available tree builder.
+
+Run from the repository root:
+    python -m benchmarks.bench_listing_parser
+"""
+import datetime
+import os
+import re
+import timeit
+
+from bs4 import BeautifulSoup
+
+import parlpy.bills.listing_parser as listing_parser
+
+LISTING_PAGE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "parlpy", "test", "data",
+                                 "bills_listing_page.html")
+REPEATS = 200
+
+
+# the approach used before parlpy.bills.listing_parser
+def parse_full_page(page_html):
+    data_bs = BeautifulSoup(page_html, "html.parser")
+
+    max_page = 1
+    for pt in data_bs.find_all("a", href=re.compile("page=*")):
+        max_page = max(max_page, int(pt["href"].split("page=")[1]))
+
+    card_tags = data_bs.find_all(class_="card-clickable")
+    titles = [o.find(class_="primary-info").text for o in card_tags]
+    updated_dates = []
+    for o in card_tags:
+        updated_date = o.find(class_="indicators-left").text.split("updated: ")[1].splitlines()[0].rsplit(" ", 1)[0]
+        updated_dates.append(datetime.datetime.strptime(updated_date, "%d %B %Y at %H:%M"))
+    paths = [o.find(class_="overlay-link")["href"] for o in card_tags]
+    sessions = [o.find(class_="secondary-info").text.split(" ", maxsplit=1)[1].split(", ") for o in card_tags]
+
+    return max_page, titles, updated_dates, paths, sessions
+
+
+def parse_cards_only(page_html, backend):
+    max_page = listing_parser.count_pages(page_html)
+    cards = listing_parser.parse_cards(page_html, backend=backend)
+    updated_dates = listing_parser.parse_updated_dates([c[1] for c in cards])
+
+    return max_page, cards, updated_dates
+
+
+def available_backends():
+    backends = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        backends.append("lxml")
+    except ImportError:
+        pass
+
+    return backends
+
+
+def main():
+    with open(LISTING_PAGE_PATH, encoding="utf-8") as f:
+        page_html = f.read()
+
+    baseline = timeit.timeit(lambda: parse_full_page(page_html), number=REPEATS) / REPEATS
+    print(f"{'full page, 4 walks, strptime':<34} {baseline * 1000:7.2f} ms/page")
+
+    for backend in available_backends():
+        elapsed = timeit.timeit(lambda: parse_cards_only(page_html, backend), number=REPEATS) / REPEATS
+        print(f"{'cards only, single walk, ' + backend:<34} {elapsed * 1000:7.2f} ms/page   "
+              f"({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares adding members to mp_overview_data one row at a time, as MPOverview did with DataFrame.append, against
+MPOverview.get_all_members collecting them in an MPOverviewBuilder, over a full listing of 4,500 members served
+in pages of 20 from the saved Members/Search page in parlpy/test/data
+
+Run from the repository root:
+    python -m benchmarks.bench_mp_overview
+"""
+import copy
+import datetime
+import json
+import os
+import time
+import urllib.parse
+
+import pandas as pd
+
+from parlpy.mps.mp_fetcher import MPOverview
+from parlpy.mps.mp_overview_builder import MPOverviewBuilder
+
+MEMBERS_SEARCH_PAGE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "parlpy", "test", "data",
+                                        "members_search_page.json")
+N_MEMBERS = 4500
+
+
+class Response():
+    def __init__(self, obj):
+        self.obj = obj
+        self.status_code = 200
+
+    def json(self):
+        return self.obj
+
+
+# serves the listing and contact details from memory, so that only building the DataFrame is timed
+class RecordedMembersAPI():
+    def __init__(self):
+        with open(MEMBERS_SEARCH_PAGE_PATH) as f:
+            page = json.load(f)
+
+        self.members = []
+        for i in range(N_MEMBERS):
+            item = copy.deepcopy(page["items"][i % len(page["items"])])
+            item["value"]["id"] = 10000 + i
+            self.members.append(item)
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        if urllib.parse.urlparse(url).path.endswith("/Contact"):
+            return Response({"value": [{"type": "Parliamentary", "email": "member@parliament.uk"}]})
+
+        skip = int((params or {}).get("skip", 0))
+        return Response({"items": self.members[skip:skip + 20], "totalResults": len(self.members)})
+
+
+# the approach used before MPOverviewBuilder, DataFrame.append was removed from pandas so concat a row at a time
+def build_row_by_row(members):
+    data = pd.DataFrame([], columns=MPOverviewBuilder.columns)
+    for item in members:
+        value_obj = item["value"]
+        if value_obj["latestHouseMembership"]["membershipEndReason"] == "Death":
+            continue
+        values = {
+            "name_display": value_obj["nameDisplayAs"],
+            "name_full_title": value_obj["nameFullTitle"],
+            "name_address_as": value_obj["nameAddressAs"],
+            "name_list_as": value_obj["nameListAs"],
+            "email": "member@parliament.uk",
+            "member_id": value_obj["id"],
+            "current_member": value_obj["latestHouseMembership"]["membershipStatus"] is not None,
+            "gender": value_obj["gender"],
+            "party_id": value_obj["latestParty"]["id"],
+            "constituency": value_obj["latestHouseMembership"]["membershipFrom"],
+            "last_updated": datetime.datetime.now(),
+        }
+        data = pd.concat([data, pd.DataFrame([values])], ignore_index=True)
+
+    return data
+
+
+def main():
+    api = RecordedMembersAPI()
+
+    start = time.perf_counter()
+    baseline_data = build_row_by_row(api.members)
+    baseline = time.perf_counter() - start
+    print(f"{'row by row':<36} {baseline:7.3f} s   {len(baseline_data.index)} members")
+
+    start = time.perf_counter()
+    fetcher = MPOverview(transport=api)
+    fetcher.get_all_members(params={"House": "Commons"}, only_get_current_members_emails=False)
+    elapsed = time.perf_counter() - start
+    print(f"{'get_all_members, MPOverviewBuilder':<36} {elapsed:7.3f} s   {len(fetcher.mp_overview_data.index)} members"
+          f"   ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares a new connection per request, as module level requests.get makes, against a Transport reusing pooled
+keep-alive connections, on a local server that, like a remote one, takes time to accept each new connection
+
+Run from the repository root:
+    python -m benchmarks.bench_transport
+"""
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from parlpy.utils.transport import Transport
+
+N_REQUESTS = 200
+# stands in for the TCP and TLS handshakes with a remote host
+CONNECTION_SETUP_SECONDS = 0.005
+BODY = b"x" * 20000
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, without this delayed ACKs stall every reused connection
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        time.sleep(CONNECTION_SETUP_SECONDS)
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_requests(get, url):
+    start = time.perf_counter()
+    for _ in range(N_REQUESTS):
+        get(url).content
+    return (time.perf_counter() - start) / N_REQUESTS
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        baseline = time_requests(requests.get, url)
+        print(f"{'requests.get, new connection':<32} {baseline * 1000:7.2f} ms/request")
+
+        with Transport() as transport:
+            elapsed = time_requests(transport.get, url)
+        print(f"{'Transport, pooled keep-alive':<32} {elapsed * 1000:7.2f} ms/request   ({baseline / elapsed:.1f}x)")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
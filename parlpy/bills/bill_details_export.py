@@ -0,0 +1,285 @@
+"""
+Contains functions to export BillDetails to columnar files partitioned by session, and to load them back
+
+Three tables are written, each as one uncompressed Arrow IPC file per session under a directory named session=<name>:
+    bills: one row per bill, keyed by url
+    divisions: one row per division, with the url of its bill
+    votes: one row per member vote, +1 for aye and -1 for no, with the id of its division, written once per session for
+        a division on more than one bill
+
+A bill is put in the partition of the latest session it was in. By default an export is merged into what is already
+exported, replacing the rows of the bills exported again, by url, wherever they were, so the bills of incremental runs
+accumulate. Loading memory-maps the files, so columns are only read
+from disk when they are used, and by default the DataFrames are backed by the mapped Arrow buffers rather than Python
+objects. pyarrow is required, install it with: pip install pyarrow
+
+Functions (public):
+    export_bill_details
+    exported_sessions
+    load_table
+    load_bill_details
+"""
+import os
+import tempfile
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+TABLE_NAMES = ("bills", "divisions", "votes")
+EXPORT_MODES = ("merge", "overwrite")
+
+__file_name = "part-0.arrow"
+
+
+def __require_pyarrow():
+    if pa is None:
+        raise ImportError("exporting and loading bill details requires pyarrow, install it with: pip install pyarrow")
+
+
+def __partition_path(directory, table_name, session):
+    return os.path.join(directory, table_name, f"session={session}", __file_name)
+
+
+# write table to path, replacing any file already there only once it is complete
+def __write_table(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f, pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def __bills_table(session, bill_details):
+    return pa.table({
+        "session": pa.array([session] * len(bill_details), pa.string()).dictionary_encode(),
+        "url": pa.array([bd.url for bd in bill_details], pa.string()),
+        "title_stripped": pa.array([bd.title_stripped for bd in bill_details], pa.string()),
+        "title_postfix": pa.array([bd.title_postfix for bd in bill_details], pa.string()),
+        "originating_house": pa.array([getattr(bd.originating_house, "name", bd.originating_house)
+                                       for bd in bill_details], pa.string()).dictionary_encode(),
+        "sessions": pa.array([list(bd.sessions) for bd in bill_details], pa.list_(pa.string())),
+        "last_updated": pa.array([pd.Timestamp(bd.last_updated) for bd in bill_details], pa.timestamp("ns")),
+        "summary": pa.array([bd.summary for bd in bill_details], pa.string()),
+    })
+
+
+def __divisions_and_votes_tables(session, bill_details):
+    divisions = [(bd.url, d) for bd in bill_details for d in bd.divisions_list]
+    for _, d in divisions:
+        if d.division_id is None:
+            raise ValueError(f"division {d.division_name!r} has no division_id")
+
+    divisions_table = pa.table({
+        "session": pa.array([session] * len(divisions), pa.string()).dictionary_encode(),
+        "division_id": pa.array([d.division_id for (_, d) in divisions], pa.int64()),
+        "bill_url": pa.array([url for (url, _) in divisions], pa.string()),
+        "division_name": pa.array([d.division_name for (_, d) in divisions], pa.string()),
+        "division_stage": pa.array([d.division_stage for (_, d) in divisions], pa.string()).dictionary_encode(),
+        "ayes": pa.array([len(d.ayes) for (_, d) in divisions], pa.int32()),
+        "noes": pa.array([len(d.noes) for (_, d) in divisions], pa.int32()),
+    })
+
+    # a division on more than one bill has a row for each bill, but its votes only once
+    unique_divisions = list({d.division_id: d for (_, d) in reversed(divisions)}.values())[::-1]
+    n_votes = [len(d.ayes) + len(d.noes) for d in unique_divisions]
+
+    # member ids are concatenated straight from each division's int32 buffers
+    member_ids = [np.empty(0, dtype=np.int32)]
+    votes = [np.empty(0, dtype=np.int8)]
+    for d in unique_divisions:
+        member_ids += [d.ayes.to_numpy(), d.noes.to_numpy()]
+        votes += [np.ones(len(d.ayes), dtype=np.int8), np.full(len(d.noes), -1, dtype=np.int8)]
+
+    votes_table = pa.table({
+        "division_id": pa.array(np.repeat(np.array([d.division_id for d in unique_divisions], dtype=np.int64),
+                                          n_votes)),
+        "member_id": pa.array(np.concatenate(member_ids)),
+        "vote": pa.array(np.concatenate(votes)),
+    })
+
+    return divisions_table, votes_table
+
+
+# the tables of a session's partition, None if it has not been exported
+def __read_partition(directory, session):
+    tables = {}
+    for table_name in TABLE_NAMES:
+        path = __partition_path(directory, table_name, session)
+        if not os.path.exists(path):
+            return None
+        with pa.memory_map(path) as source:
+            tables[table_name] = pa.ipc.open_file(source).read_all()
+
+    return tables
+
+
+# the tables without the rows of the bills with the given urls and their divisions, and without the votes of divisions
+# no longer on any bill that is kept
+def __without_bills(tables, urls):
+    divisions = tables["divisions"].filter(
+        pa.compute.invert(pa.compute.is_in(tables["divisions"]["bill_url"], value_set=urls)))
+
+    return {
+        "bills": tables["bills"].filter(pa.compute.invert(pa.compute.is_in(tables["bills"]["url"], value_set=urls))),
+        "divisions": divisions,
+        "votes": tables["votes"].filter(
+            pa.compute.is_in(tables["votes"]["division_id"], value_set=divisions["division_id"])),
+    }
+
+
+# the kept tables of a session followed by the tables exported now, whose votes replace any kept for the same division
+def __merged(kept_tables, new_tables):
+    kept_votes = kept_tables["votes"].filter(pa.compute.invert(
+        pa.compute.is_in(kept_tables["votes"]["division_id"], value_set=new_tables["divisions"]["division_id"])))
+
+    return {
+        "bills": pa.concat_tables([kept_tables["bills"], new_tables["bills"]]),
+        "divisions": pa.concat_tables([kept_tables["divisions"], new_tables["divisions"]]),
+        "votes": pa.concat_tables([kept_votes, new_tables["votes"]]),
+    }
+
+
+def __write_partition(directory, session, tables):
+    if tables["bills"].num_rows == 0:
+        # every bill of the session has been exported to a later one
+        for table_name in TABLE_NAMES:
+            try:
+                os.remove(__partition_path(directory, table_name, session))
+            except FileNotFoundError:
+                pass
+        return
+
+    for table_name, table in tables.items():
+        # chunks from different exports have their own dictionaries, which a file can not hold
+        table = table.unify_dictionaries().combine_chunks()
+        __write_table(table, __partition_path(directory, table_name, session))
+
+
+def export_bill_details(bill_details: Iterable, directory: str, mode: str = "merge") -> List[str]:
+    """
+    Write bills, their divisions and the member votes in each division to directory, partitioned by session
+
+    :param bill_details: BillDetails objects, such as from bill_details_iterator.get_bill_details
+    :param directory: root directory of the tables, created if it does not exist
+    :param mode: "merge" to keep the bills already exported, replacing those with the same url as a bill exported now,
+        "overwrite" to replace the partition of each session exported with only the bills exported now
+    :return: the sessions written
+    """
+    __require_pyarrow()
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"mode must be one of {EXPORT_MODES}")
+
+    by_session = defaultdict(list)
+    for bd in bill_details:
+        by_session[bd.sessions[-1]].append(bd)
+
+    new_tables = {}
+    for session, session_bill_details in by_session.items():
+        divisions_table, votes_table = __divisions_and_votes_tables(session, session_bill_details)
+        new_tables[session] = {
+            "bills": __bills_table(session, session_bill_details),
+            "divisions": divisions_table,
+            "votes": votes_table,
+        }
+
+    if mode == "merge":
+        urls = pa.array([bd.url for session_bill_details in by_session.values() for bd in session_bill_details],
+                        pa.string())
+        # a bill exported again may have moved to a later session, so every partition is checked for it
+        for session in sorted(set(exported_sessions(directory)) | set(new_tables)):
+            old_tables = __read_partition(directory, session)
+            if old_tables is None:
+                continue
+
+            kept_tables = __without_bills(old_tables, urls)
+            if session in new_tables:
+                new_tables[session] = __merged(kept_tables, new_tables[session])
+            elif kept_tables["bills"].num_rows < old_tables["bills"].num_rows:
+                __write_partition(directory, session, kept_tables)
+
+    for session, tables in new_tables.items():
+        __write_partition(directory, session, tables)
+
+    return list(by_session)
+
+
+def exported_sessions(directory: str, table_name: str = "bills") -> List[str]:
+    """
+    :return: sessions with a partition of the table in directory
+    """
+    table_directory = os.path.join(directory, table_name)
+    if not os.path.isdir(table_directory):
+        return []
+
+    return sorted(name.split("=", 1)[1] for name in os.listdir(table_directory)
+                  if name.startswith("session=") and os.path.exists(os.path.join(table_directory, name, __file_name)))
+
+
+def load_table(directory: str, table_name: str, sessions: Iterable[str] = None, columns: List[str] = None,
+               arrow_dtypes: bool = True) -> pd.DataFrame:
+    """
+    Memory-map one of the exported tables into a DataFrame
+
+    :param directory: root directory the tables were exported to
+    :param table_name: "bills", "divisions" or "votes"
+    :param sessions: sessions to load, None for all exported sessions
+    :param columns: columns to load, None for all
+    :param arrow_dtypes: if true, columns are pandas ArrowDtype backed by the mapped files without copying, otherwise
+        they are converted to NumPy and Python objects
+    :return: DataFrame of the table, empty if no session was exported
+    """
+    __require_pyarrow()
+    if table_name not in TABLE_NAMES:
+        raise ValueError(f"table_name must be one of {TABLE_NAMES}")
+
+    if sessions is None:
+        sessions = exported_sessions(directory, table_name)
+
+    tables = []
+    for session in sessions:
+        with pa.memory_map(__partition_path(directory, table_name, session)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=columns)
+
+    # chunks of the mapped tables are kept as they are rather than combined
+    table = pa.concat_tables(tables)
+
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
+
+
+def load_bill_details(directory: str, sessions: Iterable[str] = None,
+                      arrow_dtypes: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Memory-map the bills, divisions and votes tables into DataFrames
+
+    :param directory: root directory the tables were exported to
+    :param sessions: sessions to load, None for all exported sessions
+    :param arrow_dtypes: see load_table
+    :return: (bills, divisions, votes) DataFrames
+    """
+    if sessions is not None:
+        sessions = list(sessions)
+
+    return tuple(load_table(directory, table_name, sessions=sessions, arrow_dtypes=arrow_dtypes)
+                 for table_name in TABLE_NAMES)
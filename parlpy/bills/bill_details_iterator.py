@@ -6,15 +6,28 @@ Classes (public):
 
 Functions (public):
     get_bill_details
+    aget_bill_details
+    collect_bill_details
+    fetch_bill_details
+    get_bill_summary
 
 """
 import parlpy.bills.bill_list_fetcher as blf
 import parlpy.bills.summary_fetcher as sf
 import parlpy.utils.dates as session_dates
 import parlpy.bills.bill_votes_fetcher as bvf
+from parlpy.bills.details_checkpoint import DetailsCheckpoint
+from parlpy.bills.division_store import DivisionStore
+from parlpy.bills.summary_cache import SummaryCache
+from parlpy.utils.transport import default_transport
 
+import asyncio
+import copy
 import datetime
-from typing import List, Iterable
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Iterable, AsyncIterator
 
 import pandas as pd
 
@@ -34,7 +47,7 @@ class BillDetails():
         self.title_stripped = b.bill_title_stripped
         self.title_postfix = b.postfix
         self.originating_house = b.originating_house
-        self.sessions = b.session
+        self.sessions = list(b.session)
         self.url = base_url + b.bill_detail_path
         self.last_updated = b.last_updated
         self.summary = summary
@@ -58,40 +71,246 @@ def get_start_and_end_dates(b):
     return earliest_start_date, latest_end_date
 
 
+# get the summary of a single bill, from summary_cache if given and the bill has not been updated since it was scraped
+def get_bill_summary(b, http_cache=None, transport=None, summary_cache=None) -> str:
+    if summary_cache is not None:
+        return summary_cache.get_summary(b.bill_detail_path, b.last_updated, http_cache=http_cache, transport=transport)
+
+    return sf.get_summary(b.bill_detail_path, http_cache=http_cache, transport=transport)
+
+
+# get the divisions and summary of a single bill, b is a row of BillsOverview.bills_overview_data from itertuples
+def fetch_bill_details(b, http_cache=None, division_store=None, transport=None, summary_cache=None) -> BillDetails:
+    # use the bill name and narrow results using the start and end dates to get a list of divisions results object
+    title_stripped = b.bill_title_stripped
+    earliest_start_date, latest_end_date = get_start_and_end_dates(b)
+    divisions_data_list = bvf.get_divisions_information(title_stripped, earliest_start_date, latest_end_date,
+                                                        division_store=division_store, transport=transport)
+
+    # get the details path and use it to get summary for the bill
+    summary = get_bill_summary(b, http_cache=http_cache, transport=transport, summary_cache=summary_cache)
+
+    return BillDetails(b, summary, divisions_data_list)
+
+
+def __print_bill_details(b, bill_details: BillDetails) -> None:
+    print(f"{'=' * 10}")
+    print("bill overview tuple")
+    print(b)
+    print(f"Title stripped: {bill_details.title_stripped}")
+    print(f"Title postfix: {bill_details.title_postfix}")
+    print(f"Last updated: {bill_details.last_updated}")
+    print(f"Bill summary: {bill_details.summary}")
+    print(f"Sessions: {bill_details.sessions}")
+    print(f"Number of divisions: {len(bill_details.divisions_list)}")
+    print(f"{'=' * 10}")
+
+
 # yield a BillDetails object
-def get_bill_details(overview: blf.BillsOverview, verbose=False, chronological=False) -> Iterable[BillDetails]:
+def get_bill_details(overview: blf.BillsOverview, verbose=False, chronological=False, prefetch=0,
+                     max_workers=None, division_store: DivisionStore = None,
+                     summary_cache: SummaryCache = None,
+                     checkpoint: DetailsCheckpoint = None) -> Iterable[BillDetails]:
     """
     Function to yield details on a list of bills
 
     :param overview: BillsOverview object containing bills to get details on
     :param debug: whether to print debug info (verbose)
+    :param prefetch: number of upcoming bills to fetch details on in a thread pool while the caller handles the current
+        one, 0 to fetch each bill only when it is asked for. Yield order is unchanged, and an exception raised fetching
+        a bill is raised when that bill is asked for
+    :param max_workers: threads in the pool, defaults to prefetch
+    :param division_store: DivisionStore checked before fetching each division, fetched divisions are added to it
+    :param summary_cache: SummaryCache checked before scraping each summary, scraped summaries are added to it
+    :param checkpoint: DetailsCheckpoint of the bills done by earlier runs, which are skipped. A bill is recorded as done
+        when the caller asks for the next one, as a for loop also does after the last bill, so a bill the caller was
+        handling when it stopped is done again on the next run
     :return: yield a BillDetails object containing details on the bill
     """
     if chronological:
         overview.bills_overview_data = overview.bills_overview_data[::-1]
 
-    for b in overview.bills_overview_data.itertuples():
-        # use the bill name and narrow results using the start and end dates to get a list of divisions results object
-        title_stripped = b.bill_title_stripped
-        earliest_start_date, latest_end_date = get_start_and_end_dates(b)
-        divisions_data_list = bvf.get_divisions_information(title_stripped, earliest_start_date, latest_end_date)
-
-        # get the details path and use it to get summary for the bill
-        detail_path = b.bill_detail_path
-        summary = sf.get_summary(detail_path)
-
-        bill_details = BillDetails(b, summary, divisions_data_list)
-
-        if verbose:
-            print(f"{'=' * 10}")
-            print("bill overview tuple")
-            print(b)
-            print(f"Title stripped: {bill_details.title_stripped}")
-            print(f"Title postfix: {bill_details.title_postfix}")
-            print(f"Last updated: {bill_details.last_updated}")
-            print(f"Bill summary: {bill_details.summary}")
-            print(f"Sessions: {bill_details.sessions}")
-            print(f"Number of divisions: {len(bill_details.divisions_list)}")
-            print(f"{'=' * 10}")
-
-        yield bill_details
+    bills_overview_data = overview.bills_overview_data
+    if checkpoint is not None:
+        bills_overview_data = bills_overview_data[~checkpoint.done_mask(bills_overview_data)]
+
+    try:
+        yield from __get_bill_details(overview, bills_overview_data, verbose, prefetch, max_workers, division_store,
+                                      summary_cache, checkpoint)
+    finally:
+        if checkpoint is not None:
+            checkpoint.flush()
+
+
+def __get_bill_details(overview, bills_overview_data, verbose, prefetch, max_workers, division_store, summary_cache,
+                       checkpoint):
+    if prefetch <= 0:
+        for b in bills_overview_data.itertuples():
+            bill_details = fetch_bill_details(b, http_cache=overview.http_cache, division_store=division_store,
+                                              transport=overview.transport, summary_cache=summary_cache)
+
+            if verbose:
+                __print_bill_details(b, bill_details)
+
+            yield bill_details
+            if checkpoint is not None:
+                checkpoint.mark_done(b.bill_detail_path, b.last_updated)
+        return
+
+    bills = bills_overview_data.itertuples()
+    executor = ThreadPoolExecutor(max_workers=max_workers or prefetch)
+    if overview.transport is None:
+        default_transport(pool_maxsize=max_workers or prefetch)
+    # (bill, future) of the bills being fetched ahead, at most prefetch of them
+    pending = deque()
+
+    def submit_next_bill():
+        b = next(bills, None)
+        if b is not None:
+            pending.append((b, executor.submit(fetch_bill_details, b, http_cache=overview.http_cache,
+                                               division_store=division_store, transport=overview.transport,
+                                               summary_cache=summary_cache)))
+
+    try:
+        for _ in range(prefetch):
+            submit_next_bill()
+
+        while pending:
+            b, future = pending.popleft()
+            bill_details = future.result()
+            submit_next_bill()
+
+            if verbose:
+                __print_bill_details(b, bill_details)
+
+            yield bill_details
+            if checkpoint is not None:
+                checkpoint.mark_done(b.bill_detail_path, b.last_updated)
+    finally:
+        # the consumer may stop early, or a fetch may have raised
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+# asynchronously yield a BillDetails object
+async def aget_bill_details(
+        overview: blf.BillsOverview,
+        max_concurrency: int = 8,
+        ordered: bool = True,
+        verbose=False,
+        chronological=False,
+        division_store: DivisionStore = None,
+        summary_cache: SummaryCache = None,
+        checkpoint: DetailsCheckpoint = None) -> AsyncIterator[BillDetails]:
+    """
+    Asynchronous counterpart of get_bill_details, fetching the divisions and summaries of up to max_concurrency bills at
+    once
+
+    The fetchers make blocking requests, so each runs in a thread pool owned by this generator, with the divisions and
+    summary of a bill fetched side by side. Unlike get_bill_details, overview.bills_overview_data is not reversed in
+    place when chronological is set.
+
+    To use from synchronous code, run it to completion in an event loop, eg with collect_bill_details:
+
+        details_list = bdi.collect_bill_details(overview, max_concurrency=8)
+
+    or equivalently
+
+        async def collect():
+            return [d async for d in bdi.aget_bill_details(overview, max_concurrency=8)]
+        details_list = asyncio.run(collect())
+
+    :param overview: BillsOverview object containing bills to get details on
+    :param max_concurrency: maximum number of bills whose details are being fetched at once, with up to
+        2 * max_concurrency requests made at once. The shared default transport's pool is grown to match, a transport
+        given to the BillsOverview should have a pool_maxsize of at least that
+    :param ordered: if True yield in the order of overview.bills_overview_data, otherwise yield each bill as soon as its
+        details are fetched
+    :param verbose: whether to print debug info
+    :param chronological: whether to go through the bills oldest first
+    :param division_store: DivisionStore checked before fetching each division, fetched divisions are added to it
+    :param summary_cache: SummaryCache checked before scraping each summary, scraped summaries are added to it
+    :param checkpoint: DetailsCheckpoint of the bills done by earlier runs, see get_bill_details
+    :return: asynchronously yield a BillDetails object containing details on the bill
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    bills_overview_data = overview.bills_overview_data
+    if chronological:
+        bills_overview_data = bills_overview_data[::-1]
+    if checkpoint is not None:
+        bills_overview_data = bills_overview_data[~checkpoint.done_mask(bills_overview_data)]
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # two threads per bill, for the divisions and the summary
+    executor = ThreadPoolExecutor(max_workers=2 * max_concurrency)
+    if overview.transport is None:
+        default_transport(pool_maxsize=2 * max_concurrency)
+
+    async def fetch(b):
+        async with semaphore:
+            earliest_start_date, latest_end_date = get_start_and_end_dates(b)
+            divisions_data_list, summary = await asyncio.gather(
+                loop.run_in_executor(executor, functools.partial(bvf.get_divisions_information, b.bill_title_stripped,
+                                                                 earliest_start_date, latest_end_date,
+                                                                 division_store=division_store,
+                                                                 transport=overview.transport)),
+                loop.run_in_executor(executor, functools.partial(get_bill_summary, b,
+                                                                 http_cache=overview.http_cache,
+                                                                 transport=overview.transport,
+                                                                 summary_cache=summary_cache)),
+            )
+
+        return b, BillDetails(b, summary, divisions_data_list)
+
+    tasks = [asyncio.ensure_future(fetch(b)) for b in bills_overview_data.itertuples()]
+    try:
+        for next_result in (tasks if ordered else asyncio.as_completed(tasks)):
+            b, bill_details = await next_result
+
+            if verbose:
+                __print_bill_details(b, bill_details)
+
+            yield bill_details
+            if checkpoint is not None:
+                checkpoint.mark_done(b.bill_detail_path, b.last_updated)
+    finally:
+        # the consumer may stop early, or a fetch may have raised
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False)
+        if checkpoint is not None:
+            checkpoint.flush()
+
+
+def collect_bill_details(overview: blf.BillsOverview, max_concurrency: int = 8, ordered: bool = True, verbose=False,
+                         chronological=False, division_store: DivisionStore = None,
+                         summary_cache: SummaryCache = None, checkpoint: DetailsCheckpoint = None) -> List[BillDetails]:
+    """
+    Run aget_bill_details to completion from synchronous code, must not be called from a running event loop
+
+    :param checkpoint: DetailsCheckpoint of the bills done by earlier runs, which are skipped. As the caller only gets
+        the bills once all of them are collected, they are recorded as done together just before being returned
+    :return: list of BillDetails objects in the order they were yielded
+    """
+    if checkpoint is not None:
+        overview = copy.copy(overview)
+        overview.bills_overview_data = overview.bills_overview_data[
+            ~checkpoint.done_mask(overview.bills_overview_data)]
+
+    async def collect():
+        return [bill_details async for bill_details in aget_bill_details(
+            overview, max_concurrency=max_concurrency, ordered=ordered, verbose=verbose, chronological=chronological,
+            division_store=division_store, summary_cache=summary_cache)]
+
+    details_list = asyncio.run(collect())
+
+    if checkpoint is not None:
+        for b in overview.bills_overview_data.itertuples():
+            checkpoint.mark_done(b.bill_detail_path, b.last_updated)
+        checkpoint.flush()
+
+    return details_list
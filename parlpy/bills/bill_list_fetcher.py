@@ -4,24 +4,23 @@ Contains class that specifies how basic data on bills is collected and represent
 Classes (public):
     BillsOverview
 """
-from urllib.request import urlopen
 import urllib.parse
-from collections import OrderedDict
-import re
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import time
 import datetime
-import pickle
-import os
 from enum import Enum
 
-import pandas as pd
-import numpy
-
-from bs4 import BeautifulSoup
-
 import gcsfs
 
 from parlpy.utils.dates import parliamentary_session_start_dates
+from parlpy.utils.rate_limit import RateLimiter
+from parlpy.utils.state_store import StateStore, LocalFileStateStore, FsspecStateStore
+from parlpy.utils.http_cache import ConditionalHTTPCache
+from parlpy.utils.transport import Transport, default_transport
+from parlpy.bills.details_checkpoint import DetailsCheckpoint
+from parlpy.bills.overview_builder import BillsOverviewBuilder
+import parlpy.bills.listing_parser as listing_parser
 
 
 class BillsOverview():
@@ -34,24 +33,36 @@ class BillsOverview():
     Attributes (public)
     ----------
     bills_overview_data : dataframe
-        data on bills when one of the public methods has run
+        data on bills when one of the public methods has run, last_updated is datetime64, originating_house is
+        categorical and session is categorical over tuples of session names
     run_on_app_engine : bool
         determines what type of pickle to use, if true the gcsfs
+    state_store : parlpy.utils.state_store.StateStore
+        where the datetimes last scraped are kept, by default datetime_last_scraped.p locally or in the project's
+        bucket if run_on_app_engine
     project_name : str
         what google cloud project name to use
     debug : bool
         whether to print debug info
+    html_parser_backend : str
+        BeautifulSoup tree builder used for listing pages, None to use lxml if installed, otherwise html.parser
+    http_cache : parlpy.utils.http_cache.ConditionalHTTPCache
+        if set, pages whose parsed result is cached are only downloaded again when the server reports they changed
+    transport : parlpy.utils.transport.Transport
+        what listing pages are requested with, None for the shared default transport
 
     Methods (public)
     ----------
-    update_all_bills_in_session(session_name="2019-21", fetch_delay=0,)
+    update_all_bills_in_session(session_name="2019-21", fetch_delay=0, max_workers=None, requests_per_second=None)
         insert into bills_overview_data all bills with their basic info for a given session
-    get_changed_bills_in_session(session_name="2019-21", fetch_delay=0)
-        insert into bills_overview_data only bills updated since datetime_last_scraped.p, then updates/creates pickle
-    reset_datetime_last_scraped()
-        reset datetime_last_scraped.p pickle
-    mock_datetime_last_scraped(mock_datetime: datetime.datetime)
-        set datetime_last_scraped.p pickle
+    get_changed_bills_in_session(session_name="2019-21", fetch_delay=0, max_workers=None, requests_per_second=None)
+        insert into bills_overview_data only bills updated since the session was last scraped, then updates state_store
+    reset_datetime_last_scraped(session_name=None)
+        forget when the session, or every session, was last scraped
+    make_details_checkpoint(file_name="bill_details_checkpoint.p", save_every=10)
+        get a DetailsCheckpoint for get_bill_details, stored locally or in the project's bucket if run_on_app_engine
+    mock_datetime_last_scraped(mock_datetime: datetime.datetime, session_name=None)
+        set when the session, or every session, was last scraped
     """
 
     # enum representing the originating house
@@ -59,17 +70,44 @@ class BillsOverview():
         HOUSE_OF_COMMONS = 0
         HOUSE_OF_LORDS = 1
 
-    def __init__(self, run_on_app_engine=False, project_name=None, debug=False):
+    # name of the pickle holding the datetime each session was last scraped
+    __datetime_last_scraped_file_name = "datetime_last_scraped.p"
+
+    # name of the pickle holding the bills get_bill_details has done, by default
+    __details_checkpoint_file_name = "bill_details_checkpoint.p"
+
+    def __init__(self, run_on_app_engine=False, project_name=None, debug=False, html_parser_backend=None,
+                 state_store: StateStore = None, http_cache: ConditionalHTTPCache = None, transport: Transport = None):
         # whether to use gcsfs
         self.run_on_app_engine = run_on_app_engine
 
         # what project to use
         self.project_name = project_name
 
+        # created on first use, then shared by every pickle this object reads or writes
+        self.__gcs_file_system = None
+
+        # holds a dict from session name to the datetime it was last scraped (None if reset), the None key applies to
+        # every session without its own entry
+        if state_store is None:
+            state_store = self.__make_state_store(BillsOverview.__datetime_last_scraped_file_name)
+        self.state_store = state_store
+
         # whether to print output as it is collected
         self.debug = debug
 
-        self.bills_overview_data = pd.DataFrame([], columns=["bill_title_stripped", "postfix", "originating_house", "last_updated", "bill_detail_path", "session"])
+        # BeautifulSoup tree builder for listing pages, None to use lxml if installed, otherwise html.parser
+        self.html_parser_backend = html_parser_backend
+
+        # if set, listing pages are revalidated with conditional requests, and also summaries in get_bill_details
+        self.http_cache = http_cache
+
+        # what listing pages are requested with when not going through http_cache, None for the shared default
+        self.transport = transport
+
+        # bills found by the crawl in progress, built into bills_overview_data when it finishes
+        self.__bills_overview_builder = BillsOverviewBuilder(BillsOverview.OriginatingHouse)
+        self.bills_overview_data = self.__bills_overview_builder.build()
 
         # debugging vars
         self.pages_updated_this_update = 0
@@ -107,146 +145,90 @@ class BillsOverview():
             "Updated (newest first)": "3"
         }
 
-    # get the total number of pages of bills for the selected session
-    # there are many other possible methods of doing this - uncertain which is most robust
-    def __determine_number_pages_for_session(self, session):
-        page_query_string = urllib.parse.urlencode(
-            OrderedDict(
-                Session=session
-            )
-        )
-
-        url = urllib.parse.urlunparse((
-            self.__bills_overview_scheme, self.__bills_overview_netloc, "", "", page_query_string, ""
-        ))
-
-        html_data = urlopen(url)
-        data_bs = BeautifulSoup(html_data.read(), 'html.parser')
-        page_selection_elements = data_bs.find_all("a", href=re.compile("page=*"))
-
-        max_page = 1 # there is always at least one page for a valid session
-        for pt in page_selection_elements:
-            page = int(pt["href"].split('page=')[1])
-
-            if page > max_page:
-                max_page = page
-
-        if self.debug:
-            print("max page = {}".format(max_page))
-
-        return max_page
-
-
-    def __get_title_stripped_and_postfix_list_from_card_tags(self, card_tags):
-        # list containing 2-tuples of form
-        # if title is "xyz Bill" then the first element of tuple is "xyz" and second element of tuple is "Bill"
-        # if title is "xyz Act 20ab" then the first element of tuple is "xyz" and second element of tuple is "Act 20ab"
-        # note that bill/act xyz may have title like:
-        # * "abc act 19uw (def) bill 20ab"
-        # * "abc act 19uw (def) act 20ab"
-        titles_stripped = []
-        postfixes = []
-        originating_houses = []
-        for o in card_tags:
-            title = o.find(class_="primary-info").text
-
-            if "[HL]" in title:
-                originating_houses.append(BillsOverview.OriginatingHouse.HOUSE_OF_LORDS)
-            else:
-                originating_houses.append(BillsOverview.OriginatingHouse.HOUSE_OF_COMMONS)
-
-            # remove trailing "[HL]" if present
-            title_hl_removed = title.rsplit(" [HL]", 1)[0]
-
-            # split using the last occurrence of "Act" in the title
-            # this works for legislation with title "xyz Act 19/20ab" or "def Act 19/20gh ... Act 19/20ab"
-            if "Act" in title_hl_removed and "Bill" not in title_hl_removed:
-                title_stripped = title_hl_removed.rsplit(" Act", 1)[0]
-                # get the "Act 20/19ab" part
-                postfix = title_hl_removed.split(title_stripped, 1)[1]
-                postfix = postfix[1:]
-
-            # split using the last occurrence of "Bill" in the title
-            # this works for legislation with title "xyz Bill" or "def Act 19/20gh ... Bill"
-            elif "Bill" in title_hl_removed:
-                title_stripped = title_hl_removed.rsplit(" Bill", 1)[0]
-                postfix = "Bill"
-
-            # special case for all caps
-            elif "ACT" in title_hl_removed:
-                title_stripped = title_hl_removed.rsplit(" ACT", 1)[0]
-                # get the "Act 20/19ab" part
-                postfix = title_hl_removed.split(title_stripped, 1)[1]
-                postfix = postfix[1:]
-
-            # special case for all caps
-            elif "BILL" in title_hl_removed:
-                title_stripped = title_hl_removed.rsplit(" BILL", 1)[0]
-                postfix = "BILL"
-
-            else:
-                title_stripped = None
-                postfix = None
-
-            if title_stripped is not None:
-                titles_stripped.append(title_stripped)
-                postfixes.append(postfix)
-
-        return titles_stripped, postfixes, originating_houses
-
-
-    def __get_updated_dates_list_from_card_tags(self, card_tags):
-        updated_dates = []
-        for o in card_tags:
-            updated_date = o.find(class_="indicators-left")
-            updated_date = updated_date.text.split("updated: ")[1]
-            updated_date = updated_date.splitlines()[0]
-            updated_date = updated_date.rsplit(" ", 1)[0]
-
-            updated_date_datetime = datetime.datetime.strptime(updated_date, '%d %B %Y at %H:%M')
-
-            updated_dates.append(updated_date_datetime)
+    # split a title into its stripped title and postfix, and find the originating house
+    # if title is "xyz Bill" then the stripped title is "xyz" and the postfix is "Bill"
+    # if title is "xyz Act 20ab" then the stripped title is "xyz" and the postfix is "Act 20ab"
+    # note that bill/act xyz may have title like:
+    # * "abc act 19uw (def) bill 20ab"
+    # * "abc act 19uw (def) act 20ab"
+    # the stripped title and postfix are None if the title does not conform to the standard layout
+    def __split_title(self, title):
+        if "[HL]" in title:
+            originating_house = BillsOverview.OriginatingHouse.HOUSE_OF_LORDS
+        else:
+            originating_house = BillsOverview.OriginatingHouse.HOUSE_OF_COMMONS
+
+        # remove trailing "[HL]" if present
+        title_hl_removed = title.rsplit(" [HL]", 1)[0]
+
+        # split using the last occurrence of "Act" in the title
+        # this works for legislation with title "xyz Act 19/20ab" or "def Act 19/20gh ... Act 19/20ab"
+        if "Act" in title_hl_removed and "Bill" not in title_hl_removed:
+            title_stripped = title_hl_removed.rsplit(" Act", 1)[0]
+            # get the "Act 20/19ab" part
+            postfix = title_hl_removed.split(title_stripped, 1)[1]
+            postfix = postfix[1:]
+
+        # split using the last occurrence of "Bill" in the title
+        # this works for legislation with title "xyz Bill" or "def Act 19/20gh ... Bill"
+        elif "Bill" in title_hl_removed:
+            title_stripped = title_hl_removed.rsplit(" Bill", 1)[0]
+            postfix = "Bill"
+
+        # special case for all caps
+        elif "ACT" in title_hl_removed:
+            title_stripped = title_hl_removed.rsplit(" ACT", 1)[0]
+            # get the "Act 20/19ab" part
+            postfix = title_hl_removed.split(title_stripped, 1)[1]
+            postfix = postfix[1:]
+
+        # special case for all caps
+        elif "BILL" in title_hl_removed:
+            title_stripped = title_hl_removed.rsplit(" BILL", 1)[0]
+            postfix = "BILL"
 
-        return updated_dates
+        else:
+            title_stripped = None
+            postfix = None
 
+        return title_stripped, postfix, originating_house
 
-    def __get_bill_data_path_list_from_card_tags(self, card_tags):
-        bill_details_paths = []
-        for o in card_tags:
-            bill_detail_path_tag = o.find(class_="overlay-link")
-            bill_data_path = bill_detail_path_tag["href"]
+    # adds bills to those found by the crawl in progress, they are put in bills_overview_data when the crawl finishes
+    def put_bill_info_in_list_into_bills_overview_data(self, bill_tuple_list):
+        if len(bill_tuple_list) > 0:
+            self.__bills_overview_builder.extend(bill_tuple_list)
 
-            bill_details_paths.append(bill_data_path)
+            if self.debug:
+                print("last item on page: {}".format(bill_tuple_list[-1]))
 
-        return bill_details_paths
+    # start collecting bills for a new crawl
+    def __start_bills_overview_data(self):
+        self.__bills_overview_builder = BillsOverviewBuilder(BillsOverview.OriginatingHouse)
+        self.bills_overview_data = self.__bills_overview_builder.build()
 
-    def __get_bill_sessions_list_from_card_tags(self, card_tags):
-        bill_sessions = []
-        for o in card_tags:
-            # get text of form "Session 20xx-yy, 20ww-zz..."
-            sessions = o.find(class_="secondary-info")
-            sessions_text = sessions.text
-            # put into list with members of form 20aa-bb
-            sessions_text = sessions_text.split(" ", maxsplit=1)[1]
-            sessions_list = sessions_text.split(", ")
-            bill_sessions.append(sessions_list)
+    # build bills_overview_data from all bills collected during the crawl
+    def __finish_bills_overview_data(self):
+        self.bills_overview_data = self.__bills_overview_builder.build()
 
-        return bill_sessions
+    # get a store for the named pickle, in the project's bucket if run_on_app_engine, otherwise in the working directory
+    def __make_state_store(self, file_name):
+        if self.run_on_app_engine:
+            if self.__gcs_file_system is None:
+                self.__gcs_file_system = gcsfs.GCSFileSystem(project=self.project_name)
 
-    def put_bill_info_in_list_into_bills_overview_data(self, bill_tuple_list):
-        if len(bill_tuple_list) > 0:
-            bill_tuple_arr = numpy.array(bill_tuple_list, dtype=object)
+            return FsspecStateStore(self.__gcs_file_system, f"{self.project_name}.appspot.com" + "/" + file_name)
 
-            page_df = pd.DataFrame(bill_tuple_arr, columns=["bill_title_stripped", "postfix", "originating_house", "last_updated", "bill_detail_path", "session"])
+        return LocalFileStateStore(file_name)
 
-            new_indices = [x for x in
-                           range(len(self.bills_overview_data.index), len(self.bills_overview_data.index) + len(page_df))]
-            page_df.index = new_indices
+    # get the dict from session name to the datetime it was last scraped
+    def __load_datetimes_last_scraped(self):
+        datetimes_last_scraped = self.state_store.load(default={})
 
-            self.bills_overview_data = pd.concat([self.bills_overview_data, page_df])
+        # pickles written by earlier versions hold a single datetime shared by all sessions
+        if isinstance(datetimes_last_scraped, datetime.datetime):
+            datetimes_last_scraped = {None: datetimes_last_scraped}
 
-            if self.debug:
-                print("last item on page: {}".format(page_df.iloc[-1]))
+        return datetimes_last_scraped
 
     # puts the partial dataframe containing titles, their last updated dates and bill details paths into dataframe
     # member variable bills_overview_data
@@ -260,27 +242,10 @@ class BillsOverview():
             updated_dates,
             bill_details_paths,
             bill_sessions,
-            check_last_updated=True):
+            check_last_updated=True,
+            loaded_datetime_last_scraped=None):
         bill_tuple_list = []
 
-        if self.run_on_app_engine:
-            fs = gcsfs.GCSFileSystem(project=self.project_name)
-            try:
-                with fs.open(f"{self.project_name}.appspot.com" + "/" + "datetime_last_scraped.p", "rb") as handle:
-                    loaded_datetime_last_scraped = pickle.load(handle)
-            except (FileNotFoundError) as e:
-                # this is the case if the pickle file has been manually deleted, or if this is the first time
-                # get_changed_bills_in_session is running
-                loaded_datetime_last_scraped = None
-        else:
-            try:
-                with open("datetime_last_scraped.p", "rb") as f:
-                    loaded_datetime_last_scraped = pickle.load(f)
-            except (FileNotFoundError) as e:
-                # this is the case if the pickle file has been manually deleted, or if this is the first time
-                # get_changed_bills_in_session is running
-                loaded_datetime_last_scraped = None
-
         for i in range(len(titles_stripped)):
             if loaded_datetime_last_scraped != None and check_last_updated:
                 delta_from_last_update_call = loaded_datetime_last_scraped - updated_dates[i]
@@ -321,8 +286,9 @@ class BillsOverview():
         # last item was updated since we last called, so proceed to next page
         return False
 
-    # adds bill overview information to self.bills_overview_data
-    def __fetch_all_overview_info_on_page(self, session, sort_order, page):
+    # download and parse a single listing page, giving the number of pages and the bill overview information on it
+    # if http_cache is set, the page is revalidated rather than downloaded and parsed again when it has not changed
+    def __fetch_listing_page(self, session, sort_order, page):
         page_query_string = urllib.parse.urlencode(
             OrderedDict(
                 Session=session,
@@ -335,30 +301,128 @@ class BillsOverview():
             self.__bills_overview_scheme, self.__bills_overview_netloc, "", "", page_query_string, ""
         ))
 
-        html_data = urlopen(url)
-        data_bs = BeautifulSoup(html_data.read(), 'html.parser')
+        if self.http_cache is not None:
+            return self.http_cache.fetch(url, self.__parse_listing_page, namespace="bills-listing")
+
+        transport = self.transport if self.transport is not None else default_transport()
+        response = transport.get(url)
+        response.raise_for_status()
+
+        return self.__parse_listing_page(response.content)
+
+    def __parse_listing_page(self, body):
+        page_html = body.decode("utf-8", errors="replace")
 
-        card_tags = data_bs.find_all(class_="card-clickable")
+        return listing_parser.count_pages(page_html), self.__get_overview_info_from_page(page_html)
 
-        (titles_stripped, postfixes, originating_houses) = self.__get_title_stripped_and_postfix_list_from_card_tags(card_tags)
-        updated_dates = self.__get_updated_dates_list_from_card_tags(card_tags)
-        bill_data_paths = self.__get_bill_data_path_list_from_card_tags(card_tags)
-        sessions = self.__get_bill_sessions_list_from_card_tags(card_tags)
+    # get the bill overview information from the html of a listing page
+    # bills whose titles do not conform to the standard layout are not added
+    def __get_overview_info_from_page(self, page_html):
+        cards = listing_parser.parse_cards(page_html, backend=self.html_parser_backend)
+        updated_dates = listing_parser.parse_updated_dates([updated_date for (_, updated_date, _, _) in cards])
+
+        titles_stripped = []
+        postfixes = []
+        originating_houses = []
+        bill_data_paths = []
+        sessions = []
+        kept_updated_dates = []
+        for (title, _, bill_data_path, bill_sessions), updated_date in zip(cards, updated_dates):
+            title_stripped, postfix, originating_house = self.__split_title(title)
+            if title_stripped is None:
+                continue
+
+            titles_stripped.append(title_stripped)
+            postfixes.append(postfix)
+            originating_houses.append(originating_house)
+            kept_updated_dates.append(updated_date)
+            bill_data_paths.append(bill_data_path)
+            sessions.append(bill_sessions)
 
         # list of titles, list of updated_dates, list of bill_data_paths, list of list of sessions
-        return (titles_stripped, postfixes, originating_houses, updated_dates, bill_data_paths, sessions)
+        return (titles_stripped, postfixes, originating_houses, kept_updated_dates, bill_data_paths, sessions)
+
+    # yields the overview info tuple of each listing page of the session, in page order
+    # page 1 is fetched once and gives both its bills and the number of pages, the remaining pages are only scheduled
+    # once page 1 has been consumed, so a consumer that stops after page 1 (eg when it holds every updated bill) makes a
+    # single request
+    # if max_workers is more than 1, pages after the first are fetched and parsed in a thread pool, with at most
+    # max_workers pages fetched ahead of the page being consumed. the per-page sleep is then replaced by a rate limit
+    # shared between the workers, taken from requests_per_second or, if that is not given, from fetch_delay
+    def __iter_overview_info_on_pages(self, session_code, sort_order_code, fetch_delay, max_workers=None,
+                                      requests_per_second=None):
+        if requests_per_second is None and max_workers is not None and max_workers > 1 and fetch_delay > 0:
+            requests_per_second = 1 / fetch_delay
+
+        rate_limiter = RateLimiter(requests_per_second) if requests_per_second is not None else None
+
+        def wait_for_turn():
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            else:
+                time.sleep(fetch_delay)
+
+        def fetch_page(page):
+            wait_for_turn()
+
+            _, page_info = self.__fetch_listing_page(session_code, sort_order_code, page)
+
+            return page_info
+
+        wait_for_turn()
+        max_page, first_page_info = self.__fetch_listing_page(session_code, sort_order_code, 1)
+
+        if self.debug:
+            print("max page = {}".format(max_page))
+
+        pages = iter(range(2, max_page + 1))
+
+        yield first_page_info
+
+        if max_workers is None or max_workers <= 1:
+            for page in pages:
+                yield fetch_page(page)
+            return
+
+        if self.transport is None:
+            # one connection per worker, so that connections are not opened and discarded for every page
+            default_transport(pool_maxsize=max_workers)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = deque()
+
+        def submit_next_page():
+            page = next(pages, None)
+            if page is not None:
+                pending.append(executor.submit(fetch_page, page))
 
+        try:
+            # keep the pool saturated, results are consumed in the order that the pages were submitted
+            for _ in range(max_workers):
+                submit_next_page()
 
-    def __update_bills_overview_up_to_page(self, session_code, max_page, fetch_delay, smart_update=True):
-        # get in order of updated, because update_bills_overview_up_to_page is planned to only crawl pages with
+            while pending:
+                page_info = pending.popleft().result()
+                submit_next_page()
+
+                yield page_info
+        finally:
+            # the consumer may stop early (eg once all updated bills have been found), so drop pages not yet started
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def __update_bills_overview_all_pages(self, session_code, fetch_delay, smart_update=True, max_workers=None,
+                                          requests_per_second=None):
+        # get in order of updated, because update_bills_overview_with_updated_bills_only only crawls pages with
         # bills updated since the method was last called
         sort_order_code = self.__bills_overview_sort_order["Updated (newest first)"]
 
-        for i in range(1, max_page+1):
-            time.sleep(fetch_delay)
+        pages_info = self.__iter_overview_info_on_pages(
+            session_code, sort_order_code, fetch_delay, max_workers, requests_per_second)
 
-            (titles_stripped, postfixes, originating_houses, updated_dates, bill_data_paths, bill_sessions) \
-                = self.__fetch_all_overview_info_on_page(session_code, sort_order_code, i)
+        for (titles_stripped, postfixes, originating_houses, updated_dates, bill_data_paths, bill_sessions) \
+                in pages_info:
 
             self.__add_page_data_to_bills_overview_data(titles_stripped, postfixes, originating_houses, updated_dates, bill_data_paths,
                                                         bill_sessions, check_last_updated=False)
@@ -368,106 +432,146 @@ class BillsOverview():
             self,
             session_name="2019-21",
             fetch_delay=0,
+            max_workers=None,
+            requests_per_second=None,
     ):
         """
         Put all bills in session into self.bills_overview_data
 
         :param session_name: str to determine session, eg "2004-05"... or "All"
         :param fetch_delay: int how many miliseconds to delay between scrapes
+        :param max_workers: if more than 1, fetch and parse listing pages concurrently using this many threads, the
+            resulting bills_overview_data is the same as when fetching serially. The shared default transport's pool is
+            grown to max_workers connections, a transport given to BillsOverview should have a pool_maxsize of at least
+            max_workers, or connections beyond its pool are opened and discarded for every page
+        :param requests_per_second: rate limit on page fetches shared between all workers, replaces fetch_delay
         """
         # reset df
-        self.bills_overview_data = pd.DataFrame([], columns=["bill_title_stripped", "postfix", "originating_house", "last_updated", "bill_detail_path", "session"])
+        self.__start_bills_overview_data()
 
         # get the integer string corresponding to session string
         session_code = self.__bills_overview_session[session_name]
 
-        max_page = self.__determine_number_pages_for_session(session_code)
+        self.__update_bills_overview_all_pages(session_code, fetch_delay, max_workers=max_workers,
+                                               requests_per_second=requests_per_second)
 
-        self.__update_bills_overview_up_to_page(session_code, max_page, fetch_delay)
+        self.__finish_bills_overview_data()
 
-    def __update_bills_overview_with_updated_bills_only_up_to_page(self, session_code, max_page, fetch_delay, debug=False):
+    def __update_bills_overview_with_updated_bills_only(self, session_name, fetch_delay, debug=False, max_workers=None,
+                                                        requests_per_second=None):
         sort_order_code = self.__bills_overview_sort_order["Updated (newest first)"]
+        session_code = self.__bills_overview_session[session_name]
 
-        for i in range(1, max_page + 1):
-            time.sleep(fetch_delay)
-            (titles_stripped, postfixes, originating_houses, updated_dates, bill_data_paths, bill_sessions) \
-                = self.__fetch_all_overview_info_on_page(session_code, sort_order_code, i)
+        # loaded once for the whole crawl, None if this is the first time the session is scraped
+        datetimes_last_scraped = self.__load_datetimes_last_scraped()
+        if session_name in datetimes_last_scraped:
+            loaded_datetime_last_scraped = datetimes_last_scraped[session_name]
+        else:
+            loaded_datetime_last_scraped = datetimes_last_scraped.get(None)
+
+        pages_info = self.__iter_overview_info_on_pages(
+            session_code, sort_order_code, fetch_delay, max_workers, requests_per_second)
 
+        for i, (titles_stripped, postfixes, originating_houses, updated_dates, bill_data_paths, bill_sessions) \
+                in enumerate(pages_info, start=1):
             if debug:
                 print(f"(titles_stripped, postfixes, updated_dates, bill_data_paths, bill_sessions) for page {i}: {(titles_stripped, postfixes, updated_dates, bill_data_paths, bill_sessions)}")
 
             got_all_updated_bills = self.__add_page_data_to_bills_overview_data(titles_stripped, postfixes, originating_houses,
                                                                                 updated_dates, bill_data_paths,
-                                                                                bill_sessions, check_last_updated=True)
+                                                                                bill_sessions, check_last_updated=True,
+                                                                                loaded_datetime_last_scraped=loaded_datetime_last_scraped)
             # if we have all the bills which were updated since we last checked, no need to check any more pages
             if got_all_updated_bills:
                 break
 
+        # stop any pages still being fetched ahead
+        pages_info.close()
+
+        self.__finish_bills_overview_data()
+
         # store the current datetime for future use, so we know we have just scraped
         to_store_datetime_last_scraped = datetime.datetime.now()
         if self.debug:
             print("saving to_store_datetime_last_scraped {}".format(to_store_datetime_last_scraped))
-        if self.run_on_app_engine:
-            fs = gcsfs.GCSFileSystem(project=self.project_name)
-            with fs.open(f"{self.project_name}.appspot.com" + "/" + "datetime_last_scraped.p", "wb") as handle:
-                pickle.dump(to_store_datetime_last_scraped, handle)
-        else:
-            with open("datetime_last_scraped.p", "wb") as f:
-                pickle.dump(to_store_datetime_last_scraped, f)
+        datetimes_last_scraped[session_name] = to_store_datetime_last_scraped
+        self.state_store.save(datetimes_last_scraped)
 
     # this method uses a pickled variable (so that ths package can be run periodically)
     # puts into self.bills_overview_data, bills which have been updated since the method was last called
     # these can then be compared to values in a database for example
     # by default use the latest session
-    def get_changed_bills_in_session(self, session_name=list(parliamentary_session_start_dates.keys())[0], fetch_delay=0, debug=False):
+    def get_changed_bills_in_session(self, session_name=list(parliamentary_session_start_dates.keys())[0], fetch_delay=0, debug=False,
+                                     max_workers=None, requests_per_second=None):
         """
-        Method to update self.bills_overview_data, but only those updated since the time in datetime_last_scraped.p
+        Method to update self.bills_overview_data, but only those updated since the session was last scraped
 
-        Method behaves like update_all_bills_in_session on its first run or after reset_datetime_last_scraped called,
-        after loading data into self.bills_overview_data it updates the pickle file so that the next time it runs it
-        only gets new bills
+        Method behaves like update_all_bills_in_session on its first run for a session or after
+        reset_datetime_last_scraped called, after loading data into self.bills_overview_data it records the time in
+        state_store so that the next time it runs for the session it only gets new bills
         :param session_name:
         :param fetch_delay:
+        :param max_workers: if more than 1, fetch and parse listing pages after the first concurrently using this many
+            threads, at most max_workers pages are fetched beyond the last page containing updated bills, and none if
+            the first page holds every updated bill
+        :param requests_per_second: rate limit on page fetches shared between all workers, replaces fetch_delay
         """
         # reset df ready for new data
-        self.bills_overview_data = pd.DataFrame([], columns=["bill_title_stripped", "postfix", "originating_house", "last_updated", "bill_detail_path", "session"])
-
-        session_code = self.__bills_overview_session[session_name]
-
-        max_page = self.__determine_number_pages_for_session(session_code)
+        self.__start_bills_overview_data()
 
         if debug:
-            print("session code ", session_code)
-            print("max page ", max_page)
+            print("session code ", self.__bills_overview_session[session_name])
 
-        self.__update_bills_overview_with_updated_bills_only_up_to_page(session_code, max_page, fetch_delay, debug=debug)
+        self.__update_bills_overview_with_updated_bills_only(session_name, fetch_delay, debug=debug,
+                                                             max_workers=max_workers,
+                                                             requests_per_second=requests_per_second)
 
 
-    def reset_datetime_last_scraped(self):
+    def reset_datetime_last_scraped(self, session_name=None):
         """
-        Delete datetime_last_scraped.p if it exists
+        Forget when bills were last scraped, so that the next call to get_changed_bills_in_session gets all bills
+
+        :param session_name: session to forget, or None to forget every session
         """
-        if self.run_on_app_engine:
-            fs = gcsfs.GCSFileSystem(project=self.project_name)
-            if fs.exists(f"{self.project_name}.appspot.com" + "/" + "datetime_last_scraped.p"):
-                fs.rm(f"{self.project_name}.appspot.com" + "/" + "datetime_last_scraped.p")
-        else:
-            if os.path.exists("datetime_last_scraped.p"):
-                os.remove("datetime_last_scraped.p")
-            else:
+        if session_name is None:
+            if not self.state_store.delete() and not self.run_on_app_engine:
                 print("datetime last scraped not recorded")
+            return
+
+        datetimes_last_scraped = self.__load_datetimes_last_scraped()
+        if datetimes_last_scraped.get(session_name, datetimes_last_scraped.get(None)) is None:
+            print("datetime last scraped not recorded")
+        # kept as None rather than removed, so that the datetime shared by every session does not apply to it
+        datetimes_last_scraped[session_name] = None
+        self.state_store.save(datetimes_last_scraped)
 
 
-    def mock_datetime_last_scraped(self, mock_datetime: datetime.datetime):
+    def mock_datetime_last_scraped(self, mock_datetime: datetime.datetime, session_name=None):
         """
         Save a given datetime as last scraped
 
         :param mock_datetime: datetime to save
+        :param session_name: session to save it for, or None to save it for every session
         """
-        if self.run_on_app_engine:
-            fs = gcsfs.GCSFileSystem(project=self.project_name)
-            with fs.open(f"{self.project_name}.appspot.com" + "/" + "datetime_last_scraped.p", "wb") as handle:
-                pickle.dump(mock_datetime, handle)
+        if session_name is None:
+            datetimes_last_scraped = {None: mock_datetime}
         else:
-            with open("datetime_last_scraped.p", "wb") as f:
-                pickle.dump(mock_datetime, f)
\ No newline at end of file
+            datetimes_last_scraped = self.__load_datetimes_last_scraped()
+            datetimes_last_scraped[session_name] = mock_datetime
+
+        self.state_store.save(datetimes_last_scraped)
+
+    def make_details_checkpoint(self, file_name: str = None, save_every: int = 10) -> DetailsCheckpoint:
+        """
+        Get a checkpoint to pass to bill_details_iterator.get_bill_details, so that a run that stops part way through
+        skips the bills already done when run again. It is kept in the same way as state_store is by default, locally or
+        in the project's bucket if run_on_app_engine
+
+        :param file_name: name of the pickle holding the checkpoint, default bill_details_checkpoint.p
+        :param save_every: number of bills done between writes of the checkpoint
+        :return: DetailsCheckpoint holding the bills done by earlier runs
+        """
+        if file_name is None:
+            file_name = BillsOverview.__details_checkpoint_file_name
+
+        return DetailsCheckpoint(self.__make_state_store(file_name), save_every=save_every)
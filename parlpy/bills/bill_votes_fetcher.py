@@ -3,21 +3,37 @@ Contains a function to return a list of DivisionInformation objects with informa
 
 Classes (public):
     DivisionInformation
+    DivisionFetchStats
 
 Functions (public):
     get_divisions_information
+
+Variables (public):
+    division_fetch_stats
 """
 
 import requests
 import datetime
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from parlpy.bills.division_store import DivisionStore
+from parlpy.bills.member_ids import MemberIds
+from parlpy.utils.rate_limit import RateLimiter, host_rate_limiter
+from parlpy.utils.transport import Transport, default_transport
+
+# host of the Commons Votes API, requests to it share a rate limit when one is set
+votes_api_host = "commonsvotes-api.parliament.uk"
 
 
 # get Response object from API, queried about divisions on a stripped title (title without the act/bill postfix)
+# requests are made with transport, or the shared default transport if None
 def fetch_votes(
         bill_title_stripped: str,
         start_datetime: datetime.date,
-        end_datetime: datetime.date = None) -> requests.models.Response:
+        end_datetime: datetime.date = None,
+        transport: Transport = None) -> requests.models.Response:
     votes_endpoint = 'https://commonsvotes-api.parliament.uk/data/divisions.json/search'
 
     votes_parameters = {'queryParameters.searchTerm': bill_title_stripped,
@@ -28,34 +44,78 @@ def fetch_votes(
     if end_datetime is not None:
         votes_parameters['queryParameters.endDate'] = end_datetime.isoformat()
 
-    r = requests.get(votes_endpoint, params=votes_parameters)
+    if transport is None:
+        transport = default_transport()
+    r = transport.get(votes_endpoint, params=votes_parameters)
 
     return r
 
 
-# get a list of divisionIDs
+class DivisionFetchStats():
+    """
+    Class counting division search hits and the detail fetches avoided by filtering them on their search result titles
+
+    Attributes (public):
+    ---------
+    search_hits: int
+        divisions returned by searches
+    skipped_fetches: int
+        divisions whose details were not fetched as their title shows they are not on the bill
+    """
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.search_hits = 0
+        self.skipped_fetches = 0
+
+    def record(self, search_hits: int, skipped_fetches: int) -> None:
+        with self.__lock:
+            self.search_hits += search_hits
+            self.skipped_fetches += skipped_fetches
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.search_hits = 0
+            self.skipped_fetches = 0
+
+    def __repr__(self):
+        return f"DivisionFetchStats(search_hits={self.search_hits}, skipped_fetches={self.skipped_fetches})"
+
+
+# counts for every call to get_divisions_information in this process
+division_fetch_stats = DivisionFetchStats()
+
+
+# get a list of (DivisionId, division title) for each search result, the title is None if the result has none
 # note that the earliest *bill* division provided by the system is 2016-03-09
 # the earliest session with bill divisions recorded by the system is 2015-16
-def get_division_ids(
+def get_division_search_results(
         bill_title_stripped: str,
         start_datetime: datetime.date,
-        end_datetime: datetime.date = None) -> list:
-    division_response = fetch_votes(bill_title_stripped, start_datetime, end_datetime)
+        end_datetime: datetime.date = None,
+        transport: Transport = None) -> list:
+    division_response = fetch_votes(bill_title_stripped, start_datetime, end_datetime, transport=transport)
     division_obj = json.loads(division_response.text)
 
-    division_ids = []
+    return [(d["DivisionId"], d.get("Title")) for d in division_obj]
 
-    for d in division_obj:
-        division_ids.append(d["DivisionId"])
 
-    return division_ids
+# get a list of divisionIDs
+def get_division_ids(
+        bill_title_stripped: str,
+        start_datetime: datetime.date,
+        end_datetime: datetime.date = None,
+        transport: Transport = None) -> list:
+    return [division_id for (division_id, _) in
+            get_division_search_results(bill_title_stripped, start_datetime, end_datetime, transport=transport)]
 
 
 # return response for specific division by ID
-def fetch_division_values(division_id):
+def fetch_division_values(division_id, transport: Transport = None):
     specific_division_endpoint = f"https://commonsvotes-api.parliament.uk/data/division/{division_id}.json"
 
-    response = requests.get(specific_division_endpoint)
+    if transport is None:
+        transport = default_transport()
+    response = transport.get(specific_division_endpoint)
 
     return response
 
@@ -83,21 +143,34 @@ def determine_division_stage(division_title):
 
 
 # build and return a DivisionInformation object with title, stage, ayes list and noes list
-def get_division_values(division_id):
-    response = fetch_division_values(division_id)
-    specific_division_obj = json.loads(response.text)
+# if division_store is given, the division is only fetched if it is not already stored, and is stored once fetched
+# if rate_limiter is given, waits for it before fetching
+def get_division_values(division_id, division_store: DivisionStore = None, rate_limiter: RateLimiter = None,
+                        transport: Transport = None):
+    stored_division = division_store.get(division_id) if division_store is not None else None
+
+    if stored_division is not None:
+        division_title, ayes_ids, noes_ids = stored_division
+    else:
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        response = fetch_division_values(division_id, transport=transport)
+        specific_division_obj = json.loads(response.text)
+
+        division_title = specific_division_obj["Title"]
 
-    division_title = specific_division_obj["Title"]
+        ayes_data = specific_division_obj["Ayes"]
+        ayes_ids = [a["MemberId"] for a in ayes_data]
 
-    ayes_data = specific_division_obj["Ayes"]
-    ayes_ids = [a["MemberId"] for a in ayes_data]
+        noes_data = specific_division_obj["Noes"]
+        noes_ids = [n["MemberId"] for n in noes_data]
 
-    noes_data = specific_division_obj["Noes"]
-    noes_ids = [n["MemberId"] for n in noes_data]
+        if division_store is not None:
+            division_store.put(division_id, division_title, ayes_ids, noes_ids)
 
     division_stage = determine_division_stage(division_title)
 
-    division_values = DivisionInformation(division_title, division_stage, ayes_ids, noes_ids)
+    division_values = DivisionInformation(division_title, division_stage, ayes_ids, noes_ids, division_id)
 
     return division_values
 
@@ -105,15 +178,52 @@ def get_division_values(division_id):
 class DivisionInformation():
     """
     Class representing a division
+
+    Attributes (public):
+    ---------
+    division_name: str
+    division_stage: str
+        may be "Second Reading", "Third Reading", "Amendments"
+    ayes: parlpy.bills.member_ids.MemberIds
+        MP ids for the ayes, any iterable of ids may be assigned
+    noes: parlpy.bills.member_ids.MemberIds
+        MP ids for the noes, any iterable of ids may be assigned
+    division_id: int
+        DivisionId in the Commons Votes API, None if not known
     """
-    def __init__(self, division_name="", division_stage="", ayes=[], noes=[]):
+    __slots__ = ("division_name", "division_stage", "__ayes", "__noes", "division_id")
+
+    def __init__(self, division_name="", division_stage="", ayes=(), noes=(), division_id=None):
         self.division_name = division_name
         # may be "Second Reading", "Third Reading", "Amendments"
         self.division_stage = division_stage
-        # list of MP ids for the ayes
+        # MP ids for the ayes
         self.ayes = ayes
-        # list of MP ids for the noes
+        # MP ids for the noes
         self.noes = noes
+        self.division_id = division_id
+
+    @property
+    def ayes(self) -> MemberIds:
+        return self.__ayes
+
+    # assigning a list, or augmenting with += (which gives a list), stores the ids as an int32 buffer
+    @ayes.setter
+    def ayes(self, ids) -> None:
+        self.__ayes = MemberIds(ids)
+
+    @property
+    def noes(self) -> MemberIds:
+        return self.__noes
+
+    @noes.setter
+    def noes(self, ids) -> None:
+        self.__noes = MemberIds(ids)
+
+    # the ids are pickled as their int32 buffers, passed out of band with protocol 5 and a buffer_callback
+    def __reduce__(self):
+        return DivisionInformation, (self.division_name, self.division_stage, self.__ayes, self.__noes,
+                                     self.division_id)
 
 
 # checks that a division is on a bill and not some other matter
@@ -138,12 +248,28 @@ def get_divisions_information(
         bill_title_stripped: str,
         start_datetime: datetime.date,
         end_datetime: datetime.date=None,
-        skip_old_bills=True):
+        skip_old_bills=True,
+        division_store: DivisionStore = None,
+        max_workers: int = None,
+        requests_per_second: float = None,
+        transport: Transport = None,
+        rate_limiter: RateLimiter = None):
     """
     :param bill_title_stripped: str of bill title minus the "Bill" or "Act 20ab" used to get division info from API
     :param start_datetime: datetime used to narrow results of division search
     :param end_datetime: datetime used to narrow results of division search
     :param skip_old_bills: whether to skip calling api on old bills that we know dont have division data
+    :param division_store: DivisionStore checked before fetching each division, fetched divisions are added to it
+    :param max_workers: if more than 1, fetch the divisions concurrently using this many threads, the returned list is
+        in the same order as when fetching serially. The shared default transport's pool is grown to max_workers
+        connections, a transport given should have a pool_maxsize of at least max_workers
+    :param requests_per_second: rate limit on requests to the votes API, through the limiter host_rate_limiter keeps
+        for the API for the rest of the process. It is shared with every other call and held at the lowest rate any
+        call has asked for, so a call asking for a higher rate than an earlier one is held to the earlier rate
+    :param transport: what requests are made with, None for the shared default transport
+    :param rate_limiter: RateLimiter spacing out the requests instead of the API's shared one, eg one made for a single
+        crawl and passed to each of its calls, so that its rate does not affect other crawls, requests_per_second is
+        then ignored
     :return: list of DivisionInformation objects
     """
     # we know that the earliest division is 2016-3-9
@@ -155,13 +281,36 @@ def get_divisions_information(
     if skip_old_bills and delta is not None and delta.total_seconds() < 0:
         return []
 
-    division_ids = get_division_ids(bill_title_stripped, start_datetime, end_datetime)
+    if rate_limiter is None and requests_per_second is not None:
+        rate_limiter = host_rate_limiter(votes_api_host, requests_per_second)
+    if rate_limiter is not None:
+        rate_limiter.wait()
 
-    division_information_list = []
+    search_results = get_division_search_results(bill_title_stripped, start_datetime, end_datetime, transport=transport)
+
+    # the search results already carry each division's title, so only fetch the details of divisions that may be on the
+    # bill. divisions without a title in the search results are fetched and checked on their full title as before
+    division_ids = [division_id for (division_id, division_title) in search_results
+                    if division_title is None or check_division_is_on_bill(bill_title_stripped, division_title)]
+    division_fetch_stats.record(len(search_results), len(search_results) - len(division_ids))
+
+    def get_values(division_id):
+        return get_division_values(division_id, division_store=division_store, rate_limiter=rate_limiter,
+                                   transport=transport)
 
-    for id in division_ids:
-        division_information = get_division_values(id)
+    if max_workers is not None and max_workers > 1 and len(division_ids) > 1:
+        if transport is None:
+            default_transport(pool_maxsize=max_workers)
+
+        # map keeps the order of division_ids
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            divisions_information = list(executor.map(get_values, division_ids))
+    else:
+        divisions_information = [get_values(id) for id in division_ids]
+
+    division_information_list = []
 
+    for division_information in divisions_information:
         # only add if division is on a bill
         if check_division_is_on_bill(bill_title_stripped, division_information.division_name):
             division_information_list.append(division_information)
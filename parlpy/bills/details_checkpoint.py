@@ -0,0 +1,85 @@
+"""
+Contains a checkpoint of the bills whose details have been handled, so that an interrupted run of get_bill_details can
+resume where it stopped
+
+Classes (public):
+    DetailsCheckpoint
+"""
+import datetime
+
+import pandas as pd
+
+from parlpy.utils.state_store import StateStore
+
+
+class DetailsCheckpoint():
+    """
+    Class recording the bills whose details have been handled, by bill_detail_path and the last_updated of the bill at
+    the time, in a StateStore
+
+    A bill counts as done until the listing shows it was updated after it was recorded. The record is written to the
+    store every save_every bills and when the run finishes or stops, so a run that dies redoes at most save_every bills.
+    Call clear() to start from scratch.
+
+    Attributes (public):
+    ---------
+    store: parlpy.utils.state_store.StateStore
+        where the record is kept between runs, eg from BillsOverview.make_details_checkpoint
+    save_every: int
+        number of bills recorded between writes to the store
+    """
+    def __init__(self, store: StateStore, save_every: int = 10):
+        self.store = store
+        self.save_every = save_every
+
+        # bill_detail_path -> pd.Timestamp of its last_updated when it was done
+        self.__done = store.load(default={})
+        self.__unsaved = 0
+
+    def __len__(self):
+        return len(self.__done)
+
+    def is_done(self, detail_path: str, last_updated: datetime.datetime) -> bool:
+        """
+        :return: whether the bill was done, and has not been updated since
+        """
+        done_last_updated = self.__done.get(detail_path)
+        return done_last_updated is not None and pd.Timestamp(last_updated) <= done_last_updated
+
+    def done_mask(self, bills_overview_data: pd.DataFrame) -> pd.Series:
+        """
+        :param bills_overview_data: DataFrame with bill_detail_path and last_updated columns, such as
+            BillsOverview.bills_overview_data
+        :return: boolean Series, true for each bill that was done and has not been updated since
+        """
+        done_last_updated = pd.to_datetime(bills_overview_data["bill_detail_path"].map(self.__done))
+
+        # NaT for bills not done, which compares false
+        return done_last_updated >= bills_overview_data["last_updated"]
+
+    def mark_done(self, detail_path: str, last_updated: datetime.datetime) -> None:
+        """
+        Record that a bill is done, writing the record to the store if save_every bills have been recorded since it was
+        last written
+        """
+        self.__done[detail_path] = pd.Timestamp(last_updated)
+        self.__unsaved += 1
+
+        if self.__unsaved >= self.save_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the record to the store, if any bill has been recorded since it was last written
+        """
+        if self.__unsaved:
+            self.store.save(self.__done)
+            self.__unsaved = 0
+
+    def clear(self) -> None:
+        """
+        Forget every bill done, and remove the record from the store
+        """
+        self.__done = {}
+        self.__unsaved = 0
+        self.store.delete()
@@ -0,0 +1,128 @@
+"""
+Contains a persistent store of division results keyed by DivisionId
+
+A published division never changes, so once fetched its title and the member ids of its ayes and noes are kept in a
+SQLite file, with an in-process LRU cache in front, and the API is only called for division ids not seen before.
+Member ids are stored as native int32 blobs and read back without copying them into Python ints.
+
+Classes (public):
+    DivisionStoreStats
+    DivisionStore
+"""
+import sqlite3
+import threading
+from typing import Iterable, Optional, Tuple
+
+from parlpy.bills.member_ids import MemberIds
+from parlpy.utils.lru_cache import LRUCache
+
+
+class DivisionStoreStats():
+    """
+    Class counting division lookups
+
+    Attributes (public):
+    ---------
+    lru_hits: int
+        lookups answered from the in-process cache
+    store_hits: int
+        lookups answered from the SQLite file
+    misses: int
+        lookups for divisions not stored, which then have to be fetched
+    """
+    def __init__(self):
+        self.lru_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @property
+    def fetches_avoided(self) -> int:
+        return self.lru_hits + self.store_hits
+
+    def __repr__(self):
+        return f"DivisionStoreStats(lru_hits={self.lru_hits}, store_hits={self.store_hits}, misses={self.misses})"
+
+
+class DivisionStore():
+    """
+    Class storing each division's title, aye member ids and no member ids by DivisionId, safe to share between threads
+
+    Attributes (public):
+    ---------
+    path: str
+        SQLite database file, ":memory:" to keep the store for this process only
+    stats: DivisionStoreStats
+        lookup counters
+    """
+    def __init__(self, path: str = "divisions.sqlite", lru_size: int = 1024):
+        """
+        :param path: SQLite database file, created if it does not exist
+        :param lru_size: number of divisions held in memory in front of the database
+        """
+        self.path = path
+        self.stats = DivisionStoreStats()
+
+        self.__lru = LRUCache(lru_size)
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS divisions ("
+                "division_id INTEGER PRIMARY KEY, title TEXT NOT NULL, ayes BLOB NOT NULL, noes BLOB NOT NULL)"
+            )
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM divisions").fetchone()[0]
+
+    def get(self, division_id: int) -> Optional[Tuple[str, MemberIds, MemberIds]]:
+        """
+        Get a stored division
+
+        :param division_id: DivisionId of the division
+        :return: (title, aye member ids, no member ids), or None if the division is not stored
+        """
+        cached = self.__lru.get(division_id)
+        if cached is not None:
+            with self.__lock:
+                self.stats.lru_hits += 1
+            return cached
+
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT title, ayes, noes FROM divisions WHERE division_id = ?", (division_id,)
+            ).fetchone()
+
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.store_hits += 1
+
+        title, ayes_blob, noes_blob = row
+        division = (title, MemberIds.frombuffer(ayes_blob), MemberIds.frombuffer(noes_blob))
+        self.__lru.set(division_id, division)
+
+        return division
+
+    def put(self, division_id: int, title: str, ayes: Iterable[int], noes: Iterable[int]) -> None:
+        """
+        Store a division, replacing any division stored with the same id
+
+        :param division_id: DivisionId of the division
+        :param title: division title
+        :param ayes: member ids of the ayes
+        :param noes: member ids of the noes
+        """
+        ayes = MemberIds(ayes)
+        noes = MemberIds(noes)
+
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO divisions (division_id, title, ayes, noes) VALUES (?, ?, ?, ?)",
+                (division_id, title, memoryview(ayes.to_numpy()), memoryview(noes.to_numpy()))
+            )
+        self.__lru.set(division_id, (title, ayes, noes))
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
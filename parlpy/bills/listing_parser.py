@@ -0,0 +1,137 @@
+"""
+Contains functions to extract bill cards and the page count from a bills.parliament.uk listing page
+
+When lxml is installed the page is parsed with lxml directly, otherwise BeautifulSoup with html.parser builds a tree of
+only the card elements. All fields of a card are collected in a single walk over it, and the updated dates of all cards
+on a page are parsed in one vectorized call.
+
+Functions (public):
+    parse_cards
+    count_pages
+    parse_updated_dates
+"""
+import html
+import re
+import urllib.parse
+from typing import List, Tuple
+
+import pandas as pd
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    DEFAULT_BACKEND = "lxml"
+except ImportError:
+    lxml = None
+    DEFAULT_BACKEND = "html.parser"
+
+# classes of the elements within a card holding the fields we use
+_TITLE_CLASS = "primary-info"
+_SESSIONS_CLASS = "secondary-info"
+_UPDATED_CLASS = "indicators-left"
+_DETAIL_LINK_CLASS = "overlay-link"
+_CARD_FIELD_CLASSES = frozenset((_TITLE_CLASS, _SESSIONS_CLASS, _UPDATED_CLASS, _DETAIL_LINK_CLASS))
+
+# matched against the raw class attribute while parsing, so the class is found within the space separated list
+_CARD_STRAINER = SoupStrainer(class_=re.compile(r"(^|\s)card-clickable(\s|$)"))
+
+# href of every link on the page that mentions a page
+_PAGE_LINK_HREF_RE = re.compile(r"""<a\b[^>]*?\bhref\s*=\s*["']([^"']*page=[^"']*)["']""", re.IGNORECASE)
+
+_UPDATED_DATE_FORMAT = "%d %B %Y at %H:%M"
+
+
+def parse_cards(page_html: str, backend: str = None) -> List[Tuple[str, str, str, List[str]]]:
+    """
+    Get the raw fields of every bill card on a listing page
+
+    :param page_html: html of the listing page
+    :param backend: "lxml" to parse with lxml directly, otherwise the name of the BeautifulSoup tree builder to use.
+        Defaults to lxml if installed, otherwise html.parser
+    :return: list with a (title, updated date text, detail path, sessions list) tuple for each card, in page order
+    """
+    backend = backend or DEFAULT_BACKEND
+
+    if backend == "lxml":
+        if lxml is None:
+            raise ImportError("lxml backend requires the 'lxml' extra, install it with: pip install lxml")
+        cards_fields = _iter_cards_fields_lxml(page_html)
+    else:
+        cards_fields = _iter_cards_fields_bs(page_html, backend)
+
+    cards = []
+    for title, updated_text, detail_path, sessions_text in cards_fields:
+        # text of form "...updated: 16 September 2021 at 18:00 BST", drop the trailing timezone
+        updated_date = updated_text.split("updated: ")[1]
+        updated_date = updated_date.splitlines()[0]
+        updated_date = updated_date.rsplit(" ", 1)[0]
+
+        # text of form "Session 20xx-yy, 20ww-zz...", put into list with members of form 20aa-bb
+        sessions = sessions_text.split(" ", maxsplit=1)[1].split(", ")
+
+        cards.append((title, updated_date, detail_path, sessions))
+
+    return cards
+
+
+# yields (title, updated text, detail path, sessions text) for each card, parsing the page with lxml
+def _iter_cards_fields_lxml(page_html):
+    tree = lxml.html.fromstring(page_html)
+
+    for card in tree.find_class("card-clickable"):
+        # collect the first element with each of the classes we want in one walk over the card
+        fields = {}
+        for element in card.iter():
+            for c in (element.get("class") or "").split():
+                if c in _CARD_FIELD_CLASSES and c not in fields:
+                    fields[c] = element
+
+        yield (fields[_TITLE_CLASS].text_content(),
+               fields[_UPDATED_CLASS].text_content(),
+               fields[_DETAIL_LINK_CLASS].get("href"),
+               fields[_SESSIONS_CLASS].text_content())
+
+
+# yields (title, updated text, detail path, sessions text) for each card, building a BeautifulSoup tree of the cards only
+def _iter_cards_fields_bs(page_html, backend):
+    data_bs = BeautifulSoup(page_html, backend, parse_only=_CARD_STRAINER)
+
+    for card in data_bs.find_all(class_="card-clickable"):
+        # collect the first element with each of the classes we want in one walk over the card
+        fields = {}
+        for element in card.find_all(True):
+            for c in element.get("class", ()):
+                if c in _CARD_FIELD_CLASSES and c not in fields:
+                    fields[c] = element
+
+        yield (fields[_TITLE_CLASS].text,
+               fields[_UPDATED_CLASS].text,
+               fields[_DETAIL_LINK_CLASS]["href"],
+               fields[_SESSIONS_CLASS].text)
+
+
+def count_pages(page_html: str) -> int:
+    """
+    Get the number of listing pages from the pagination links of a listing page, without parsing the page
+
+    :param page_html: html of a listing page
+    :return: highest page number linked to, at least 1
+    """
+    max_page = 1 # there is always at least one page for a valid session
+    for href in _PAGE_LINK_HREF_RE.findall(page_html):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(html.unescape(href)).query)
+        for page in query.get("page", []):
+            if page.isdigit() and int(page) > max_page:
+                max_page = int(page)
+
+    return max_page
+
+
+def parse_updated_dates(updated_dates: List[str]) -> pd.DatetimeIndex:
+    """
+    Parse a batch of updated date texts of form "16 September 2021 at 18:00" in one vectorized call
+
+    :param updated_dates: list of date texts
+    :return: DatetimeIndex in the same order, whose elements are pd.Timestamp, a subclass of datetime.datetime
+    """
+    return pd.to_datetime(pd.Index(updated_dates, dtype=object), format=_UPDATED_DATE_FORMAT)
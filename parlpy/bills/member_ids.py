@@ -0,0 +1,107 @@
+"""
+Contains a compact, read-only sequence of member ids
+
+Member ids are held in a single int32 NumPy buffer, about a tenth of the memory of a list of Python ints, and behave
+like a list for reading: they index, iterate, compare equal to lists, and concatenate with + into a list, and tolist()
+gives a list for JSON. The buffer is shared rather than copied when slicing, converting to NumPy, loading from bytes,
+and pickling with protocol 5 and a buffer_callback.
+
+Classes (public):
+    MemberIds
+"""
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class MemberIds(Sequence):
+    """
+    Class representing an immutable sequence of member ids, compares equal to any sequence holding the same ids
+    """
+    __slots__ = ("__ids",)
+
+    dtype = np.dtype(np.int32)
+
+    def __init__(self, ids=()):
+        """
+        :param ids: iterable of member ids, an int32 NumPy array is used without copying
+        """
+        if isinstance(ids, MemberIds):
+            ids = ids.__ids
+        elif not isinstance(ids, np.ndarray):
+            ids = np.fromiter(ids, dtype=MemberIds.dtype)
+
+        # a view, so that making it read only does not affect the array passed in
+        ids = np.asarray(ids, dtype=MemberIds.dtype).view()
+        ids.flags.writeable = False
+        self.__ids = ids
+
+    @classmethod
+    def frombuffer(cls, buffer) -> "MemberIds":
+        """
+        Get the member ids held in a buffer of native int32s, such as the bytes from tobytes(), without copying
+
+        :param buffer: bytes-like object
+        :return: MemberIds backed by buffer
+        """
+        return cls(np.frombuffer(buffer, dtype=MemberIds.dtype))
+
+    def tobytes(self) -> bytes:
+        return self.__ids.tobytes()
+
+    def tolist(self) -> list:
+        return self.__ids.tolist()
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        :return: read only int32 array sharing the buffer
+        """
+        return self.__ids
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == MemberIds.dtype:
+            return self.__ids.copy() if copy else self.__ids
+        return self.__ids.astype(dtype)
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MemberIds(self.__ids[index])
+        return int(self.__ids[index])
+
+    def __iter__(self):
+        return iter(self.__ids.tolist())
+
+    # concatenating gives a list, as with two lists, so that ids += [...] and ayes + noes work as they did on lists
+    def __add__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return self.tolist() + list(other)
+
+    def __radd__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return list(other) + self.tolist()
+
+    def __contains__(self, member_id):
+        return bool((self.__ids == member_id).any())
+
+    def __eq__(self, other):
+        if isinstance(other, MemberIds):
+            other = other.__ids
+        elif not isinstance(other, (Sequence, np.ndarray)) or isinstance(other, (str, bytes)):
+            return NotImplemented
+
+        return len(self.__ids) == len(other) and bool(np.array_equal(self.__ids, np.asarray(other)))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    # pickled as the array itself, which NumPy passes out of band as a PickleBuffer with protocol 5 and a
+    # buffer_callback, so neither dumping nor loading copies the ids
+    def __reduce__(self):
+        return MemberIds, (self.__ids,)
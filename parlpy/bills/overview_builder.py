@@ -0,0 +1,99 @@
+"""
+Contains class that accumulates scraped bill overview data column by column, building the DataFrame once at the end of
+a crawl
+
+Classes (public):
+    BillsOverviewBuilder
+"""
+from array import array
+import datetime
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy
+import pandas as pd
+
+
+class BillsOverviewBuilder():
+    """
+    Class collecting the fields of each bill in per-column buffers, so that the bills overview DataFrame is built once
+    rather than concatenated page by page
+
+    Attributes (public):
+    ---------
+    columns: List[str]
+        the columns of the built DataFrame, in order
+    """
+    columns = ["bill_title_stripped", "postfix", "originating_house", "last_updated", "bill_detail_path", "session"]
+
+    __epoch = datetime.datetime(1970, 1, 1)
+    __one_microsecond = datetime.timedelta(microseconds=1)
+
+    def __init__(self, originating_house_categories: Sequence):
+        """
+        :param originating_house_categories: all possible originating house values, in order, used as the categories
+            of the originating_house column
+        """
+        self.__originating_house_categories = list(originating_house_categories)
+        self.__originating_house_codes = {h: i for i, h in enumerate(self.__originating_house_categories)}
+
+        self.__titles_stripped = []
+        self.__postfixes = []
+        self.__originating_houses = array('b')
+        # microseconds since the epoch
+        self.__last_updated = array('q')
+        self.__bill_detail_paths = []
+        # each distinct list of sessions is stored once, rows hold a code into it
+        self.__session_codes = array('i')
+        self.__sessions_to_code = {}
+
+    def __len__(self):
+        return len(self.__titles_stripped)
+
+    def append(self, title_stripped: str, postfix: str, originating_house, last_updated: datetime.datetime,
+               bill_detail_path: str, sessions: List[str]) -> None:
+        """
+        Add a single bill
+        """
+        sessions = tuple(sessions)
+        session_code = self.__sessions_to_code.setdefault(sessions, len(self.__sessions_to_code))
+
+        self.__titles_stripped.append(title_stripped)
+        self.__postfixes.append(postfix)
+        self.__originating_houses.append(self.__originating_house_codes[originating_house])
+        self.__last_updated.append((last_updated - self.__epoch) // self.__one_microsecond)
+        self.__bill_detail_paths.append(bill_detail_path)
+        self.__session_codes.append(session_code)
+
+    def extend(self, bill_tuples: Iterable[Tuple]) -> None:
+        """
+        Add bills given as tuples with values in the order of BillsOverviewBuilder.columns
+        """
+        for bill_tuple in bill_tuples:
+            self.append(*bill_tuple)
+
+    def build(self) -> pd.DataFrame:
+        """
+        Build the DataFrame from all bills added so far
+
+        last_updated is datetime64[ns], originating_house is categorical and session is categorical over tuples of
+        session names
+        """
+        # copies are taken so that the buffers can still be appended to after building
+        last_updated = numpy.frombuffer(self.__last_updated, dtype=numpy.int64).astype("datetime64[us]")
+        originating_house_codes = numpy.frombuffer(self.__originating_houses, dtype=numpy.int8).copy()
+        session_codes = numpy.frombuffer(self.__session_codes, dtype=numpy.int32).copy()
+
+        session_categories = pd.Index(list(self.__sessions_to_code), dtype=object, tupleize_cols=False)
+
+        return pd.DataFrame({
+            "bill_title_stripped": pd.Series(self.__titles_stripped, dtype=object),
+            "postfix": pd.Series(self.__postfixes, dtype=object),
+            "originating_house": pd.Categorical.from_codes(
+                originating_house_codes,
+                dtype=pd.CategoricalDtype(self.__originating_house_categories)),
+            "last_updated": last_updated.astype("datetime64[ns]"),
+            "bill_detail_path": pd.Series(self.__bill_detail_paths, dtype=object),
+            "session": pd.Categorical.from_codes(
+                session_codes,
+                dtype=pd.CategoricalDtype(session_categories)),
+        }, columns=self.columns)
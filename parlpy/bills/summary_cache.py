@@ -0,0 +1,87 @@
+"""
+Contains a persistent cache of bill summaries, keyed by the bill's detail path and valid until the bill is updated
+
+A bill's summary rarely changes when the bill does, but nothing short of scraping its page again tells us whether it
+has, so a summary is reused only for as long as the bill's last_updated in the listing is no newer than when the summary
+was scraped.
+
+Classes (public):
+    SummaryCache
+"""
+import datetime
+
+import pandas as pd
+
+import parlpy.bills.summary_fetcher as sf
+from parlpy.utils.disk_cache import DiskCache
+from parlpy.utils.http_cache import CacheStats, ConditionalHTTPCache
+from parlpy.utils.transport import Transport
+
+
+class SummaryCache():
+    """
+    Class keeping the summary of each bill on disk with the last_updated of the bill when it was scraped, evicting the
+    least recently used summaries once they take up more than max_bytes, safe to share between threads
+
+    Attributes (public):
+    ---------
+    stats: parlpy.utils.http_cache.CacheStats
+        hit and miss counters, saved_bytes counts the bytes of summaries not scraped again
+    """
+    def __init__(self, directory: str, max_bytes: int = 16 * 2**20):
+        """
+        :param directory: directory to keep the summaries in, created if it does not exist
+        :param max_bytes: total size of the summaries kept, above which the least recently used are evicted
+        """
+        self.__disk_cache = DiskCache(directory, max_bytes=max_bytes)
+        self.stats = CacheStats()
+
+    def __len__(self):
+        return len(self.__disk_cache)
+
+    def __key(self, detail_path):
+        return f"bill-summary:{detail_path}"
+
+    def get(self, detail_path: str, last_updated: datetime.datetime):
+        """
+        Get the summary of a bill, if it was scraped no earlier than the bill was last updated
+        :param detail_path: bill_detail_path of the bill
+        :param last_updated: last_updated of the bill in the listing
+        :return: the summary, or None if none is kept or the bill has been updated since it was scraped
+        """
+        entry = self.__disk_cache.get(self.__key(detail_path))
+        if entry is None:
+            return None
+
+        summary_last_updated, summary = entry
+        if pd.Timestamp(last_updated) > summary_last_updated:
+            return None
+
+        return summary
+
+    def set(self, detail_path: str, last_updated: datetime.datetime, summary: str) -> None:
+        """
+        Keep the summary of a bill, replacing any kept for an earlier last_updated
+        """
+        self.__disk_cache.set(self.__key(detail_path), (pd.Timestamp(last_updated), summary))
+
+    def get_summary(self, detail_path: str, last_updated: datetime.datetime, http_cache: ConditionalHTTPCache = None,
+                    transport: Transport = None) -> str:
+        """
+        Get the summary of a bill from the cache, or scrape it with summary_fetcher.get_summary and keep it
+        :param detail_path: bill_detail_path of the bill
+        :param last_updated: last_updated of the bill in the listing
+        :param http_cache: passed to summary_fetcher.get_summary
+        :param transport: passed to summary_fetcher.get_summary
+        :return: String containing the summary
+        """
+        summary = self.get(detail_path, last_updated)
+        if summary is not None:
+            self.stats.record_hit(len(summary.encode("utf-8")))
+            return summary
+
+        self.stats.record_miss()
+        summary = sf.get_summary(detail_path, http_cache=http_cache, transport=transport)
+        self.set(detail_path, last_updated, summary)
+
+        return summary
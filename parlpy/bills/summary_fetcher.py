@@ -4,21 +4,33 @@ Alex Dawkins (alexander.dawkins@gmail.com) 2021
 Hello & welcome to the shit-show
 """
 
-from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
 import pandas as pd
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import EncodingDetector
 import parlpy.bills.bill_list_fetcher as blf
+from parlpy.utils.http_cache import ConditionalHTTPCache
+from parlpy.utils.rate_limit import RateLimiter
+from parlpy.utils.transport import Transport, default_transport
+
+# class of the element holding the summary, only it and its descendants are built into a tree when parsing
+__SUMMARY_BLOCK_CLASS = "block block-page"
+__SUMMARY_BLOCK_STRAINER = SoupStrainer(class_=__SUMMARY_BLOCK_CLASS)
 
 
-def get_summary(detail_path: str) -> str:
+def get_summary(detail_path: str, http_cache: ConditionalHTTPCache = None, transport: Transport = None) -> str:
     """
     Returns the scraped summary at the given path.
     :param detail_path: URL to scrape from
+    :param http_cache: Optional cache, the page is then only scraped again if the website reports it has changed
+    :param transport: Optional transport to request the page with when not using http_cache, defaults to the shared one
     :return: String containing the summary
     """
 
     # Just a wrapper to the private fetch_summary function
-    return __fetch_summary(detail_path)
+    return __fetch_summary(detail_path, http_cache=http_cache, transport=transport)
 
 
 def append_summary(series: pd.Series) -> pd.Series:
@@ -37,47 +49,108 @@ def append_summary(series: pd.Series) -> pd.Series:
     summary_col = pd.Series(summary, ['bill_summary'])
 
     # Append Summary to row
-    series = series.append(summary_col)
+    series = pd.concat([series, summary_col])
 
     # Return row with summary appended
     return series
 
 
-def append_summaries(overview: blf.BillsOverview) -> pd.DataFrame:
+def get_summaries(detail_paths: Iterable[str], http_cache: ConditionalHTTPCache = None, transport: Transport = None,
+                  max_workers: int = None, requests_per_second: float = None) -> List[str]:
+    """
+    Returns the scraped summary at each of the given paths, in the same order.
+    :param detail_paths: URLs to scrape from
+    :param http_cache: Optional cache, see get_summary
+    :param transport: Optional transport, see get_summary
+    :param max_workers: If more than 1, scrape this many pages at once, the shared default transport's pool is grown to
+        max_workers connections, a transport given should have a pool_maxsize of at least max_workers
+    :param requests_per_second: Optional rate limit on page requests, shared between all workers
+    :return: List of strings containing the summaries
+    """
+    rate_limiter = RateLimiter(requests_per_second) if requests_per_second is not None else None
+
+    def fetch(detail_path):
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        return __fetch_summary(detail_path, http_cache=http_cache, transport=transport)
+
+    if max_workers is None or max_workers <= 1:
+        return [fetch(path) for path in detail_paths]
+
+    if transport is None:
+        default_transport(pool_maxsize=max_workers)
+
+    # map gives the summaries back in the order of the paths, whichever finishes first
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch, detail_paths))
+
+
+def append_summaries(overview: blf.BillsOverview, max_workers: int = None,
+                     requests_per_second: float = None) -> pd.DataFrame:
     """
     Fetches and appends summaries to all rows stored in the BillsOverview object
     :param overview: BillsOverview object to add summaries to
+    :param max_workers: If more than 1, fetch this many summaries at once
+    :param requests_per_second: Optional rate limit on summary requests, shared between all workers
     :return: Dataframe from BillsOverview with summaries appended
     """
     # Get all bills from BillsOverview
     df = overview.bills_overview_data
 
-    # Generate new df with summaries from current df
-    summaries = df.apply(lambda row: __fetch_summary(row['bill_detail_path']), axis=1)
+    # Fetch summaries in row order
+    summaries = get_summaries(df['bill_detail_path'], http_cache=overview.http_cache, transport=overview.transport,
+                              max_workers=max_workers, requests_per_second=requests_per_second)
 
     # Append to current df
-    df['bill_summary'] = summaries
+    df['bill_summary'] = pd.Series(summaries, index=df.index, dtype=object)
 
     return df
 
 
-def __fetch_summary(detail_path: str, base_url="https://bills.parliament.uk/") -> str:
+def __fetch_summary(detail_path: str, base_url="https://bills.parliament.uk/", http_cache=None, transport=None) -> str:
     """
     Scrapes the summary from the given page.
     :param detail_path: Path to details page
     :param base_url: URL of government website
+    :param http_cache: Optional ConditionalHTTPCache to revalidate a stored summary with rather than scrape again
+    :param transport: Optional Transport to request the page with, defaults to the shared one
     :return: String containing the summary text
     """
 
     # Build URL to scrape from
     url = base_url + detail_path
 
+    if http_cache is not None:
+        return http_cache.fetch(url, __parse_summary, namespace="bill-summary")
+
     # Get HTML from URL
-    html_data = urlopen(url)
-    data_bs = BeautifulSoup(html_data.read(), 'html.parser')
+    if transport is None:
+        transport = default_transport()
+    response = transport.get(url)
+    response.raise_for_status()
+
+    return __parse_summary(response.content)
+
+
+def __parse_summary(html: bytes) -> str:
+    """
+    Gets the summary from the HTML of a bill's details page.
+    :param html: Page HTML
+    :return: String containing the summary text
+    """
+    # Skip the page up to the tag opening the summary block, then build a tree of only the block
+    block_class, tag_open, encoding = __SUMMARY_BLOCK_CLASS, "<", None
+    if isinstance(html, bytes):
+        block_class, tag_open = block_class.encode(), tag_open.encode()
+        # the charset is declared in the part of the page skipped
+        encoding = EncodingDetector.find_declared_encoding(html, is_html=True)
+    block_tag_start = html.rfind(tag_open, 0, max(html.find(block_class), 0))
+    if block_tag_start > 0:
+        html = html[block_tag_start:]
+    data_bs = BeautifulSoup(html, 'html.parser', parse_only=__SUMMARY_BLOCK_STRAINER, from_encoding=encoding)
 
     # Get <div> from HTML
-    summary_element = data_bs.find(class_="block block-page").find(class_="text-break")
+    summary_element = data_bs.find(class_=__SUMMARY_BLOCK_CLASS).find(class_="text-break")
 
     # Get text from <div>, and remove the leading TAB
     if summary_element is not None:
@@ -0,0 +1,267 @@
+"""
+Contains a member by division matrix of votes, built incrementally from DivisionInformation objects
+
+Each vote is held as a coordinate entry, +1 for aye and -1 for no, so a member who did not vote in a division holds 0
+without taking any space. Aggregates over every vote are computed with NumPy rather than by looping over divisions.
+scipy is optional, when installed the matrix can be exported as a scipy.sparse matrix and is used for similarity.
+
+Classes (public):
+    VoteMatrix
+"""
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+AYE = 1
+NO = -1
+
+
+class VoteMatrix():
+    """
+    Class representing the votes of members (rows) in divisions (columns)
+
+    Attributes (public):
+    ---------
+    member_ids: list
+        member id of each row, in the order members were first seen
+    division_ids: list
+        DivisionId of each column, in the order divisions were added
+    """
+    def __init__(self, divisions: Iterable = ()):
+        """
+        :param divisions: DivisionInformation objects to start with, see add_divisions
+        """
+        self.member_ids = []
+        self.division_ids = []
+        self.__member_index = {}
+        self.__division_index = {}
+
+        # coordinate entries, consolidated arrays plus chunks of (rows, cols, values) added since they were built
+        self.__rows = np.empty(0, dtype=np.int32)
+        self.__cols = np.empty(0, dtype=np.int32)
+        self.__values = np.empty(0, dtype=np.int8)
+        self.__pending = []
+
+        self.add_divisions(divisions)
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.member_ids), len(self.division_ids)
+
+    @property
+    def nnz(self) -> int:
+        """
+        Number of votes held
+        """
+        return len(self.__values) + sum(len(values) for (_, _, values) in self.__pending)
+
+    def member_index(self, member_id: int) -> int:
+        """
+        :return: row of the member, KeyError if the member has not voted in any division added
+        """
+        return self.__member_index[member_id]
+
+    def division_index(self, division_id: int) -> int:
+        """
+        :return: column of the division, KeyError if the division has not been added
+        """
+        return self.__division_index[division_id]
+
+    def __contains__(self, division_id):
+        return division_id in self.__division_index
+
+    # rows of the given member ids, adding rows for members not seen before
+    def __rows_for(self, member_ids):
+        rows = np.empty(len(member_ids), dtype=np.int32)
+        for i, member_id in enumerate(member_ids):
+            row = self.__member_index.get(member_id)
+            if row is None:
+                row = self.__member_index[member_id] = len(self.member_ids)
+                self.member_ids.append(member_id)
+            rows[i] = row
+
+        return rows
+
+    def add_division(self, division) -> bool:
+        """
+        Add the votes of a division as a new column
+
+        :param division: DivisionInformation with a division_id
+        :return: True if added, False if a division with the same id was already added
+        """
+        if division.division_id is None:
+            raise ValueError(f"division {division.division_name!r} has no division_id")
+        if division.division_id in self.__division_index:
+            return False
+
+        col = self.__division_index[division.division_id] = len(self.division_ids)
+        self.division_ids.append(division.division_id)
+
+        rows = np.concatenate((self.__rows_for(division.ayes), self.__rows_for(division.noes)))
+        cols = np.full(len(rows), col, dtype=np.int32)
+        values = np.concatenate((np.full(len(division.ayes), AYE, dtype=np.int8),
+                                 np.full(len(division.noes), NO, dtype=np.int8)))
+        self.__pending.append((rows, cols, values))
+
+        return True
+
+    def add_divisions(self, divisions: Iterable) -> int:
+        """
+        Add the votes of each division not already added
+
+        :param divisions: DivisionInformation objects, such as from bill_votes_fetcher.get_divisions_information
+        :return: number of divisions added
+        """
+        return sum(self.add_division(d) for d in divisions)
+
+    def add_bill_details(self, bill_details: Iterable) -> int:
+        """
+        Add the votes of each division of each bill not already added
+
+        :param bill_details: BillDetails objects, such as from bill_details_iterator.get_bill_details
+        :return: number of divisions added
+        """
+        return sum(self.add_divisions(bd.divisions_list) for bd in bill_details)
+
+    def coo(self) -> tuple:
+        """
+        Get every vote as coordinate entries
+
+        :return: (rows, cols, values) int32, int32 and int8 arrays, values are +1 for aye and -1 for no
+        """
+        if self.__pending:
+            self.__rows = np.concatenate([self.__rows] + [rows for (rows, _, _) in self.__pending])
+            self.__cols = np.concatenate([self.__cols] + [cols for (_, cols, _) in self.__pending])
+            self.__values = np.concatenate([self.__values] + [values for (_, _, values) in self.__pending])
+            self.__pending = []
+
+        return self.__rows, self.__cols, self.__values
+
+    def to_dense(self, dtype=np.int8) -> np.ndarray:
+        """
+        :return: members by divisions array of +1, -1 and 0 for no vote
+        """
+        rows, cols, values = self.coo()
+        dense = np.zeros(self.shape, dtype=dtype)
+        dense[rows, cols] = values
+
+        return dense
+
+    def to_sparse(self, dtype=np.int8):
+        """
+        :return: members by divisions scipy.sparse.csr_matrix of +1, -1 and 0 for no vote
+        """
+        if scipy is None:
+            raise ImportError("to_sparse requires scipy, install it with: pip install scipy")
+
+        rows, cols, values = self.coo()
+        return scipy.sparse.csr_matrix((values.astype(dtype), (rows, cols)), shape=self.shape)
+
+    def division_totals(self) -> pd.DataFrame:
+        """
+        :return: DataFrame indexed by division id with the number of ayes and noes
+        """
+        rows, cols, values = self.coo()
+        n_divisions = len(self.division_ids)
+
+        return pd.DataFrame({
+            "ayes": np.bincount(cols[values == AYE], minlength=n_divisions),
+            "noes": np.bincount(cols[values == NO], minlength=n_divisions),
+        }, index=pd.Index(self.division_ids, name="division_id"))
+
+    def turnout(self) -> pd.Series:
+        """
+        :return: Series indexed by member id with the number of divisions each member voted in
+        """
+        rows, _, _ = self.coo()
+
+        return pd.Series(np.bincount(rows, minlength=len(self.member_ids)),
+                         index=pd.Index(self.member_ids, name="member_id"), name="turnout")
+
+    # party code of each row, -1 for members without a party, and the party of each code
+    def __party_codes(self, member_parties):
+        parties = pd.Categorical([member_parties.get(m) for m in self.member_ids])
+
+        return np.asarray(parties.codes, dtype=np.int64), parties.categories
+
+    # net votes (ayes - noes) and number of votes of each party in each division, as divisions by parties arrays, with
+    # the party code of each vote and which votes belong to a member with a party
+    def __party_votes(self, member_parties):
+        rows, cols, values = self.coo()
+        codes, parties = self.__party_codes(member_parties)
+        n_divisions, n_parties = len(self.division_ids), len(parties)
+
+        vote_codes = codes[rows]
+        has_party = vote_codes >= 0
+        keys = cols[has_party].astype(np.int64) * n_parties + vote_codes[has_party]
+
+        net = np.bincount(keys, weights=values[has_party], minlength=n_divisions * n_parties)
+        counts = np.bincount(keys, minlength=n_divisions * n_parties)
+
+        return (net.reshape(n_divisions, n_parties), counts.reshape(n_divisions, n_parties), parties, vote_codes,
+                has_party)
+
+    def party_cohesion(self, member_parties: Mapping) -> pd.DataFrame:
+        """
+        Rice index of each party in each division, |ayes - noes| / (ayes + noes), 1 when the party voted as one
+
+        :param member_parties: party of each member id, such as a dict or Series, members without one are left out
+        :return: DataFrame indexed by division id with a column per party, NaN where the party did not vote
+        """
+        net, counts, parties, _, _ = self.__party_votes(member_parties)
+        cohesion = np.divide(np.abs(net), counts, out=np.full(net.shape, np.nan), where=counts > 0)
+
+        return pd.DataFrame(cohesion, index=pd.Index(self.division_ids, name="division_id"),
+                            columns=pd.Index(parties, name="party"))
+
+    def rebellion_rates(self, member_parties: Mapping) -> pd.Series:
+        """
+        Fraction of each member's votes cast against the majority of their party in the division, divisions where the
+        party was tied are not counted as rebellions
+
+        :param member_parties: party of each member id, such as a dict or Series, members without one are left out
+        :return: Series indexed by member id, NaN for members without a party
+        """
+        rows, cols, values = self.coo()
+        net, _, _, vote_codes, has_party = self.__party_votes(member_parties)
+
+        party_line = np.sign(net)[cols[has_party], vote_codes[has_party]]
+        rebellions = (party_line != 0) & (values[has_party] != party_line)
+
+        n_members = len(self.member_ids)
+        votes = np.bincount(rows[has_party], minlength=n_members)
+        rebel_votes = np.bincount(rows[has_party], weights=rebellions, minlength=n_members)
+        rates = np.divide(rebel_votes, votes, out=np.full(n_members, np.nan), where=votes > 0)
+
+        return pd.Series(rates, index=pd.Index(self.member_ids, name="member_id"), name="rebellion_rate")
+
+    def similarity(self, min_shared: int = 1) -> pd.DataFrame:
+        """
+        Agreement between each pair of members, (divisions voted the same way - divisions voted differently) / divisions
+        both voted in, from -1 for always opposed to 1 for always agreeing
+
+        :param min_shared: fewest divisions both members voted in for their similarity to be given
+        :return: members by members DataFrame indexed by member id, NaN for pairs with fewer than min_shared divisions
+        """
+        if scipy is not None:
+            votes = self.to_sparse(np.float64)
+            agreement = (votes @ votes.T).toarray()
+            voted = abs(votes)
+            shared = (voted @ voted.T).toarray()
+        else:
+            votes = self.to_dense(np.float64)
+            agreement = votes @ votes.T
+            voted = np.abs(votes)
+            shared = voted @ voted.T
+
+        similarity = np.divide(agreement, shared, out=np.full(agreement.shape, np.nan),
+                               where=shared >= max(min_shared, 1))
+        index = pd.Index(self.member_ids, name="member_id")
+
+        return pd.DataFrame(similarity, index=index, columns=index)
@@ -1,9 +1,18 @@
 import datetime
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 import pandas as pd
 import requests
 import json
 
+from parlpy.mps.mp_overview_builder import MPOverviewBuilder
+from parlpy.utils.lru_cache import LRUCache
+from parlpy.utils.rate_limit import RateLimiter
+from parlpy.utils.state_store import StateStore, LocalFileStateStore
+from parlpy.utils.transport import Transport, default_transport
+
 
 def jprint(obj):
     # create a formatted string of the Python JSON object
@@ -17,6 +26,38 @@ def jprint(obj):
 #     return camel[0].lower() + camel[1:]
 
 
+class MemberSyncReport():
+    """
+    Class describing what an incremental sync of the member index changed
+
+    Attributes (public):
+    ---------
+    added: List[int]
+        member ids not in the index before
+    removed: List[int]
+        member ids no longer in the results, they are dropped from the index
+    changed: List[int]
+        member ids whose names, membership, party or email changed
+    unchanged: int
+        number of members that did not change
+    contacts_fetched: int
+        number of members whose contact details were requested
+    complete: bool
+        False if the listing ended early, in which case nothing was saved and removed is empty
+    """
+    def __init__(self):
+        self.complete = True
+        self.added = []
+        self.removed = []
+        self.changed = []
+        self.unchanged = 0
+        self.contacts_fetched = 0
+
+    def __repr__(self):
+        return (f"MemberSyncReport(added={len(self.added)}, removed={len(self.removed)}, changed={len(self.changed)}, "
+                f"unchanged={self.unchanged}, contacts_fetched={self.contacts_fetched}, complete={self.complete})")
+
+
 class MPOverview:
     # Parameters for getting alive MPs
     current_mp_params = {
@@ -24,46 +65,62 @@ class MPOverview:
         "House": "Commons",
     }
 
-    def __init__(self):
+    # name of the pickle holding the member index used by sync_members
+    member_index_file_name = "member_index.p"
+
+    def __init__(self, transport: Transport = None, contact_workers: int = 8, email_ttl: float = 24 * 60 * 60,
+                 email_cache: LRUCache = None, member_index_store: StateStore = None):
         """
         Overview class for members.
+        :param transport: Transport to make requests with, None for the shared default transport
+        :param contact_workers: number of members' contact details fetched at once, 1 to fetch them one at a time
+        :param email_ttl: seconds a member's email is reused for before their contact details are fetched again, also
+            applies to the member index kept by sync_members
+        :param email_cache: LRUCache of emails by member id to use instead of one made with email_ttl, may be shared
+            between MPOverview objects
+        :param member_index_store: where sync_members keeps its index of members between runs, by default
+            member_index.p in the working directory
         """
         self.last_updated = None
 
+        # the shared default transport is grown to the number of threads fetching at once, a given one is left as it is
+        self.__shares_default_transport = transport is None
+        self.transport = transport if transport is not None else default_transport(pool_maxsize=contact_workers)
+
+        self.contact_workers = contact_workers
+        self.email_ttl = email_ttl
+        self.email_cache = email_cache if email_cache is not None else LRUCache(maxsize=16384, ttl=email_ttl)
+
+        if member_index_store is None:
+            member_index_store = LocalFileStateStore(MPOverview.member_index_file_name)
+        self.member_index_store = member_index_store
+
         self.api_url = "https://members-api.parliament.uk/api/"
 
         self.max_take = 20
 
-        self.columns = [
-            # Display Name
-            "name_display",
-            # Full Title
-            "name_full_title",
-            # Name to address member by
-            "name_address_as",
-            # Name to list member by
-            "name_list_as",
-            # email for MP
-            "email",
-            # Member ID (for further information)
-            "member_id",
-            # whether the MP is a current member
-            "current_member",
-            # Gender
-            "gender",
-            # Party that the member belongs to
-            "party_id",
-            # Constituency of member
-            "constituency",
-            # Time this information was retrieved
-            "last_updated"
-        ]
-        self.mp_overview_data = pd.DataFrame([], columns=self.columns)
-
-
-    def __get_email(self, mp_id):
+        # the columns of mp_overview_data:
+        # name_display: Display Name
+        # name_full_title: Full Title
+        # name_address_as: Name to address member by
+        # name_list_as: Name to list member by
+        # email: email for MP
+        # member_id: Member ID (for further information)
+        # current_member: whether the MP is a current member
+        # gender: Gender
+        # party_id: Party that the member belongs to
+        # constituency: Constituency of member
+        # last_updated: Time this information was retrieved
+        self.columns = MPOverviewBuilder.columns
+        self.mp_overview_data = MPOverviewBuilder().build()
+
+
+    # returned by email_cache.get for members whose email is not held
+    __not_cached = object()
+
+    def __fetch_email(self, mp_id):
         contact_details_endpoint = f"https://members-api.parliament.uk/api/Members/{mp_id}/Contact"
-        response = requests.get(contact_details_endpoint)
+        response = self.transport.get(contact_details_endpoint)
 
         # get the MP's parliamentary email
         email_address = "none_given"
@@ -74,14 +131,56 @@ class MPOverview:
 
         return email_address
 
+    def __get_emails(self, mp_ids: list, executor: ThreadPoolExecutor = None) -> list:
+        """
+        Gets the email of each member, from email_cache unless it has expired, otherwise from their contact details
+        :param mp_ids: Member IDs
+        :param executor: Pool to fetch contact details in, None to fetch them one at a time
+        :return: Email of each member, in the order of mp_ids
+        """
+        emails = {}
+        missing_ids = []
+        for mp_id in mp_ids:
+            # a member's email may be None, when their parliamentary contact gives none
+            email = self.email_cache.get(mp_id, MPOverview.__not_cached)
+            if email is MPOverview.__not_cached:
+                missing_ids.append(mp_id)
+            else:
+                emails[mp_id] = email
+
+        emails.update(zip(missing_ids, self.__fetch_emails(missing_ids, executor)))
+
+        return [emails[mp_id] for mp_id in mp_ids]
+
+    def __fetch_emails(self, mp_ids: list, executor: ThreadPoolExecutor = None) -> list:
+        """
+        Fetches the email of each member from their contact details, and puts it in email_cache
+        :param mp_ids: Member IDs
+        :param executor: Pool to fetch contact details in, None to fetch them one at a time
+        :return: Email of each member, in the order of mp_ids
+        """
+        if executor is not None and len(mp_ids) > 1:
+            emails = list(executor.map(self.__fetch_email, mp_ids))
+        else:
+            emails = [self.__fetch_email(mp_id) for mp_id in mp_ids]
+
+        for mp_id, email in zip(mp_ids, emails):
+            self.email_cache.set(mp_id, email)
+
+        return emails
 
-    def __add_member_to_data_from_api_response(self, response: requests.Response, only_get_current_members_emails: bool) -> None:
+    # the fields of a member record that, when they change, mean the member's contact details are fetched again
+    __membership_fields = ("name_display", "name_full_title", "name_address_as", "name_list_as", "current_member",
+                           "gender", "party_id", "constituency")
+
+    def __member_records_without_emails(self, items: list) -> list:
         """
-        Adds members from a response to the data
-        :param response: Response to add
+        Makes a record of each member on a page of a decoded Members/Search response, with email None
+        :param items: The "items" of the response
+        :return: List of dicts with keys MPOverviewBuilder.columns
         """
-        # jprint(response.json())
-        for item in response.json()["items"]:
+        records = []
+        for item in items:
             value_obj = item["value"]
             # Don't include dead people
             if value_obj["latestHouseMembership"]["membershipEndReason"] == "Death":
@@ -92,104 +191,343 @@ class MPOverview:
             else:
                 current_member = False
 
-            # if only_get_current_members_emails is false, always get the MP's/former MP's email
-            if current_member or only_get_current_members_emails == False:
-                email = self.__get_email(value_obj["id"])
-            else:
-                email = "not_current_member"
-
-            values = {
+            records.append({
                 "name_display": value_obj["nameDisplayAs"],
                 "name_full_title": value_obj["nameFullTitle"],
                 "name_address_as": value_obj["nameAddressAs"],
                 "name_list_as": value_obj["nameListAs"],
-                "email": email,
+                "email": None,
                 "member_id": value_obj["id"],
                 "current_member": current_member,
                 "gender": value_obj["gender"],
                 "party_id": value_obj["latestParty"]["id"],
                 "constituency": value_obj["latestHouseMembership"]["membershipFrom"],
                 "last_updated": datetime.datetime.now(),
-            }
+            })
+
+        return records
+
+    def __member_records(self, items: list, only_get_current_members_emails: bool,
+                         executor: ThreadPoolExecutor = None) -> list:
+        """
+        Makes a record of each member on a page of a decoded Members/Search response
+        :param items: The "items" of the response
+        :param executor: Pool to fetch the members' contact details in, None to fetch them one at a time
+        :return: List of dicts with keys MPOverviewBuilder.columns
+        """
+        records = self.__member_records_without_emails(items)
+
+        # if only_get_current_members_emails is false, always get the MP's/former MP's email
+        email_ids = [r["member_id"] for r in records if r["current_member"] or only_get_current_members_emails == False]
+        emails = dict(zip(email_ids, self.__get_emails(email_ids, executor)))
+
+        for r in records:
+            r["email"] = emails.get(r["member_id"], "not_current_member")
+
+        return records
 
-            self.mp_overview_data = self.mp_overview_data.append(values, ignore_index=True)
+    def __iter_member_pages(self, params: dict, fetch_delay: float, limit: int = None, verbose: bool = False,
+                            max_workers: int = None, requests_per_second: float = None, listing: dict = None):
+        """
+        Yields the items of each page of Members/Search results in order, decoding each response once
+        :param params: Dictionary of parameters to pass, not modified
+        :param fetch_delay: Time (seconds) to wait before fetching each page when not rate limited
+        :param limit: Stop after the page on which this many members have been retrieved
+        :param verbose: Print each page
+        :param max_workers: If more than 1, pages after the first are fetched concurrently using this many threads,
+            using the total result count from the first page to find them
+        :param requests_per_second: Rate limit on fetching pages, if None and max_workers is more than 1, derived from
+            fetch_delay
+        :param listing: If given, "total_results" is set to the totalResults of the first page, and "failed_status_code"
+            to the status code of a page that could not be fetched, which ends the listing early
+        """
+        if listing is None:
+            listing = {}
+        listing["total_results"] = None
+        listing["failed_status_code"] = None
+
+        params = dict(params)
+        take = int(params.setdefault("take", self.max_take))
+        start = int(params.get("skip", 0))
+
+        if requests_per_second is None and max_workers is not None and max_workers > 1 and fetch_delay > 0:
+            requests_per_second = 1 / fetch_delay
+
+        rate_limiter = RateLimiter(requests_per_second) if requests_per_second is not None else None
+
+        # (status code, decoded body) of the page at skip
+        def fetch_page(skip):
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            else:
+                time.sleep(fetch_delay)
+
+            response = self.__fetch_members(params=dict(params, skip=skip))
+            if response.status_code != 200:
+                return response.status_code, None
+
+            return response.status_code, response.json()
+
+        def page_items(status_code, page):
+            if status_code != 200:
+                print(f"Received status code {status_code}, terminating...")
+                listing["failed_status_code"] = status_code
+                return None
+            if verbose:
+                # Print response
+                jprint(page)
+
+            return page["items"]
+
+        first_page = fetch_page(start)
+        items = page_items(*first_page)
+        if not items:
+            return
+        yield items
+
+        # the skip offset after the last page to fetch, limit is reached on the page where it is met or exceeded
+        limit_end = start + -(-limit // take) * take if limit is not None else None
+        total_results = listing["total_results"] = first_page[1].get("totalResults")
+        end = min((e for e in (limit_end, total_results) if e is not None), default=None)
+
+        if end is None or max_workers is None or max_workers <= 1:
+            # without a total, keep going until a page comes back empty
+            skip = start + take
+            while end is None or skip < end:
+                items = page_items(*fetch_page(skip))
+                if not items:
+                    return
+                yield items
+                skip += take
+        else:
+            if self.__shares_default_transport:
+                # iter_members fetches contact details while pages are being fetched
+                default_transport(pool_maxsize=max_workers + self.contact_workers)
+
+            skips = iter(range(start + take, end, take))
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            pending = deque()
+
+            def submit_next_page():
+                skip = next(skips, None)
+                if skip is not None:
+                    pending.append(executor.submit(fetch_page, skip))
+
+            try:
+                # keep the pool saturated, pages are yielded in the order they were submitted
+                for _ in range(max_workers):
+                    submit_next_page()
+
+                while pending:
+                    items = page_items(*pending.popleft().result())
+                    if not items:
+                        return
+                    submit_next_page()
+
+                    yield items
+            finally:
+                for future in pending:
+                    future.cancel()
+                executor.shutdown(wait=True)
+
+        if verbose and limit_end is not None and (total_results is None or limit_end < total_results):
+            print(f"Limit {limit} reached.")
+
+    def iter_members(self,
+                     params: dict,
+                     fetch_delay: int = 0,
+                     limit: int = None,
+                     only_get_current_members_emails: bool = True,
+                     verbose: bool = False,
+                     max_workers: int = None,
+                     requests_per_second: float = None) -> Iterator[dict]:
+        """
+        Yield a record of each member that fits the criteria stated in params as each page arrives, without storing them
+        in self.mp_overview_data. Members who have died are left out.
+        :param params: dictionary of parameters to pass
+        :param fetch_delay: Time (seconds) between fetching each 'page'
+        :param limit: Limit of number of members to retrieve.
+        :param only_get_current_members_emails: default true if we only want emails for current members (recommended)
+        :param verbose: Enable verbose mode
+        :param max_workers: If more than 1, fetch pages concurrently using this many threads, members are yielded in the
+            same order as when fetching serially
+        :param requests_per_second: Rate limit on fetching pages when concurrent, derived from fetch_delay if None
+        :return: yield a dict for each member, with keys MPOverviewBuilder.columns
+        """
+        # contact details of the members on each page are fetched concurrently
+        executor = ThreadPoolExecutor(max_workers=self.contact_workers) if self.contact_workers > 1 else None
+        try:
+            for items in self.__iter_member_pages(params, fetch_delay, limit, verbose, max_workers,
+                                                  requests_per_second):
+                yield from self.__member_records(items, only_get_current_members_emails, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
     def get_all_members(self,
                         params: dict,
                         fetch_delay: int = 0,
                         limit: int = None,
                         only_get_current_members_emails: bool = True,
-                        verbose: bool = False) -> None:
+                        verbose: bool = False,
+                        max_workers: int = None,
+                        requests_per_second: float = None) -> None:
         """
         Get all members that fit the criteria stated in params and save in self.mp_overview_data
+        Wrapper for iter_members, takes the same parameters.
         :param params: dictionary of parameters to pass
         :param fetch_delay: Time (seconds) between fetching each 'page'
         :param limit: Limit of number of members to retrieve.
         :param only_get_current_members_emails: default true if we only want emails for current members (recommended)
         :param verbose: Enable verbose mode
+        :param max_workers: If more than 1, fetch pages concurrently using this many threads, members are added in the
+            same order as when fetching serially. Up to max_workers + contact_workers requests are made at once, the
+            shared default transport's pool is grown to match, a transport given to MPOverview should have a
+            pool_maxsize of at least that, or connections beyond its pool are opened and discarded for every request
+        :param requests_per_second: Rate limit on fetching pages when concurrent, derived from fetch_delay if None
         """
-        take = self.max_take
-        skip = params.get("skip", 0)
-        count = 0
-        while True:
-            # Get next response
-            response = self.__fetch_members(params=params)
-
-            n_items = len(response.json()["items"])
-
-            if response.status_code != 200:
-                print(f"Received status code {response.status_code}, terminating...")
-                break
-
-            if n_items == 0:
-                break
+        # members are collected here and added to mp_overview_data once all pages are fetched
+        builder = MPOverviewBuilder()
+        for record in self.iter_members(params, fetch_delay, limit, only_get_current_members_emails, verbose,
+                                        max_workers, requests_per_second):
+            builder.append(**record)
 
-            count += n_items
-            # Save response to dataframe
-            self.__add_member_to_data_from_api_response(response, only_get_current_members_emails)
-
-            # Calculate next skip
-            skip += take
-
-            # Respect limit, if it's set
-            if limit is not None and count >= limit:
-                if verbose:
-                    jprint(response.json())
-                    print(f"Limit {limit} reached.")
-
-                break
-
-            # Delay if set
-            if verbose:
-                # Print response
-                jprint(response.json())
-                # Wait fetch_delay seconds
-                print(f"Waiting {fetch_delay}s... ")
-                time.sleep(fetch_delay)
-                print("Getting...")
-            else:
-                time.sleep(fetch_delay)
-
-            params["skip"] = skip
+        if len(self.mp_overview_data.index) == 0:
+            self.mp_overview_data = builder.build()
+        else:
+            self.mp_overview_data = pd.concat([self.mp_overview_data, builder.build()], ignore_index=True)
 
         now = datetime.datetime.now()
         if verbose:
-            print(f"{count} members retrieved.")
+            print(f"{len(builder)} members retrieved.")
             print(f"Setting last_updated to {now}.")
             print(f"Updating finished.\n")
         self.last_updated = now
 
-    def get_active_MPs(self, fetch_delay: int = 0, limit: int = None, verbose: bool = False):
+    def sync_members(self,
+                     params: dict = None,
+                     fetch_delay: int = 0,
+                     only_get_current_members_emails: bool = True,
+                     verbose: bool = False,
+                     max_workers: int = None,
+                     requests_per_second: float = None) -> MemberSyncReport:
+        """
+        Bring the member index kept in member_index_store up to date with the members that fit the criteria stated in
+        params, then set self.mp_overview_data to the members in the index.
+        Every page of results is fetched, but a member's contact details are only fetched when the member is new, their
+        names, membership or party changed, or their email is older than email_ttl. Use a separate member_index_store
+        for each params.
+        If a page can not be fetched, or fewer members are listed than the totalResults reported, the listing is
+        incomplete: no contact details are fetched, the index is not saved, self.mp_overview_data is left as it was and
+        the report has complete set to False.
+        :param params: dictionary of parameters to pass, default MPOverview.current_mp_params
+        :param fetch_delay: Time (seconds) between fetching each 'page'
+        :param only_get_current_members_emails: default true if we only want emails for current members (recommended)
+        :param verbose: Enable verbose mode
+        :param max_workers: If more than 1, fetch pages concurrently using this many threads
+        :param requests_per_second: Rate limit on fetching pages when concurrent, derived from fetch_delay if None
+        :return: MemberSyncReport of what changed
+        """
+        if params is None:
+            params = self.current_mp_params
+
+        # member id -> (record, datetime the email was fetched, None if the email was not fetched)
+        member_index = self.member_index_store.load(default={})
+        now = datetime.datetime.now()
+        email_expiry = datetime.timedelta(seconds=self.email_ttl) if self.email_ttl is not None else None
+
+        report = MemberSyncReport()
+        records = []
+        refresh_ids = []
+        listing = {}
+        n_listed = 0
+        for items in self.__iter_member_pages(params, fetch_delay, verbose=verbose, max_workers=max_workers,
+                                              requests_per_second=requests_per_second, listing=listing):
+            n_listed += len(items)
+            for record in self.__member_records_without_emails(items):
+                member_id = record["member_id"]
+                wants_email = record["current_member"] or only_get_current_members_emails == False
+                old_record, email_fetched = member_index.get(member_id, (None, None))
+
+                membership_changed = old_record is not None and \
+                    any(record[f] != old_record[f] for f in MPOverview.__membership_fields)
+                if old_record is None:
+                    report.added.append(member_id)
+                elif membership_changed:
+                    report.changed.append(member_id)
+
+                if not wants_email:
+                    record["email"] = "not_current_member"
+                    email_fetched = None
+                elif old_record is None or membership_changed or email_fetched is None \
+                        or (email_expiry is not None and now - email_fetched >= email_expiry):
+                    refresh_ids.append(member_id)
+                else:
+                    # carried over along with the time it was last refreshed
+                    record["email"] = old_record["email"]
+                    record["last_updated"] = old_record["last_updated"]
+
+                records.append((record, email_fetched))
+
+        # members missing from a listing that ended early must not be taken as removed
+        total_results = listing["total_results"]
+        if listing["failed_status_code"] is not None or \
+                (total_results is not None and n_listed < total_results - int(params.get("skip", 0))):
+            report.complete = False
+            if verbose:
+                print(f"Listed {n_listed} of {total_results} members, the member index is left as it was")
+            return report
+
+        executor = ThreadPoolExecutor(max_workers=self.contact_workers) if self.contact_workers > 1 else None
+        try:
+            refreshed_emails = dict(zip(refresh_ids, self.__fetch_emails(refresh_ids, executor)))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        report.contacts_fetched = len(refresh_ids)
+
+        new_member_index = {}
+        for record, email_fetched in records:
+            member_id = record["member_id"]
+            if member_id in refreshed_emails:
+                record["email"] = refreshed_emails[member_id]
+                email_fetched = now
+            old_record, _ = member_index.get(member_id, (None, None))
+            if old_record is not None and old_record["email"] != record["email"] and member_id not in report.changed:
+                report.changed.append(member_id)
+            new_member_index[member_id] = (record, email_fetched)
+
+        report.removed = [member_id for member_id in member_index if member_id not in new_member_index]
+        report.unchanged = len(new_member_index) - len(report.added) - len(report.changed)
+
+        self.member_index_store.save(new_member_index)
+
+        builder = MPOverviewBuilder()
+        for record, _ in new_member_index.values():
+            builder.append(**record)
+        self.mp_overview_data = builder.build()
+        self.last_updated = now
+
+        if verbose:
+            print(report)
+
+        return report
+
+    def get_active_MPs(self, fetch_delay: int = 0, limit: int = None, verbose: bool = False, max_workers: int = None,
+                       requests_per_second: float = None):
         """
         Get all active MPs in parliament.
         Wrapper for get_all_members. Uses the MPOverview.current_mp_params dict.
         :param fetch_delay: Time (seconds) between fetching each 'page'
         :param limit: Limit of number of members to retrieve.
         :param verbose: Enable verbose mode
+        :param max_workers: If more than 1, fetch pages concurrently using this many threads
+        :param requests_per_second: Rate limit on fetching pages when concurrent, derived from fetch_delay if None
         :return:
         """
 
-        return self.get_all_members(self.current_mp_params, fetch_delay, limit, verbose)
+        return self.get_all_members(self.current_mp_params, fetch_delay=fetch_delay, limit=limit, verbose=verbose,
+                                    max_workers=max_workers, requests_per_second=requests_per_second)
 
     def __fetch_members(self, params: dict = None) -> requests.Response:
         """
@@ -202,6 +540,6 @@ class MPOverview:
 
         path = "Members/Search"
 
-        response = requests.get(self.api_url + path, params=params)
+        response = self.transport.get(self.api_url + path, params=params)
 
         return response
@@ -0,0 +1,89 @@
+"""
+Contains class that accumulates member data column by column, building the members DataFrame once per fetch
+
+Classes (public):
+    MPOverviewBuilder
+"""
+from array import array
+import datetime
+
+import numpy
+import pandas as pd
+
+
+class MPOverviewBuilder():
+    """
+    Class collecting the fields of each member in per-column buffers, so that the members DataFrame is built once rather
+    than appended to member by member
+
+    Attributes (public):
+    ---------
+    columns: List[str]
+        the columns of the built DataFrame, in order
+    """
+    columns = ["name_display", "name_full_title", "name_address_as", "name_list_as", "email", "member_id",
+               "current_member", "gender", "party_id", "constituency", "last_updated"]
+
+    __epoch = datetime.datetime(1970, 1, 1)
+    __one_microsecond = datetime.timedelta(microseconds=1)
+
+    def __init__(self):
+        self.__names_display = []
+        self.__names_full_title = []
+        self.__names_address_as = []
+        self.__names_list_as = []
+        self.__emails = []
+        self.__member_ids = array('q')
+        self.__current_members = array('b')
+        self.__genders = []
+        self.__party_ids = array('q')
+        self.__constituencies = []
+        # microseconds since the epoch
+        self.__last_updated = array('q')
+
+    def __len__(self):
+        return len(self.__member_ids)
+
+    def append(self, name_display: str, name_full_title: str, name_address_as: str, name_list_as: str, email: str,
+               member_id: int, current_member: bool, gender: str, party_id: int, constituency: str,
+               last_updated: datetime.datetime) -> None:
+        """
+        Add a single member
+        """
+        self.__names_display.append(name_display)
+        self.__names_full_title.append(name_full_title)
+        self.__names_address_as.append(name_address_as)
+        self.__names_list_as.append(name_list_as)
+        self.__emails.append(email)
+        self.__member_ids.append(member_id)
+        self.__current_members.append(current_member)
+        self.__genders.append(gender)
+        self.__party_ids.append(party_id)
+        self.__constituencies.append(constituency)
+        self.__last_updated.append((last_updated - self.__epoch) // self.__one_microsecond)
+
+    def build(self) -> pd.DataFrame:
+        """
+        Build the DataFrame from all members added so far
+
+        member_id and party_id are int64, current_member is bool and last_updated is datetime64[ns]
+        """
+        # copies are taken so that the buffers can still be appended to after building
+        member_ids = numpy.frombuffer(self.__member_ids, dtype=numpy.int64).copy()
+        current_members = numpy.frombuffer(self.__current_members, dtype=numpy.int8).astype(bool)
+        party_ids = numpy.frombuffer(self.__party_ids, dtype=numpy.int64).copy()
+        last_updated = numpy.frombuffer(self.__last_updated, dtype=numpy.int64).astype("datetime64[us]")
+
+        return pd.DataFrame({
+            "name_display": pd.Series(self.__names_display, dtype=object),
+            "name_full_title": pd.Series(self.__names_full_title, dtype=object),
+            "name_address_as": pd.Series(self.__names_address_as, dtype=object),
+            "name_list_as": pd.Series(self.__names_list_as, dtype=object),
+            "email": pd.Series(self.__emails, dtype=object),
+            "member_id": member_ids,
+            "current_member": current_members,
+            "gender": pd.Series(self.__genders, dtype=object),
+            "party_id": party_ids,
+            "constituency": pd.Series(self.__constituencies, dtype=object),
+            "last_updated": last_updated.astype("datetime64[ns]"),
+        }, columns=self.columns)
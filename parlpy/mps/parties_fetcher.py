@@ -1,14 +1,22 @@
 """
-Contains function to get a list of PartyInformation objects describing all parties
+Contains function to get a list of PartyInformation objects describing all parties, and a registry caching them by id
 
 Classes (public):
     PartyInformation
+    PartyRegistry
 
 Functions (public):
     get_all_parties
+    default_party_registry
 """
-import requests
 import json
+import threading
+
+import numpy
+import pandas as pd
+
+from parlpy.utils.lru_cache import LRUCache
+from parlpy.utils.transport import Transport, default_transport
 
 
 class PartyInformation():
@@ -20,20 +28,27 @@ class PartyInformation():
     party_name: str
         party name corresponing to id
     party_id: str
+    party_abbreviation: str
+        short name of the party, such as "Lab"
     """
-    def __init__(self, party_name: str, party_id: int):
+    def __init__(self, party_name: str, party_id: int, party_abbreviation: str = None):
         self.party_name = party_name
         self.party_id = party_id
+        self.party_abbreviation = party_abbreviation
 
 
-def get_all_parties():
+def get_all_parties(transport: Transport = None, house: str = "Commons"):
     """
-    Function that returns a list of PartyInformation objects containing information on all parties with active MPs
-    :return: list of PartyInformation objects for all parties with MPs
+    Function that returns a list of PartyInformation objects containing information on all parties with active members
+    :param transport: Transport to make the request with, None for the shared default transport
+    :param house: "Commons" for parties with active MPs, "Lords" for parties with active peers
+    :return: list of PartyInformation objects for all parties with members in the house
     """
-    commons_parties_endpoint = "https://members-api.parliament.uk/api/Parties/GetActive/Commons"
+    parties_endpoint = f"https://members-api.parliament.uk/api/Parties/GetActive/{house}"
 
-    r = requests.get(commons_parties_endpoint)
+    if transport is None:
+        transport = default_transport()
+    r = transport.get(parties_endpoint)
     parties_object = json.loads(r.text)
 
     parties_items_object = parties_object["items"]
@@ -43,8 +58,137 @@ def get_all_parties():
     for p in parties_items_object:
         party_id = p["value"]["id"]
         party_name = p["value"]["name"]
+        party_abbreviation = p["value"].get("abbreviation")
 
-        party_obj = PartyInformation(party_name, party_id)
+        party_obj = PartyInformation(party_name, party_id, party_abbreviation)
         parties_list.append(party_obj)
 
     return parties_list
+
+
+class PartyRegistry():
+    """
+    Class holding the active parties of one or both houses by party id, fetched again once they are older than ttl
+    seconds, safe to share between threads
+
+    Attributes (public):
+    ---------
+    houses: tuple
+        houses whose parties are held, ("Commons",) or ("Commons", "Lords")
+    """
+    def __init__(self, transport: Transport = None, ttl: float = 24 * 60 * 60, include_lords: bool = False):
+        """
+        :param transport: Transport to make requests with, None for the shared default transport
+        :param ttl: seconds the parties are held for before being fetched again, None to hold them until refresh
+        :param include_lords: if true, parties with active peers are held as well as those with active MPs
+        """
+        self.transport = transport if transport is not None else default_transport()
+        self.houses = ("Commons", "Lords") if include_lords else ("Commons",)
+
+        # a single entry, the parties of every house by id, and the same as (ids, names, abbreviations) arrays
+        self.__cache = LRUCache(maxsize=1, ttl=ttl)
+        self.__fetch_lock = threading.Lock()
+
+    # fetch the parties of each house, a party in more than one house keeps the details from the first
+    def __fetch(self):
+        parties = {}
+        for house in self.houses:
+            for p in get_all_parties(self.transport, house=house):
+                parties.setdefault(p.party_id, p)
+
+        index = pd.Index(list(parties), dtype="int64")
+        names = numpy.array([p.party_name for p in parties.values()] + [None], dtype=object)
+        abbreviations = numpy.array([p.party_abbreviation for p in parties.values()] + [None], dtype=object)
+
+        return parties, (index, names, abbreviations)
+
+    def __entry(self):
+        entry = self.__cache.get("parties")
+        if entry is None:
+            # one thread fetches while any others wait for it, rather than all of them fetching at once
+            with self.__fetch_lock:
+                entry = self.__cache.get("parties")
+                if entry is None:
+                    entry = self.__fetch()
+                    self.__cache.set("parties", entry)
+
+        return entry
+
+    def refresh(self) -> None:
+        """
+        Fetch the parties now, rather than when they next expire
+        """
+        with self.__fetch_lock:
+            self.__cache.set("parties", self.__fetch())
+
+    def parties(self) -> list:
+        """
+        :return: list of PartyInformation objects for every party held
+        """
+        parties, _ = self.__entry()
+        return list(parties.values())
+
+    def get(self, party_id: int, default=None) -> PartyInformation:
+        """
+        :return: PartyInformation of the party with party_id, or default if it is not an active party
+        """
+        parties, _ = self.__entry()
+        return parties.get(party_id, default)
+
+    def name(self, party_id: int) -> str:
+        """
+        :return: name of the party with party_id, None if it is not an active party
+        """
+        party = self.get(party_id)
+        return party.party_name if party is not None else None
+
+    def abbreviation(self, party_id: int) -> str:
+        """
+        :return: abbreviation of the party with party_id, None if it is not an active party
+        """
+        party = self.get(party_id)
+        return party.party_abbreviation if party is not None else None
+
+    def __contains__(self, party_id):
+        return self.get(party_id) is not None
+
+    def __len__(self):
+        parties, _ = self.__entry()
+        return len(parties)
+
+    def enrich(self, mp_overview_data: pd.DataFrame, party_id_column: str = "party_id") -> pd.DataFrame:
+        """
+        Add the party_name and party_abbreviation of each member, looked up by party id for the whole column at once
+        :param mp_overview_data: DataFrame with a column of party ids, such as MPOverview.mp_overview_data
+        :param party_id_column: name of the column of party ids
+        :return: copy of mp_overview_data with party_name and party_abbreviation columns, None for parties not held
+        """
+        _, (index, names, abbreviations) = self.__entry()
+
+        # -1 for ids not held, which picks the None at the end of names and abbreviations
+        positions = index.get_indexer(mp_overview_data[party_id_column])
+
+        enriched = mp_overview_data.copy()
+        enriched["party_name"] = pd.Series(names[positions], index=enriched.index, dtype=object)
+        enriched["party_abbreviation"] = pd.Series(abbreviations[positions], index=enriched.index, dtype=object)
+
+        return enriched
+
+
+__default_party_registry = None
+__default_party_registry_lock = threading.Lock()
+
+
+def default_party_registry() -> PartyRegistry:
+    """
+    Get a PartyRegistry of Commons parties shared by the whole process, created on first use, so that repeated lookups
+    do not each make a request
+    :return: the process wide PartyRegistry
+    """
+    global __default_party_registry
+
+    with __default_party_registry_lock:
+        if __default_party_registry is None:
+            __default_party_registry = PartyRegistry()
+
+        return __default_party_registry
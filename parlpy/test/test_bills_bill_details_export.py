@@ -0,0 +1,156 @@
+import datetime
+import tempfile
+import unittest
+
+import numpy as np
+
+import parlpy.bills.bill_details_export as bde
+import parlpy.bills.bill_list_fetcher as blf
+from parlpy.bills.bill_details_iterator import BillDetails
+from parlpy.bills.bill_votes_fetcher import DivisionInformation
+from parlpy.bills.overview_builder import BillsOverviewBuilder
+
+
+# BillDetails of three bills, the first two last in the 2019-21 session and the third in 2021-22
+def make_bill_details():
+    builder = BillsOverviewBuilder(blf.BillsOverview.OriginatingHouse)
+    builder.append("Finance", "Act 2021", blf.BillsOverview.OriginatingHouse.HOUSE_OF_COMMONS,
+                   datetime.datetime(2021, 6, 10, 12), "/bills/2001", ["2019-21"])
+    builder.append("Environment", "Act 2021", blf.BillsOverview.OriginatingHouse.HOUSE_OF_LORDS,
+                   datetime.datetime(2021, 11, 9, 18), "/bills/2593", ["2019-21", "2021-22"])
+    builder.append("Health and Care", "Bill", blf.BillsOverview.OriginatingHouse.HOUSE_OF_COMMONS,
+                   datetime.datetime(2021, 7, 14, 9), "/bills/3022", ["2017-19", "2019-21"])
+    rows = list(builder.build().itertuples())
+
+    divisions = [
+        [DivisionInformation("Finance Bill: Second Reading", "Second Reading", [1, 2, 3], [4], division_id=11),
+         DivisionInformation("Finance Bill: Third Reading", "Third Reading", [1, 2], [3, 4], division_id=12)],
+        [DivisionInformation("Environment Bill: Amendment 1", "Amendments", [5], [6, 7], division_id=21)],
+        [],
+    ]
+
+    return [BillDetails(b, f"summary of {b.bill_title_stripped}", d) for b, d in zip(rows, divisions)]
+
+
+class TestBillDetailsExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.sessions = bde.export_bill_details(make_bill_details(), self.tmp.name)
+
+    def test_partitioned_by_latest_session(self):
+        self.assertEqual(sorted(self.sessions), ["2019-21", "2021-22"])
+        self.assertEqual(bde.exported_sessions(self.tmp.name), ["2019-21", "2021-22"])
+
+        bills = bde.load_table(self.tmp.name, "bills", sessions=["2021-22"])
+        self.assertEqual(bills["url"].tolist(), ["https://bills.parliament.uk/bills/2593"])
+        self.assertEqual(list(bills["sessions"].iloc[0]), ["2019-21", "2021-22"])
+        self.assertEqual(bills["originating_house"].iloc[0], "HOUSE_OF_LORDS")
+
+    def test_round_trip(self):
+        bills, divisions, votes = bde.load_bill_details(self.tmp.name, arrow_dtypes=False)
+
+        self.assertEqual(sorted(bills["title_stripped"]), ["Environment", "Finance", "Health and Care"])
+        self.assertEqual(bills.set_index("title_stripped").loc["Finance", "last_updated"],
+                         datetime.datetime(2021, 6, 10, 12))
+        self.assertEqual(sorted(divisions["division_id"]), [11, 12, 21])
+        self.assertEqual(divisions.set_index("division_id").loc[12, ["ayes", "noes"]].tolist(), [2, 2])
+
+        division_votes = votes[votes["division_id"] == 21].sort_values("member_id")
+        self.assertEqual(division_votes["member_id"].tolist(), [5, 6, 7])
+        self.assertEqual(division_votes["vote"].tolist(), [1, -1, -1])
+        self.assertEqual(len(votes.index), 11)
+
+    def test_load_maps_without_copying(self):
+        bill_details = make_bill_details()[:1]
+        bill_details[0].divisions_list = [DivisionInformation("Finance Bill: Amendment 2", "Amendments",
+                                                              range(200000), range(200000, 300000), division_id=13)]
+        bde.export_bill_details(bill_details, self.tmp.name)
+
+        before = bde.pa.total_allocated_bytes()
+        votes = bde.load_table(self.tmp.name, "votes", sessions=["2019-21"], columns=["member_id", "vote"])
+
+        # the 1.5MB of votes stay in the mapped file
+        self.assertLess(bde.pa.total_allocated_bytes() - before, 10000)
+        self.assertEqual(len(votes.index), 300000)
+        self.assertEqual(int(votes["vote"].sum()), 100000)
+
+    def test_reexport_merges_into_session(self):
+        bill_details = make_bill_details()
+        bill_details[0].summary = "new summary"
+        bill_details[0].divisions_list = bill_details[0].divisions_list[:1]
+        bde.export_bill_details(bill_details[:1], self.tmp.name)
+
+        bills = bde.load_table(self.tmp.name, "bills", sessions=["2019-21"], arrow_dtypes=False)
+        self.assertEqual(bills.set_index("title_stripped")["summary"].to_dict(),
+                         {"Finance": "new summary", "Health and Care": "summary of Health and Care"})
+
+        # the votes of the division no longer on the bill are gone with it
+        bills, divisions, votes = bde.load_bill_details(self.tmp.name, arrow_dtypes=False)
+        self.assertEqual(sorted(divisions["division_id"]), [11, 21])
+        self.assertEqual(sorted(votes["division_id"].unique()), [11, 21])
+        self.assertEqual(len(bills.index), 3)
+
+    def test_bill_moved_to_later_session(self):
+        bill_details = make_bill_details()
+        bill_details[2].sessions = ["2019-21", "2021-22"]
+        bde.export_bill_details(bill_details[2:], self.tmp.name)
+
+        self.assertEqual(bde.load_table(self.tmp.name, "bills", sessions=["2019-21"])["url"].tolist(),
+                         ["https://bills.parliament.uk/bills/2001"])
+        self.assertEqual(len(bde.load_table(self.tmp.name, "bills", sessions=["2021-22"]).index), 2)
+
+    def test_overwrite_replaces_session(self):
+        bill_details = make_bill_details()
+        bill_details[0].summary = "new summary"
+        bde.export_bill_details(bill_details[:1], self.tmp.name, mode="overwrite")
+
+        bills = bde.load_table(self.tmp.name, "bills", sessions=["2019-21"])
+        self.assertEqual(bills["summary"].tolist(), ["new summary"])
+        self.assertEqual(len(bde.load_table(self.tmp.name, "bills", sessions=["2021-22"]).index), 1)
+
+        with self.assertRaises(ValueError):
+            bde.export_bill_details(bill_details, self.tmp.name, mode="replace")
+
+    # the Finance and Health and Care bills both with division 12, as when one division's title names both bills
+    def __export_shared_division(self):
+        bill_details = make_bill_details()
+        bill_details[2].divisions_list = [bill_details[0].divisions_list[1]]
+        bde.export_bill_details(bill_details, self.tmp.name, mode="overwrite")
+
+        return bill_details
+
+    def test_shared_division_votes_written_once(self):
+        self.__export_shared_division()
+
+        bills, divisions, votes = bde.load_bill_details(self.tmp.name, arrow_dtypes=False)
+        self.assertEqual(sorted(divisions["division_id"]), [11, 12, 12, 21])
+        self.assertEqual(len(votes[votes["division_id"] == 12].index), 4)
+        self.assertEqual(len(votes.index), 11)
+
+    def test_shared_division_votes_kept_while_on_a_bill(self):
+        bill_details = self.__export_shared_division()
+
+        # the Finance bill loses its divisions, division 12 is still on the Health and Care bill
+        bill_details[0].divisions_list = []
+        bde.export_bill_details(bill_details[:1], self.tmp.name)
+
+        _, divisions, votes = bde.load_bill_details(self.tmp.name, arrow_dtypes=False)
+        self.assertEqual(sorted(divisions["division_id"]), [12, 21])
+        self.assertEqual(sorted(votes[votes["division_id"] == 12]["member_id"]), [1, 2, 3, 4])
+
+        # exported again with the Health and Care bill, its votes replace those kept rather than being added to them
+        bde.export_bill_details(bill_details[2:], self.tmp.name)
+
+        _, divisions, votes = bde.load_bill_details(self.tmp.name, arrow_dtypes=False)
+        self.assertEqual(sorted(divisions["division_id"]), [12, 21])
+        self.assertEqual(len(votes[votes["division_id"] == 12].index), 4)
+
+        # with neither bill on it, its votes are gone
+        bill_details[2].divisions_list = []
+        bde.export_bill_details(bill_details[2:], self.tmp.name)
+        self.assertEqual(sorted(bde.load_table(self.tmp.name, "votes", arrow_dtypes=False)["division_id"].unique()),
+                         [21])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,20 @@
 import unittest
 import datetime
+import asyncio
+import random
+import tempfile
+import time
+from unittest import mock
 
 import parlpy.bills.bill_list_fetcher as blf
 import parlpy.bills.bill_details_iterator as bdi
+import parlpy.bills.bill_votes_fetcher as bvf
+import parlpy.bills.summary_fetcher as sf
 from parlpy.bills.bill_details_iterator import BillDetails
+from parlpy.bills.overview_builder import BillsOverviewBuilder
+from parlpy.bills.details_checkpoint import DetailsCheckpoint
+from parlpy.bills.summary_cache import SummaryCache
+from parlpy.utils.state_store import InMemoryStateStore
 
 
 def print_all_info_using_iterator(fetcher):
@@ -23,6 +34,172 @@ def get_last_bill_details(fetcher) -> BillDetails:
     return last_item
 
 
+# BillsOverview holding n_bills made up bills, without scraping
+def make_overview(n_bills):
+    overview = blf.BillsOverview(state_store=InMemoryStateStore())
+
+    builder = BillsOverviewBuilder(blf.BillsOverview.OriginatingHouse)
+    for i in range(n_bills):
+        builder.append(f"Example Number {i}", "Bill", blf.BillsOverview.OriginatingHouse.HOUSE_OF_COMMONS,
+                       datetime.datetime(2021, 9, 16, 18) - datetime.timedelta(hours=i), f"/bills/{1000 + i}",
+                       ["2019-21", "2021-22"])
+    overview.bills_overview_data = builder.build()
+
+    return overview
+
+
+# stand ins for the fetchers, sleeping for a random time so that bills complete out of order
+def fake_get_divisions_information(bill_title_stripped, start_datetime, end_datetime=None, **kwargs):
+    time.sleep(random.uniform(0, 0.01))
+    return [bvf.DivisionInformation(f"{bill_title_stripped} Bill: Second Reading", "Second Reading", [1, 2], [3])]
+
+
+def fake_get_summary(detail_path, **kwargs):
+    time.sleep(random.uniform(0, 0.01))
+    return f"summary of {detail_path}"
+
+
+def details_key(d):
+    return (d.title_stripped, d.url, d.last_updated, d.sessions, d.summary,
+            [(v.division_name, list(v.ayes), list(v.noes)) for v in d.divisions_list])
+
+
+class TestDetailsOffline(unittest.TestCase):
+    def setUp(self):
+        patchers = [mock.patch.object(bvf, "get_divisions_information", fake_get_divisions_information),
+                    mock.patch.object(sf, "get_summary", fake_get_summary)]
+        for p in patchers:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.overview = make_overview(30)
+        self.expected = [details_key(d) for d in bdi.get_bill_details(self.overview)]
+
+    def test_async_ordered_matches_sync(self):
+        details = bdi.collect_bill_details(self.overview, max_concurrency=5)
+
+        self.assertEqual([details_key(d) for d in details], self.expected)
+
+    def test_async_as_completed_yields_every_bill(self):
+        details = bdi.collect_bill_details(self.overview, max_concurrency=5, ordered=False)
+
+        self.assertCountEqual([details_key(d) for d in details], self.expected)
+
+    def test_async_stop_early(self):
+        async def first_two():
+            got = []
+            async for d in bdi.aget_bill_details(self.overview, max_concurrency=3):
+                got.append(details_key(d))
+                if len(got) == 2:
+                    break
+            return got
+
+        self.assertEqual(asyncio.run(first_two()), self.expected[:2])
+
+
+    def test_prefetch_matches_serial(self):
+        details = list(bdi.get_bill_details(self.overview, prefetch=4, max_workers=2))
+
+        self.assertEqual([details_key(d) for d in details], self.expected)
+
+    def test_prefetch_raises_on_failing_bill(self):
+        def failing_get_summary(detail_path, **kwargs):
+            if detail_path == "/bills/1005":
+                raise ValueError(detail_path)
+            return fake_get_summary(detail_path)
+
+        yielded = []
+        with mock.patch.object(sf, "get_summary", failing_get_summary):
+            with self.assertRaises(ValueError):
+                for d in bdi.get_bill_details(self.overview, prefetch=8):
+                    yielded.append(details_key(d))
+
+        self.assertEqual(yielded, self.expected[:5])
+
+
+    def test_summary_cache_skips_unchanged_bills(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SummaryCache(directory)
+            list(bdi.get_bill_details(self.overview, summary_cache=cache))
+
+            # one bill has been updated since
+            self.overview.bills_overview_data.loc[3, "last_updated"] += datetime.timedelta(minutes=5)
+            details = bdi.collect_bill_details(self.overview, summary_cache=cache)
+
+            self.assertEqual([details_key(d)[4] for d in details], [key[4] for key in self.expected])
+            self.assertEqual((cache.stats.hits, cache.stats.misses), (29, 31))
+
+    def test_checkpoint_resumes_after_failure(self):
+        checkpoint = DetailsCheckpoint(InMemoryStateStore(), save_every=4)
+
+        def failing_get_summary(detail_path, **kwargs):
+            if detail_path == "/bills/1010":
+                raise ConnectionError(detail_path)
+            return fake_get_summary(detail_path)
+
+        yielded = []
+        with mock.patch.object(sf, "get_summary", failing_get_summary):
+            with self.assertRaises(ConnectionError):
+                for d in bdi.get_bill_details(self.overview, prefetch=4, checkpoint=checkpoint):
+                    yielded.append(details_key(d))
+        self.assertEqual(len(yielded), 10)
+
+        # a new run, loading the checkpoint from the store, only gets the rest
+        resumed = DetailsCheckpoint(checkpoint.store)
+        self.assertEqual(len(resumed), 10)
+        details = list(bdi.get_bill_details(self.overview, checkpoint=resumed))
+        self.assertEqual(yielded + [details_key(d) for d in details], self.expected)
+        self.assertEqual(list(bdi.get_bill_details(self.overview, checkpoint=DetailsCheckpoint(checkpoint.store))), [])
+
+    def test_checkpoint_redoes_updated_bills(self):
+        checkpoint = DetailsCheckpoint(InMemoryStateStore())
+        list(bdi.get_bill_details(self.overview, checkpoint=checkpoint))
+
+        self.overview.bills_overview_data.loc[[2, 7], "last_updated"] += datetime.timedelta(minutes=5)
+        details = list(bdi.get_bill_details(self.overview, checkpoint=checkpoint))
+        self.assertEqual([d.url for d in details], ["https://bills.parliament.uk/bills/1002",
+                                                    "https://bills.parliament.uk/bills/1007"])
+
+        checkpoint.clear()
+        self.assertEqual(len(list(bdi.get_bill_details(self.overview, checkpoint=checkpoint))), 30)
+
+    def test_collect_checkpoint_records_bills_once_collected(self):
+        checkpoint = DetailsCheckpoint(InMemoryStateStore(), save_every=1)
+        full_data = self.overview.bills_overview_data
+
+        def failing_get_summary(detail_path, **kwargs):
+            if detail_path == "/bills/1020":
+                raise ConnectionError(detail_path)
+            return fake_get_summary(detail_path)
+
+        with mock.patch.object(sf, "get_summary", failing_get_summary):
+            with self.assertRaises(ConnectionError):
+                bdi.collect_bill_details(self.overview, max_concurrency=4, checkpoint=checkpoint)
+        self.assertEqual(len(checkpoint), 0)
+
+        self.overview.bills_overview_data = full_data.iloc[:10]
+        self.assertEqual(len(bdi.collect_bill_details(self.overview, checkpoint=checkpoint)), 10)
+        self.overview.bills_overview_data = full_data
+        details = bdi.collect_bill_details(self.overview, checkpoint=checkpoint)
+        self.assertEqual([details_key(d) for d in details], self.expected[10:])
+        self.assertEqual(len(DetailsCheckpoint(checkpoint.store)), 30)
+
+    def test_async_checkpoint(self):
+        checkpoint = DetailsCheckpoint(InMemoryStateStore())
+
+        async def take(n):
+            details = []
+            async for d in bdi.aget_bill_details(self.overview, max_concurrency=4, checkpoint=checkpoint):
+                details.append(details_key(d))
+                if len(details) == n:
+                    break
+            return details
+
+        first = asyncio.run(take(5))
+        rest = asyncio.run(take(30))
+        # the bill being handled when iteration stopped is done again
+        self.assertEqual(first + rest[1:], self.expected)
+
 class TestDetails(unittest.TestCase):
     # a much shorter test, but does not test divisions capabilities
     def test_print_iterator_on_2004_05_session(self):
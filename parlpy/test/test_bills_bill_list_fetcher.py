@@ -1,14 +1,195 @@
 import datetime
+import os
+import tempfile
 import time
+import urllib.parse
+from unittest import mock
 
 import pandas as pd
 import numpy as np
 
 from parlpy.bills.bill_list_fetcher import BillsOverview
+import parlpy.bills.bill_list_fetcher as blf
+from parlpy.utils.state_store import InMemoryStateStore, LocalFileStateStore
 
 import unittest
 
 
+# build the html of a listing page in the layout of bills.parliament.uk, with 20 cards per page, newest first
+def make_listing_page_html(n_bills, page, bills_per_page=20):
+    max_page = max(1, -(-n_bills // bills_per_page))
+    newest = datetime.datetime(2021, 9, 16, 18, 0)
+
+    cards = []
+    for i in range((page - 1) * bills_per_page, min(page * bills_per_page, n_bills)):
+        updated = newest - datetime.timedelta(hours=i)
+        title = f"Example Number {i} Bill [HL]" if i % 3 == 0 else f"Example Number {i} Act 2021"
+        cards.append(f"""
+        <div class="card card-clickable">
+            <div class="card-inner">
+                <a class="overlay-link" href="/bills/{1000 + i}"></a>
+                <div class="primary-info">{title}</div>
+                <div class="secondary-info">Sessions 2019-21, 2021-22</div>
+                <div class="indicators-left">Last updated: {updated.strftime('%d %B %Y at %H:%M')} BST
+                </div>
+            </div>
+        </div>""")
+
+    pagination = "".join(
+        f'<li><a href="?Session=35&amp;BillSortOrder=3&amp;page={p}">{p}</a></li>' for p in range(1, max_page + 1))
+
+    return f"""<html><body><div class="results">{"".join(cards)}</div>
+        <ul class="pagination">{pagination}</ul></body></html>""".encode()
+
+
+class FakeResponse():
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+# replacement for the transport serving a listing of n_bills bills, records the urls requested
+class FakeListingSite():
+    def __init__(self, n_bills, replacements=None):
+        self.n_bills = n_bills
+        # (old, new) pairs replaced in the html of every page
+        self.replacements = replacements or []
+        self.requested_urls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requested_urls.append(url)
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        page = int(query.get("page", ["1"])[0])
+
+        page_html = make_listing_page_html(self.n_bills, page)
+        for old, new in self.replacements:
+            page_html = page_html.replace(old, new)
+
+        return FakeResponse(page_html)
+
+
+class TestOverviewOffline(unittest.TestCase):
+    def test_concurrent_crawl_matches_serial(self):
+        site = FakeListingSite(n_bills=95)
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            serial_fetcher = BillsOverview(state_store=InMemoryStateStore())
+            serial_fetcher.update_all_bills_in_session(session_name="2019-21")
+
+            concurrent_fetcher = BillsOverview(state_store=InMemoryStateStore())
+            concurrent_fetcher.update_all_bills_in_session(session_name="2019-21", max_workers=4,
+                                                           requests_per_second=1000)
+
+        self.assertEqual(len(serial_fetcher.bills_overview_data.index), 95)
+        pd.testing.assert_frame_equal(serial_fetcher.bills_overview_data, concurrent_fetcher.bills_overview_data)
+
+    def test_crawl_builds_typed_columns(self):
+        site = FakeListingSite(n_bills=45)
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            fetcher = BillsOverview(state_store=InMemoryStateStore())
+            fetcher.update_all_bills_in_session(session_name="2019-21")
+
+        data = fetcher.bills_overview_data
+        self.assertTrue(data.last_updated.dtype == np.dtype('datetime64[ns]'))
+        self.assertIsInstance(data.originating_house.dtype, pd.CategoricalDtype)
+        self.assertIsInstance(data.session.dtype, pd.CategoricalDtype)
+        self.assertEqual(list(data.index), list(range(45)))
+        self.assertEqual(data.iloc[0]["originating_house"], BillsOverview.OriginatingHouse.HOUSE_OF_LORDS)
+        self.assertEqual(data.iloc[0]["session"], ("2019-21", "2021-22"))
+
+    def test_non_standard_title_skips_whole_card(self):
+        site = FakeListingSite(n_bills=20, replacements=[(b"Example Number 1 Act 2021", b"Example Number 1 Order")])
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            fetcher = BillsOverview(state_store=InMemoryStateStore())
+            fetcher.update_all_bills_in_session(session_name="2019-21")
+
+        data = fetcher.bills_overview_data
+        self.assertEqual(len(data.index), 19)
+        self.assertEqual(data.iloc[1]["bill_title_stripped"], "Example Number 2")
+        self.assertEqual(data.iloc[1]["bill_detail_path"], "/bills/1002")
+        self.assertEqual(data.iloc[1]["last_updated"], datetime.datetime(2021, 9, 16, 16, 0))
+
+    def test_full_crawl_fetches_each_page_once(self):
+        site = FakeListingSite(n_bills=95)
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            BillsOverview(state_store=InMemoryStateStore()).update_all_bills_in_session(session_name="2019-21")
+
+        self.assertEqual(len(site.requested_urls), 5)
+
+    def test_changed_bills_on_first_page_need_one_request(self):
+        site = FakeListingSite(n_bills=95)
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            fetcher = BillsOverview(state_store=InMemoryStateStore())
+            fetcher.mock_datetime_last_scraped(datetime.datetime(2021, 9, 16, 12, 30))
+            fetcher.get_changed_bills_in_session(session_name="2019-21")
+
+        self.assertEqual(len(site.requested_urls), 1)
+        self.assertEqual(len(fetcher.bills_overview_data.index), 6)
+
+    def test_changed_bills_on_first_page_need_one_request_when_concurrent(self):
+        site = FakeListingSite(n_bills=95)
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            fetcher = BillsOverview(state_store=InMemoryStateStore())
+            fetcher.mock_datetime_last_scraped(datetime.datetime(2021, 9, 16, 12, 30))
+            fetcher.get_changed_bills_in_session(session_name="2019-21", max_workers=4, requests_per_second=1000)
+
+        self.assertEqual(len(site.requested_urls), 1)
+        self.assertEqual(len(fetcher.bills_overview_data.index), 6)
+
+    def test_datetime_last_scraped_kept_per_session(self):
+        site = FakeListingSite(n_bills=95)
+        fetcher = BillsOverview(state_store=InMemoryStateStore())
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            fetcher.mock_datetime_last_scraped(datetime.datetime(2021, 9, 16, 12, 30))
+            fetcher.mock_datetime_last_scraped(datetime.datetime(2021, 9, 16, 15, 30), session_name="2021-22")
+
+            fetcher.get_changed_bills_in_session(session_name="2021-22")
+            self.assertEqual(len(fetcher.bills_overview_data.index), 3)
+
+            # falls back on the datetime shared by every session
+            fetcher.get_changed_bills_in_session(session_name="2019-21")
+            self.assertEqual(len(fetcher.bills_overview_data.index), 6)
+
+            # both sessions were just scraped
+            fetcher.get_changed_bills_in_session(session_name="2021-22")
+            self.assertEqual(len(fetcher.bills_overview_data.index), 0)
+
+            fetcher.reset_datetime_last_scraped(session_name="2021-22")
+            fetcher.get_changed_bills_in_session(session_name="2021-22")
+            self.assertEqual(len(fetcher.bills_overview_data.index), 95)
+
+    def test_state_store_accepts_old_single_datetime_pickle(self):
+        site = FakeListingSite(n_bills=95)
+        store = InMemoryStateStore()
+        store.save(datetime.datetime(2021, 9, 16, 12, 30))
+
+        with mock.patch.object(blf, "default_transport", lambda pool_maxsize=None: site):
+            fetcher = BillsOverview(state_store=store)
+            fetcher.get_changed_bills_in_session(session_name="2019-21")
+
+        self.assertEqual(len(fetcher.bills_overview_data.index), 6)
+
+    def test_details_checkpoint_kept_locally(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.p")
+            checkpoint = BillsOverview(state_store=InMemoryStateStore()).make_details_checkpoint(path, save_every=1)
+            self.assertIsInstance(checkpoint.store, LocalFileStateStore)
+
+            checkpoint.mark_done("/bills/1000", datetime.datetime(2021, 9, 16, 18))
+            resumed = BillsOverview(state_store=InMemoryStateStore()).make_details_checkpoint(path)
+            self.assertTrue(resumed.is_done("/bills/1000", datetime.datetime(2021, 9, 16, 18)))
+            self.assertFalse(resumed.is_done("/bills/1000", datetime.datetime(2021, 9, 17)))
+
+
 class TestOverview(unittest.TestCase):
     # create BillsOverview object ready for tests
     # also print result
@@ -1,7 +1,110 @@
 import unittest
 import datetime
+import json
+from unittest import mock
 
 import parlpy.bills.bill_votes_fetcher as bvf
+from parlpy.bills.division_store import DivisionStore
+from parlpy.utils.rate_limit import RateLimiter
+
+
+class FakeResponse():
+    def __init__(self, obj):
+        self.text = json.dumps(obj)
+        self.status_code = 200
+
+
+# stand in for the Commons Votes API, holding divisions as {id: (title, ayes, noes)}
+class FakeVotesAPI():
+    def __init__(self, divisions):
+        self.divisions = divisions
+        self.fetched_ids = []
+
+    def fetch_votes(self, bill_title_stripped, start_datetime, end_datetime=None, **kwargs):
+        return FakeResponse([{"DivisionId": i, "Title": title} for i, (title, _, _) in self.divisions.items()])
+
+    def fetch_division_values(self, division_id, **kwargs):
+        self.fetched_ids.append(division_id)
+        title, ayes, noes = self.divisions[division_id]
+        return FakeResponse({"DivisionId": division_id, "Title": title,
+                             "Ayes": [{"MemberId": m} for m in ayes], "Noes": [{"MemberId": m} for m in noes]})
+
+    def patch(self, test_case):
+        for name in ("fetch_votes", "fetch_division_values"):
+            patcher = mock.patch.object(bvf, name, getattr(self, name))
+            patcher.start()
+            test_case.addCleanup(patcher.stop)
+
+
+def division_summary(divisions_list):
+    return [(d.division_name, d.division_stage, list(d.ayes), list(d.noes)) for d in divisions_list]
+
+
+class TestVotesOffline(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeVotesAPI({
+            101: ("Finance Bill: Second Reading", [1, 2, 3], [4]),
+            102: ("Finance Bill: Amendment 7", [1], [2, 3, 4]),
+            103: ("Public Finances Motion", [5], [6]),
+            104: ("Finance (No. 2) Bill: Third Reading", [1, 2], []),
+        })
+        self.api.patch(self)
+
+    def test_concurrent_fetch_matches_serial(self):
+        start = datetime.date(2019, 12, 9)
+
+        serial = bvf.get_divisions_information("Finance", start)
+        concurrent = bvf.get_divisions_information("Finance", start, max_workers=4, requests_per_second=1000)
+
+        self.assertEqual(division_summary(serial), division_summary(concurrent))
+        self.assertEqual([d.division_name for d in serial],
+                         ["Finance Bill: Second Reading", "Finance Bill: Amendment 7",
+                          "Finance (No. 2) Bill: Third Reading"])
+
+    def test_default_transport_pool_grown_to_workers(self):
+        with mock.patch.object(bvf, "default_transport") as default_transport:
+            bvf.get_divisions_information("Finance", datetime.date(2019, 12, 9), max_workers=20)
+
+        default_transport.assert_called_once_with(pool_maxsize=20)
+
+    def test_scoped_rate_limiter_leaves_host_limiter_alone(self):
+        start = datetime.date(2019, 12, 9)
+        limiter = RateLimiter(1000)
+
+        with mock.patch.object(bvf, "host_rate_limiter") as host_rate_limiter:
+            divisions_list = bvf.get_divisions_information("Finance", start, max_workers=4, requests_per_second=1,
+                                                           rate_limiter=limiter)
+
+        host_rate_limiter.assert_not_called()
+        self.assertEqual(len(divisions_list), 3)
+
+    def test_prefilter_skips_fetches_without_changing_output(self):
+        start = datetime.date(2019, 12, 9)
+
+        # the result of fetching every division, then filtering on the full title
+        expected = [bvf.get_division_values(i) for i in self.api.divisions]
+        expected = [d for d in expected if bvf.check_division_is_on_bill("Finance", d.division_name)]
+        self.api.fetched_ids = []
+
+        bvf.division_fetch_stats.reset()
+        divisions_list = bvf.get_divisions_information("Finance", start)
+
+        self.assertEqual(division_summary(divisions_list), division_summary(expected))
+        self.assertEqual(self.api.fetched_ids, [101, 102, 104])
+        self.assertEqual(bvf.division_fetch_stats.search_hits, 4)
+        self.assertEqual(bvf.division_fetch_stats.skipped_fetches, 1)
+
+    def test_division_store_avoids_refetching(self):
+        store = DivisionStore(":memory:")
+        start = datetime.date(2019, 12, 9)
+
+        first = bvf.get_divisions_information("Finance", start, division_store=store)
+        fetched_first_run = len(self.api.fetched_ids)
+        second = bvf.get_divisions_information("Finance", start, division_store=store)
+
+        self.assertEqual(division_summary(first), division_summary(second))
+        self.assertEqual(len(self.api.fetched_ids), fetched_first_run)
+        self.assertEqual(store.stats.fetches_avoided, fetched_first_run)
 
 
 
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from parlpy.bills.division_store import DivisionStore
+
+
+class TestDivisionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "divisions.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_get(self):
+        store = DivisionStore(self.path)
+        store.put(1234, "Finance Bill: Second Reading", [1, 2, 3], [4, 5])
+
+        self.assertEqual(store.get(1234), ("Finance Bill: Second Reading", [1, 2, 3], [4, 5]))
+        self.assertIsNone(store.get(999))
+        self.assertEqual(len(store), 1)
+        store.close()
+
+    def test_persists_between_objects(self):
+        store = DivisionStore(self.path)
+        store.put(1234, "Finance Bill: Second Reading", [1, 2, 3], [4, 5])
+        store.close()
+
+        store = DivisionStore(self.path)
+        self.assertEqual(store.get(1234), ("Finance Bill: Second Reading", [1, 2, 3], [4, 5]))
+        self.assertEqual(store.get(1234), ("Finance Bill: Second Reading", [1, 2, 3], [4, 5]))
+
+        # the second lookup is answered from memory
+        self.assertEqual((store.stats.store_hits, store.stats.lru_hits, store.stats.misses), (1, 1, 0))
+        self.assertEqual(store.stats.fetches_avoided, 2)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
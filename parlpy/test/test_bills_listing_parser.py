@@ -0,0 +1,50 @@
+import os
+import datetime
+import unittest
+from unittest import mock
+
+import parlpy.bills.listing_parser as listing_parser
+
+LISTING_PAGE_PATH = os.path.join(os.path.dirname(__file__), "data", "bills_listing_page.html")
+
+
+class TestListingParser(unittest.TestCase):
+    def setUp(self):
+        with open(LISTING_PAGE_PATH, encoding="utf-8") as f:
+            self.page_html = f.read()
+
+    def test_cards_parsed(self):
+        cards = listing_parser.parse_cards(self.page_html, backend="html.parser")
+
+        self.assertEqual(len(cards), 20)
+        self.assertEqual(cards[0],
+                         ("Telecommunications (Security) Bill", "16 September 2021 at 18:00", "/bills/2900",
+                          ["2019-21", "2021-22"]))
+
+    def test_backends_agree(self):
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            self.skipTest("lxml not installed")
+
+        self.assertEqual(listing_parser.parse_cards(self.page_html, backend="lxml"),
+                         listing_parser.parse_cards(self.page_html, backend="html.parser"))
+
+    def test_lxml_backend_without_lxml(self):
+        with mock.patch.object(listing_parser, "lxml", None):
+            with self.assertRaises(ImportError):
+                listing_parser.parse_cards(self.page_html, backend="lxml")
+
+    def test_count_pages(self):
+        self.assertEqual(listing_parser.count_pages(self.page_html), 7)
+        self.assertEqual(listing_parser.count_pages("<html><body></body></html>"), 1)
+
+    def test_parse_updated_dates(self):
+        dates = listing_parser.parse_updated_dates(["16 September 2021 at 18:00", "01 March 2016 at 09:05"])
+
+        self.assertEqual(list(dates), [datetime.datetime(2021, 9, 16, 18, 0), datetime.datetime(2016, 3, 1, 9, 5)])
+        self.assertEqual(len(listing_parser.parse_updated_dates([])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import pickle
+import unittest
+
+import numpy as np
+
+from parlpy.bills.bill_votes_fetcher import DivisionInformation
+from parlpy.bills.member_ids import MemberIds
+
+
+class TestMemberIds(unittest.TestCase):
+    def test_list_like_access(self):
+        ids = MemberIds([4, 8, 15, 16, 23, 42])
+
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(ids[1], 8)
+        self.assertIsInstance(ids[1], int)
+        self.assertEqual(ids[-1], 42)
+        self.assertEqual(ids[1:3], [8, 15])
+        self.assertEqual(list(ids), [4, 8, 15, 16, 23, 42])
+        self.assertIn(23, ids)
+        self.assertNotIn(24, ids)
+        self.assertEqual(ids.index(15), 2)
+        self.assertEqual(ids, [4, 8, 15, 16, 23, 42])
+        self.assertNotEqual(ids, [4, 8])
+        self.assertEqual(repr(ids), "[4, 8, 15, 16, 23, 42]")
+
+    def test_read_only(self):
+        ids = MemberIds([1, 2])
+
+        with self.assertRaises(TypeError):
+            ids[0] = 3
+        with self.assertRaises(ValueError):
+            ids.to_numpy()[0] = 3
+
+    def test_frombuffer_shares_memory(self):
+        data = bytearray(MemberIds([1, 2, 3]).tobytes())
+        ids = MemberIds.frombuffer(data)
+
+        self.assertEqual(ids, [1, 2, 3])
+        data[:4] = MemberIds([7]).tobytes()
+        self.assertEqual(ids[0], 7)
+
+    def test_pickle_protocol_5_out_of_band_without_copying(self):
+        division = DivisionInformation("Finance Bill: Second Reading", "Second Reading", range(600), range(600, 900))
+
+        buffers = []
+        data = pickle.dumps(division, protocol=5, buffer_callback=buffers.append)
+        self.assertEqual(len(buffers), 2)
+        self.assertTrue(np.shares_memory(np.asarray(buffers[0].raw()), division.ayes.to_numpy()))
+
+        loaded = pickle.loads(data, buffers=buffers)
+        self.assertEqual(loaded.division_name, "Finance Bill: Second Reading")
+        self.assertEqual(loaded.ayes, list(range(600)))
+        self.assertEqual(loaded.noes, list(range(600, 900)))
+        self.assertTrue(np.shares_memory(loaded.ayes.to_numpy(), division.ayes.to_numpy()))
+
+    def test_division_information_uses_slots(self):
+        division = DivisionInformation()
+
+        self.assertFalse(hasattr(division, "__dict__"))
+        self.assertEqual(division.ayes, [])
+        self.assertEqual(pickle.loads(pickle.dumps(division)).noes, [])
+
+        division.ayes = [3, 4]
+        self.assertIsInstance(division.ayes, MemberIds)
+        self.assertIs(division.ayes, division.ayes)
+        self.assertEqual(division.ayes, [3, 4])
+
+    def test_division_ids_used_as_lists(self):
+        division = DivisionInformation("Finance Bill: Second Reading", "Second Reading", [1, 2], (3,))
+
+        self.assertEqual(division.ayes + division.noes, [1, 2, 3])
+        self.assertEqual([0] + division.ayes, [0, 1, 2])
+
+        division.ayes += [4]
+        self.assertIsInstance(division.ayes, MemberIds)
+        self.assertEqual(division.ayes, [1, 2, 4])
+
+        self.assertEqual(json.loads(json.dumps({"ayes": division.ayes.tolist(), "noes": division.noes.tolist()})),
+                         {"ayes": [1, 2, 4], "noes": [3]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import datetime
+import tempfile
+import unittest
+from unittest import mock
+
+import parlpy.bills.summary_fetcher as sf
+from parlpy.bills.summary_cache import SummaryCache
+
+
+class TestCachedSummaries(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.scraped = []
+
+        def fake_get_summary(detail_path, **kwargs):
+            self.scraped.append(detail_path)
+            return f"summary {len(self.scraped)} of {detail_path}"
+
+        patcher = mock.patch.object(sf, "get_summary", fake_get_summary)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_summary_reused_until_bill_updated(self):
+        cache = SummaryCache(self.tmp.name)
+        updated = datetime.datetime(2021, 9, 16, 18)
+
+        self.assertEqual(cache.get_summary("/bills/1000", updated), "summary 1 of /bills/1000")
+        self.assertEqual(cache.get_summary("/bills/1000", updated), "summary 1 of /bills/1000")
+        self.assertEqual(cache.get_summary("/bills/1000", updated - datetime.timedelta(days=1)),
+                         "summary 1 of /bills/1000")
+        self.assertEqual(self.scraped, ["/bills/1000"])
+
+        # the listing shows a newer update, so the summary is scraped again and replaces the one kept
+        self.assertEqual(cache.get_summary("/bills/1000", updated + datetime.timedelta(hours=1)),
+                         "summary 2 of /bills/1000")
+        self.assertEqual(len(cache), 1)
+
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (2, 2))
+        self.assertEqual(cache.stats.hit_rate, 0.5)
+
+    def test_summaries_outlive_cache(self):
+        updated = datetime.datetime(2021, 9, 16, 18)
+        SummaryCache(self.tmp.name).get_summary("/bills/1000", updated)
+
+        cache = SummaryCache(self.tmp.name)
+        self.assertEqual(cache.get("/bills/1000", updated), "summary 1 of /bills/1000")
+        self.assertIsNone(cache.get("/bills/1001", updated))
+
+    def test_evicted_beyond_max_bytes(self):
+        cache = SummaryCache(self.tmp.name, max_bytes=1000)
+        updated = datetime.datetime(2021, 9, 16, 18)
+        for i in range(50):
+            cache.set(f"/bills/{i}", updated, "x" * 100)
+
+        self.assertLess(len(cache), 50)
+        self.assertIsNone(cache.get("/bills/0", updated))
+        self.assertEqual(cache.get("/bills/49", updated), "x" * 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
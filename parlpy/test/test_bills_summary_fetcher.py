@@ -2,12 +2,93 @@
 Alex Dawkins (alexander.dawkins@gmail.com) 2021
 Robert Chambers 2021
 """
+import threading
+import time
 import unittest
+import unittest.mock
 
 from parlpy.bills.bill_list_fetcher import BillsOverview
 from parlpy.bills import summary_fetcher
 import pandas as pd
 
+
+# a bill's details page, with a block-page class outside the summary block and a charset declared in the head
+DETAIL_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title} - Parliamentary Bills</title></head>
+<body><nav class="block">{nav}</nav>
+<div class="block block-page"><h2>Summary of the {title}</h2>
+<div class="text-break">
+\tA Bill to make provision about {title} \u2013 and connected purposes.</div></div>
+<footer class="block block-footer">footer</footer></body></html>"""
+
+
+class FakeResponse():
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+# stand in transport serving a details page per bill, the later bills answering first
+class FakeBillsSite():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requested_urls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        bill_number = int(url.rsplit("/", 1)[-1])
+        with self.lock:
+            self.requested_urls.append(url)
+        time.sleep(0.02 * (5 - bill_number % 5))
+        return FakeResponse(DETAIL_PAGE.format(title=f"Bill {bill_number}", nav="x" * 10000).encode("utf-8"))
+
+
+class FakeOverview():
+    def __init__(self, n_bills):
+        self.bills_overview_data = pd.DataFrame({
+            "bill_title_stripped": [f"Bill {i}" for i in range(n_bills)],
+            "bill_detail_path": [f"/bills/{i}" for i in range(n_bills)],
+        }, index=range(100, 100 + n_bills))
+        self.http_cache = None
+        self.transport = FakeBillsSite()
+
+
+class TestSummaryOffline(unittest.TestCase):
+    def test_get_summary(self):
+        summary = summary_fetcher.get_summary("/bills/7", transport=FakeBillsSite())
+
+        self.assertEqual(summary, "A Bill to make provision about Bill 7 \u2013 and connected purposes.")
+
+    def test_append_summaries_concurrently_in_order(self):
+        serial = FakeOverview(10)
+        summary_fetcher.append_summaries(serial)
+
+        overview = FakeOverview(10)
+        df = summary_fetcher.append_summaries(overview, max_workers=5)
+
+        pd.testing.assert_frame_equal(df, serial.bills_overview_data)
+        self.assertEqual(df.loc[103, "bill_summary"],
+                         "A Bill to make provision about Bill 3 \u2013 and connected purposes.")
+        self.assertEqual(len(overview.transport.requested_urls), 10)
+
+    def test_default_transport_pool_grown_to_workers(self):
+        site = FakeBillsSite()
+        with unittest.mock.patch.object(summary_fetcher, "default_transport", return_value=site) as default_transport:
+            summaries = summary_fetcher.get_summaries([f"/bills/{i}" for i in range(4)], max_workers=20)
+
+        default_transport.assert_any_call(pool_maxsize=20)
+        self.assertEqual(len(summaries), 4)
+
+    def test_append_summary(self):
+        row = FakeOverview(1).bills_overview_data.iloc[0]
+        with unittest.mock.patch.object(summary_fetcher, "default_transport", FakeBillsSite):
+            row = summary_fetcher.append_summary(row)
+
+        self.assertEqual(row["bill_detail_path"], "/bills/0")
+        self.assertEqual(row["bill_summary"], "A Bill to make provision about Bill 0 \u2013 and connected purposes.")
+
+
 class TestSummary(unittest.TestCase):
     def test_get_summary_of_single_bill_2005_06_session(self):
         overview = BillsOverview()
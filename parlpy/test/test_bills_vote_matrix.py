@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+
+from parlpy.bills.bill_votes_fetcher import DivisionInformation
+from parlpy.bills import vote_matrix
+from parlpy.bills.vote_matrix import VoteMatrix
+
+
+def make_divisions():
+    return [
+        DivisionInformation("Finance Bill: Second Reading", "Second Reading", [1, 2, 3], [4, 5], division_id=101),
+        DivisionInformation("Finance Bill: Amendment 7", "Amendments", [1, 4], [2, 5], division_id=102),
+        DivisionInformation("Finance Bill: Third Reading", "Third Reading", [1, 2, 6], [], division_id=103),
+    ]
+
+
+# party of each member, 6 has none
+PARTIES = {1: "A", 2: "A", 3: "A", 4: "B", 5: "B"}
+
+
+class TestVoteMatrix(unittest.TestCase):
+    def setUp(self):
+        self.matrix = VoteMatrix(make_divisions())
+
+    def test_dense_matrix_and_index_maps(self):
+        self.assertEqual(self.matrix.shape, (6, 3))
+        self.assertEqual(self.matrix.nnz, 12)
+        self.assertEqual(self.matrix.division_ids, [101, 102, 103])
+
+        dense = self.matrix.to_dense()
+        row = self.matrix.member_index(5)
+        self.assertEqual(list(dense[row]), [-1, -1, 0])
+        self.assertEqual(dense[self.matrix.member_index(4), self.matrix.division_index(102)], 1)
+
+    def test_incremental_build_matches_full_build(self):
+        divisions = make_divisions()
+        matrix = VoteMatrix(divisions[:1])
+        matrix.to_dense()
+        self.assertEqual(matrix.add_divisions(divisions), 2)
+
+        np.testing.assert_array_equal(matrix.to_dense(), self.matrix.to_dense())
+        self.assertEqual(matrix.member_ids, self.matrix.member_ids)
+
+    def test_division_without_id_rejected(self):
+        with self.assertRaises(ValueError):
+            self.matrix.add_division(DivisionInformation("Finance Bill", "Amendments", [1], [2]))
+
+    def test_division_totals_and_turnout(self):
+        totals = self.matrix.division_totals()
+        self.assertEqual(totals.loc[101].tolist(), [3, 2])
+        self.assertEqual(totals.loc[103].tolist(), [3, 0])
+
+        self.assertEqual(self.matrix.turnout().to_dict(), {1: 3, 2: 3, 3: 1, 4: 2, 5: 2, 6: 1})
+
+    def test_party_cohesion(self):
+        cohesion = self.matrix.party_cohesion(PARTIES)
+
+        self.assertEqual(cohesion.loc[101, "A"], 1.0)
+        self.assertEqual(cohesion.loc[102, "A"], 0.0)
+        self.assertEqual(cohesion.loc[102, "B"], 0.0)
+        self.assertTrue(np.isnan(cohesion.loc[103, "B"]))
+
+    def test_rebellion_rates(self):
+        rates = self.matrix.rebellion_rates(PARTIES)
+
+        # party A: 3 ayes then a tie then 2 ayes, so nobody rebels; party B: all noes, then a tie
+        self.assertEqual(rates[1], 0.0)
+        self.assertEqual(rates[4], 0.0)
+        self.assertTrue(np.isnan(rates[6]))
+
+        self.matrix.add_division(DivisionInformation("Finance Bill: Amendment 9", "Amendments", [1, 2], [3],
+                                                     division_id=104))
+        self.assertAlmostEqual(self.matrix.rebellion_rates(PARTIES)[3], 0.5)
+
+    def test_similarity(self):
+        similarity = self.matrix.similarity()
+
+        self.assertEqual(similarity.loc[1, 1], 1.0)
+        self.assertEqual(similarity.loc[4, 5], 0.0)
+        self.assertEqual(similarity.loc[1, 5], -1.0)
+        self.assertTrue(np.isnan(similarity.loc[3, 6]))
+        self.assertTrue(np.isnan(self.matrix.similarity(min_shared=2).loc[1, 6]))
+
+    @unittest.skipIf(vote_matrix.scipy is None, "scipy not installed")
+    def test_sparse_matches_dense(self):
+        np.testing.assert_array_equal(self.matrix.to_sparse().toarray(), self.matrix.to_dense())
+
+
+if __name__ == "__main__":
+    unittest.main()
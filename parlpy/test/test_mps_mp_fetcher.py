@@ -1,10 +1,18 @@
+import copy
 import json
+import os
+import urllib.parse
+
+import numpy as np
 import pandas as pd
 
 from parlpy.mps.mp_fetcher import MPOverview
+from parlpy.utils.state_store import InMemoryStateStore
 
 import unittest
 
+MEMBERS_SEARCH_PAGE_PATH = os.path.join(os.path.dirname(__file__), "data", "members_search_page.json")
+
 
 def jprint(obj):
     # create a formatted string of the Python JSON object
@@ -12,6 +20,245 @@ def jprint(obj):
     print(text)
 
 
+class FakeResponse():
+    def __init__(self, obj, status_code=200, decodes=None):
+        self.obj = obj
+        self.status_code = status_code
+        # list that each call to json() is recorded in
+        self.decodes = decodes
+
+    def json(self):
+        if self.decodes is not None:
+            self.decodes.append(self)
+        return copy.deepcopy(self.obj)
+
+
+# stand in transport for the Members API, serving n_members members made by repeating the saved Members/Search page
+# with new ids, records the urls requested
+class FakeMembersAPI():
+    def __init__(self, n_members):
+        with open(MEMBERS_SEARCH_PAGE_PATH) as f:
+            page = json.load(f)
+
+        self.members = []
+        for i in range(n_members):
+            item = copy.deepcopy(page["items"][i % len(page["items"])])
+            item["value"]["id"] = 10000 + i
+            self.members.append(item)
+        self.requested_urls = []
+        self.search_decodes = []
+        # skip offsets of the search pages answered with a 503
+        self.failing_skips = set()
+        # totalResults given in each page, None for the number of members
+        self.reported_total = None
+        # member ids whose parliamentary contact has a null email
+        self.null_email_ids = set()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requested_urls.append(url)
+        path = urllib.parse.urlparse(url).path
+
+        if path.endswith("/Contact"):
+            member_id = path.split("/")[-2]
+            email = None if int(member_id) in self.null_email_ids else f"member.{member_id}@parliament.uk"
+            return FakeResponse({"value": [{"type": "Constituency", "email": None},
+                                           {"type": "Parliamentary", "email": email}]})
+
+        params = params or {}
+        skip = int(params.get("skip", 0))
+        take = int(params.get("take", 20))
+        if skip in self.failing_skips:
+            return FakeResponse({}, status_code=503)
+        total_results = self.reported_total or len(self.members)
+        return FakeResponse({"items": self.members[skip:skip + take], "totalResults": total_results,
+                             "skip": skip, "take": take}, decodes=self.search_decodes)
+
+    @property
+    def search_urls(self):
+        return [url for url in self.requested_urls if url.endswith("/Members/Search")]
+
+
+class TestMPOffline(unittest.TestCase):
+    def test_get_all_members_builds_typed_frame(self):
+        api = FakeMembersAPI(65)
+        fetcher = MPOverview(transport=api)
+        fetcher.get_all_members(params={"House": "Commons"})
+
+        data = fetcher.mp_overview_data
+        # every 20th member in the saved page has died, so is left out
+        self.assertEqual(len(data.index), 62)
+        self.assertEqual(list(data.columns), fetcher.columns)
+        self.assertEqual(data.member_id.dtype, np.dtype("int64"))
+        self.assertEqual(data.party_id.dtype, np.dtype("int64"))
+        self.assertEqual(data.current_member.dtype, np.dtype("bool"))
+        self.assertEqual(data.last_updated.dtype, np.dtype("datetime64[ns]"))
+        self.assertEqual(list(data.index), list(range(62)))
+
+        first = data.iloc[0]
+        self.assertEqual(first.member_id, 10000)
+        self.assertEqual(first.email, "member.10000@parliament.uk")
+        self.assertTrue(first.current_member)
+        self.assertEqual(data.set_index("member_id").loc[10004, "email"], "not_current_member")
+
+    def test_emails_fetched_concurrently_and_cached(self):
+        api = FakeMembersAPI(65)
+        serial = MPOverview(transport=FakeMembersAPI(65), contact_workers=1)
+        serial.get_all_members(params={"House": "Commons"}, only_get_current_members_emails=False)
+
+        fetcher = MPOverview(transport=api, contact_workers=4)
+        fetcher.get_all_members(params={"House": "Commons"}, only_get_current_members_emails=False)
+
+        pd.testing.assert_series_equal(fetcher.mp_overview_data.email, serial.mp_overview_data.email)
+        contact_urls = [url for url in api.requested_urls if url.endswith("/Contact")]
+        self.assertEqual(len(contact_urls), 62)
+
+        # the emails are all still cached
+        fetcher.get_all_members(params={"House": "Commons"}, only_get_current_members_emails=False)
+        self.assertEqual(len([url for url in api.requested_urls if url.endswith("/Contact")]), 62)
+
+    def test_null_emails_cached(self):
+        api = FakeMembersAPI(20)
+        api.null_email_ids = {10000, 10001}
+        fetcher = MPOverview(transport=api)
+        fetcher.get_all_members(params={"House": "Commons"})
+        fetcher.get_all_members(params={"House": "Commons"})
+
+        self.assertIsNone(fetcher.mp_overview_data.email.iloc[0])
+        self.assertEqual(len([url for url in api.requested_urls if url.endswith("/Contact")]), 16)
+
+    def test_expired_emails_fetched_again(self):
+        api = FakeMembersAPI(20)
+        fetcher = MPOverview(transport=api, email_ttl=0)
+        fetcher.get_all_members(params={"House": "Commons"})
+        fetcher.get_all_members(params={"House": "Commons"})
+
+        # 16 current members each time
+        self.assertEqual(len([url for url in api.requested_urls if url.endswith("/Contact")]), 32)
+
+    def test_parallel_pagination_matches_serial(self):
+        columns = [c for c in MPOverview().columns if c != "last_updated"]
+
+        serial = MPOverview(transport=FakeMembersAPI(95))
+        serial.get_all_members(params={"House": "Commons"})
+
+        api = FakeMembersAPI(95)
+        parallel = MPOverview(transport=api)
+        parallel.get_all_members(params={"House": "Commons"}, max_workers=4, requests_per_second=1000)
+
+        pd.testing.assert_frame_equal(parallel.mp_overview_data[columns], serial.mp_overview_data[columns])
+        # 5 pages, each response decoded once, and no request for an empty page past the total
+        self.assertEqual(len(api.search_urls), 5)
+        self.assertEqual(len(api.search_decodes), 5)
+        self.assertEqual(len(set(map(id, api.search_decodes))), 5)
+
+    def test_parallel_pagination_respects_limit(self):
+        for max_workers in (None, 4):
+            api = FakeMembersAPI(95)
+            fetcher = MPOverview(transport=api)
+            fetcher.get_all_members(params={"House": "Commons"}, limit=45, max_workers=max_workers)
+
+            # pages of 20 until the limit is met
+            self.assertEqual(len(api.search_urls), 3)
+            self.assertEqual(fetcher.mp_overview_data.member_id.tolist()[-1], 10058)
+
+    def test_iter_members_yields_as_pages_arrive(self):
+        api = FakeMembersAPI(95)
+        members = MPOverview(transport=api).iter_members(params={"House": "Commons"})
+
+        first = next(members)
+        self.assertEqual(len(api.search_urls), 1)
+        self.assertEqual(set(first), set(MPOverview().columns))
+        self.assertEqual((first["member_id"], first["email"]), (10000, "member.10000@parliament.uk"))
+
+        records = [first] + list(members)
+        self.assertEqual(len(api.search_urls), 5)
+
+        fetcher = MPOverview(transport=FakeMembersAPI(95))
+        fetcher.get_all_members(params={"House": "Commons"})
+        self.assertEqual([r["member_id"] for r in records], fetcher.mp_overview_data.member_id.tolist())
+
+    def test_get_active_mps_only_gets_current_members_emails(self):
+        api = FakeMembersAPI(20)
+        fetcher = MPOverview(transport=api)
+        fetcher.get_active_MPs()
+
+        self.assertEqual(len([url for url in api.requested_urls if url.endswith("/Contact")]), 16)
+        self.assertEqual(fetcher.mp_overview_data.set_index("member_id").loc[10004, "email"], "not_current_member")
+
+    def test_members_added_to_earlier_fetches(self):
+        fetcher = MPOverview(transport=FakeMembersAPI(30))
+        fetcher.get_all_members(params={"House": "Commons"})
+        fetcher.get_all_members(params={"House": "Commons"})
+
+        self.assertEqual(len(fetcher.mp_overview_data.index), 58)
+        self.assertEqual(fetcher.mp_overview_data.member_id.dtype, np.dtype("int64"))
+
+
+    def test_sync_members_only_fetches_what_changed(self):
+        api = FakeMembersAPI(30)
+        store = InMemoryStateStore()
+        fetcher = MPOverview(transport=api, member_index_store=store)
+
+        # 29 living members, 24 of them current
+        report = fetcher.sync_members(params={"House": "Commons"})
+        self.assertEqual(len(report.added), 29)
+        self.assertEqual(report.contacts_fetched, 24)
+        self.assertEqual(len(fetcher.mp_overview_data.index), 29)
+
+        report = fetcher.sync_members(params={"House": "Commons"})
+        self.assertEqual((report.added, report.removed, report.changed), ([], [], []))
+        self.assertEqual(report.unchanged, 29)
+        self.assertEqual(report.contacts_fetched, 0)
+
+        api.members[3]["value"]["latestParty"]["id"] = 999
+        del api.members[5]
+        report = fetcher.sync_members(params={"House": "Commons"})
+        self.assertEqual(report.changed, [10003])
+        self.assertEqual(report.removed, [10005])
+        self.assertEqual(report.contacts_fetched, 1)
+        self.assertEqual(fetcher.mp_overview_data.set_index("member_id").loc[10003, "party_id"], 999)
+        self.assertEqual(len([url for url in api.requested_urls if url.endswith("/Contact")]), 25)
+
+    def test_sync_members_incomplete_listing_removes_nothing(self):
+        api = FakeMembersAPI(95)
+        store = InMemoryStateStore()
+        fetcher = MPOverview(transport=api, member_index_store=store)
+        fetcher.sync_members(params={"House": "Commons"})
+        synced = fetcher.mp_overview_data
+
+        for max_workers in (None, 4):
+            api.failing_skips = {40}
+            report = fetcher.sync_members(params={"House": "Commons"}, max_workers=max_workers)
+            self.assertFalse(report.complete)
+            self.assertEqual(report.removed, [])
+            self.assertEqual(report.contacts_fetched, 0)
+            self.assertIs(fetcher.mp_overview_data, synced)
+            self.assertEqual(len(store.load()), 91)
+
+        # fewer members listed than the total reported
+        api.failing_skips = set()
+        del api.members[80:]
+        api.reported_total = 95
+        self.assertFalse(fetcher.sync_members(params={"House": "Commons"}).complete)
+        self.assertEqual(len(store.load()), 91)
+
+    def test_sync_members_index_persists_between_objects(self):
+        api = FakeMembersAPI(30)
+        store = InMemoryStateStore()
+        MPOverview(transport=api, member_index_store=store).sync_members(params={"House": "Commons"})
+
+        fetcher = MPOverview(transport=api, member_index_store=store)
+        report = fetcher.sync_members(params={"House": "Commons"})
+        self.assertEqual(report.contacts_fetched, 0)
+        self.assertEqual(fetcher.mp_overview_data.set_index("member_id").loc[10000, "email"],
+                         "member.10000@parliament.uk")
+
+        # emails past their ttl are fetched again
+        report = MPOverview(transport=api, member_index_store=store, email_ttl=0).sync_members(
+            params={"House": "Commons"})
+        self.assertEqual(report.contacts_fetched, 24)
+        self.assertEqual(report.changed, [])
+
 class TestMP(unittest.TestCase):
     def test_get_active_mps(self):
         current_mp_fetcher = MPOverview()
@@ -1,6 +1,91 @@
-import parlpy.mps.parties_fetcher as pf
+import json
+import threading
 import unittest
 
+import pandas as pd
+
+import parlpy.mps.parties_fetcher as pf
+
+
+class FakeResponse():
+    def __init__(self, obj):
+        self.text = json.dumps(obj)
+
+
+# stand in transport for Parties/GetActive, records the houses requested
+class FakePartiesAPI():
+    parties = {
+        "Commons": [(15, "Labour", "Lab"), (8, "Conservative", "Con"), (17, "Liberal Democrat", "LD")],
+        "Lords": [(15, "Labour", "Lab"), (6, "Crossbench", "XB"), (3, "Bishops", "Bp")],
+    }
+
+    def __init__(self):
+        self.requested_houses = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        house = url.rsplit("/", 1)[-1]
+        with self.lock:
+            self.requested_houses.append(house)
+        return FakeResponse({"items": [{"value": {"id": i, "name": n, "abbreviation": a}}
+                                       for (i, n, a) in self.parties[house]]})
+
+
+class TestPartiesOffline(unittest.TestCase):
+    def test_get_all_parties(self):
+        parties_list = pf.get_all_parties(FakePartiesAPI(), house="Lords")
+
+        self.assertEqual([p.party_id for p in parties_list], [15, 6, 3])
+        self.assertEqual(parties_list[1].party_abbreviation, "XB")
+
+    def test_registry_fetches_once_until_expired(self):
+        api = FakePartiesAPI()
+        registry = pf.PartyRegistry(transport=api)
+
+        self.assertEqual(registry.name(15), "Labour")
+        self.assertEqual(registry.abbreviation(8), "Con")
+        self.assertIsNone(registry.name(6))
+        self.assertEqual(len(registry), 3)
+        self.assertEqual(api.requested_houses, ["Commons"])
+
+        registry.refresh()
+        self.assertEqual(api.requested_houses, ["Commons", "Commons"])
+
+        expiring = pf.PartyRegistry(transport=api, ttl=0)
+        expiring.name(15)
+        expiring.name(15)
+        self.assertEqual(len(api.requested_houses), 4)
+
+    def test_registry_fetches_once_between_threads(self):
+        api = FakePartiesAPI()
+        registry = pf.PartyRegistry(transport=api)
+
+        threads = [threading.Thread(target=registry.get, args=(15,)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(api.requested_houses, ["Commons"])
+
+    def test_registry_with_lords(self):
+        api = FakePartiesAPI()
+        registry = pf.PartyRegistry(transport=api, include_lords=True)
+
+        self.assertEqual(registry.name(6), "Crossbench")
+        self.assertEqual(sorted(p.party_id for p in registry.parties()), [3, 6, 8, 15, 17])
+        self.assertEqual(api.requested_houses, ["Commons", "Lords"])
+
+    def test_enrich(self):
+        registry = pf.PartyRegistry(transport=FakePartiesAPI())
+        data = pd.DataFrame({"member_id": [1, 2, 3, 4], "party_id": [8, 15, 999, 8]})
+
+        enriched = registry.enrich(data)
+        self.assertEqual(enriched["party_name"].tolist(), ["Conservative", "Labour", None, "Conservative"])
+        self.assertEqual(enriched["party_abbreviation"].tolist(), ["Con", "Lab", None, "Con"])
+        self.assertNotIn("party_name", data.columns)
+
+
 class TestParties(unittest.TestCase):
     def test_get_all_parties(self):
         parties_list = pf.get_all_parties()
@@ -11,4 +96,4 @@ class TestParties(unittest.TestCase):
             print(type(p.party_id))
 
             if p.party_name == "Labour":
-                self.assertTrue(p.party_id == 15)
\ No newline at end of file
+                self.assertTrue(p.party_id == 15)
@@ -0,0 +1,144 @@
+import tempfile
+import threading
+import time
+import unittest
+
+import requests
+
+from parlpy.utils import constituency
+from parlpy.utils.constituency import ConstituencyResolver, normalize_post_code
+from parlpy.utils.disk_cache import DiskCache
+
+
+class FakeResponse():
+    def __init__(self, obj, status_code=200):
+        self.obj = obj
+        self.status_code = status_code
+
+    def json(self):
+        return self.obj
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+# stand in transport for Location/Constituency/Search, knowing the constituencies of two post codes and one outward code
+class FakeConstituencyAPI():
+    constituencies = {
+        "BA2 7AY": [{"id": 3899, "name": "Bath"}],
+        "SW1A 0AA": [{"id": 3972, "name": "Cities of London and Westminster"}],
+        "BA2": [{"id": 3899, "name": "Bath"}, {"id": 4053, "name": "North East Somerset"}],
+    }
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.searches = []
+        self.lock = threading.Lock()
+        # post codes answered with a 503, as when the API is overloaded
+        self.failing = set()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        with self.lock:
+            self.searches.append(params["searchText"])
+        time.sleep(self.delay)
+        if params["searchText"] in self.failing:
+            return FakeResponse({"message": "Service Unavailable"}, status_code=503)
+        return FakeResponse({"items": [{"value": c} for c in self.constituencies.get(params["searchText"], [])]})
+
+
+class TestConstituency(unittest.TestCase):
+    def test_normalize_post_code(self):
+        self.assertEqual(normalize_post_code(" ba2  7ay"), "BA2 7AY")
+        self.assertEqual(normalize_post_code("sw1a0aa"), "SW1A 0AA")
+        self.assertEqual(normalize_post_code("ba2 "), "BA2")
+        self.assertEqual(normalize_post_code("  "), "")
+
+    def test_resolve_many_dedupes_and_caches(self):
+        api = FakeConstituencyAPI()
+        resolver = ConstituencyResolver(transport=api)
+
+        results = resolver.resolve_many(["BA2 7AY", "ba27ay", "SW1A 0AA", "BA2", "ZZ1 1ZZ", ""])
+        self.assertEqual(results["ba27ay"], [{"id": 3899, "name": "Bath"}])
+        self.assertEqual(len(results["BA2"]), 2)
+        self.assertEqual(results["ZZ1 1ZZ"], [])
+        self.assertEqual(results[""], [])
+        self.assertEqual(sorted(api.searches), ["BA2", "BA2 7AY", "SW1A 0AA", "ZZ1 1ZZ"])
+
+        # found and not found post codes are both cached
+        self.assertEqual(resolver.resolve("zz11zz"), [])
+        self.assertEqual(resolver.resolve("sw1a 0aa")[0]["id"], 3972)
+        self.assertEqual(len(api.searches), 4)
+
+    def test_negative_results_expire(self):
+        api = FakeConstituencyAPI()
+        resolver = ConstituencyResolver(transport=api, negative_ttl=0)
+
+        resolver.resolve("ZZ1 1ZZ")
+        resolver.resolve("ZZ1 1ZZ")
+        resolver.resolve("BA2 7AY")
+        resolver.resolve("BA2 7AY")
+        self.assertEqual(api.searches, ["ZZ1 1ZZ", "ZZ1 1ZZ", "BA2 7AY"])
+
+    def test_disk_cache_outlives_resolver(self):
+        with tempfile.TemporaryDirectory() as directory:
+            api = FakeConstituencyAPI()
+            ConstituencyResolver(transport=api, disk_cache=DiskCache(directory)).resolve_many(["BA2 7AY", "ZZ1 1ZZ"])
+
+            resolver = ConstituencyResolver(transport=api, disk_cache=DiskCache(directory))
+            self.assertEqual(resolver.resolve("ba2 7ay")[0]["name"], "Bath")
+            self.assertEqual(resolver.resolve("ZZ1 1ZZ"), [])
+            self.assertEqual(len(api.searches), 2)
+
+    def test_concurrent_lookups_of_one_post_code_make_one_request(self):
+        api = FakeConstituencyAPI(delay=0.05)
+        resolver = ConstituencyResolver(transport=api)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve("BA2 7AY"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(api.searches, ["BA2 7AY"])
+        self.assertEqual(len(results), 8)
+
+    def test_failed_lookups_not_cached(self):
+        api = FakeConstituencyAPI()
+        api.failing.add("BA2 7AY")
+        resolver = ConstituencyResolver(transport=api)
+
+        with self.assertRaises(requests.HTTPError):
+            resolver.resolve("BA2 7AY")
+
+        api.failing.clear()
+        self.assertEqual(resolver.resolve("BA2 7AY")[0]["name"], "Bath")
+        self.assertEqual(api.searches, ["BA2 7AY", "BA2 7AY"])
+
+    def test_resolve_many_keeps_results_of_other_post_codes(self):
+        api = FakeConstituencyAPI()
+        api.failing.add("SW1A 0AA")
+        resolver = ConstituencyResolver(transport=api)
+
+        errors = {}
+        results = resolver.resolve_many(["BA2 7AY", "sw1a0aa", "ZZ1 1ZZ"], errors=errors)
+        self.assertEqual(sorted(results), ["BA2 7AY", "ZZ1 1ZZ"])
+        self.assertEqual(list(errors), ["sw1a0aa"])
+        self.assertIsInstance(errors["sw1a0aa"], requests.HTTPError)
+
+        # without errors the failure is raised, but the other post codes were cached and are not fetched again
+        with self.assertRaises(requests.HTTPError):
+            resolver.resolve_many(["BA2 7AY", "SW1A 0AA", "ZZ1 1ZZ"])
+        self.assertEqual(sorted(api.searches), ["BA2 7AY", "SW1A 0AA", "SW1A 0AA", "ZZ1 1ZZ"])
+
+    def test_get_constituencies_from_post_code_uncached(self):
+        api = FakeConstituencyAPI()
+        constituency.get_constituencies_from_post_code("BA2 7AY", transport=api)
+        constituency.get_constituencies_from_post_code("BA2 7AY", transport=api)
+
+        self.assertEqual(len(api.searches), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
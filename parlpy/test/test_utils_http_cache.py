@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from parlpy.utils.disk_cache import DiskCache
+from parlpy.utils.http_cache import ConditionalHTTPCache
+
+
+# stub server, /etag/<v> is validated by ETag, /modified by Last-Modified, /plain has no validators
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        StubHandler.requests_seen.append(self.path)
+        body = f"<html><body>page {self.path}</body></html>".encode()
+
+        if self.path.startswith("/etag/"):
+            etag = '"' + self.path.rsplit("/", 1)[1] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+        elif self.path == "/modified":
+            last_modified = "Thu, 16 Sep 2021 18:00:00 GMT"
+            if self.headers.get("If-Modified-Since") == last_modified:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Last-Modified", last_modified)
+        else:
+            self.send_response(200)
+
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestConditionalHTTPCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.parse_calls = 0
+        StubHandler.requests_seen = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def parse(self, body):
+        self.parse_calls += 1
+        return body.decode().upper()
+
+    def test_etag_revalidation_reuses_parsed_result(self):
+        cache = ConditionalHTTPCache(self.tmp.name)
+        url = self.base_url + "/etag/v1"
+
+        first = cache.fetch(url, self.parse)
+        second = cache.fetch(url, self.parse)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.parse_calls, 1)
+        self.assertEqual(len(StubHandler.requests_seen), 2)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+        self.assertEqual(cache.stats.saved_bytes, len(f"<html><body>page /etag/v1</body></html>"))
+
+    def test_last_modified_revalidation(self):
+        cache = ConditionalHTTPCache(self.tmp.name)
+
+        cache.fetch(self.base_url + "/modified", self.parse)
+        cache.fetch(self.base_url + "/modified", self.parse)
+
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+
+    def test_cache_persists_between_objects(self):
+        url = self.base_url + "/etag/v1"
+        ConditionalHTTPCache(self.tmp.name).fetch(url, self.parse)
+
+        cache = ConditionalHTTPCache(self.tmp.name)
+        cache.fetch(url, self.parse)
+
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(self.parse_calls, 1)
+
+    def test_namespaces_kept_apart(self):
+        cache = ConditionalHTTPCache(self.tmp.name)
+        url = self.base_url + "/etag/v1"
+
+        cache.fetch(url, self.parse, namespace="a")
+        cache.fetch(url, self.parse, namespace="b")
+
+        self.assertEqual(cache.stats.misses, 2)
+
+    def test_no_validators_not_stored(self):
+        cache = ConditionalHTTPCache(self.tmp.name)
+
+        cache.fetch(self.base_url + "/plain", self.parse)
+        cache.fetch(self.base_url + "/plain", self.parse)
+
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (0, 2))
+        self.assertEqual(len(cache.disk_cache), 0)
+
+
+class TestDiskCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskCache(tmp, max_bytes=3 * 1100)
+
+            for key in ("a", "b", "c"):
+                cache.set(key, "x" * 1000)
+            # "a" becomes the most recently used
+            self.assertIsNotNone(cache.get("a"))
+            cache.set("d", "x" * 1000)
+
+            self.assertIn("a", cache)
+            self.assertNotIn("b", cache)
+            self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+            self.assertEqual(len(os.listdir(tmp)), 3)
+
+            # entries are found again by a new object on the same directory
+            self.assertEqual(DiskCache(tmp, max_bytes=3 * 1100).get("d"), "x" * 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
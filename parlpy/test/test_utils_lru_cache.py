@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+
+import parlpy.utils.lru_cache as lru_cache
+from parlpy.utils.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_discards_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertIn("c", cache)
+
+    def test_values_expire_after_ttl(self):
+        now = [1000.0]
+        with mock.patch.object(lru_cache.time, "monotonic", lambda: now[0]):
+            cache = LRUCache(ttl=60)
+            cache.set("a", 1)
+
+            now[0] += 59
+            self.assertEqual(cache.get("a"), 1)
+
+            now[0] += 1
+            self.assertIsNone(cache.get("a"))
+            self.assertNotIn("a", cache)
+
+            # setting again restarts the ttl
+            cache.set("a", 2)
+            now[0] += 30
+            self.assertEqual(cache.get("a", "missing"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
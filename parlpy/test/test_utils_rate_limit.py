@@ -0,0 +1,46 @@
+import time
+import threading
+import unittest
+
+from parlpy.utils.rate_limit import RateLimiter, host_rate_limiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_calls_are_spaced_across_threads(self):
+        limiter = RateLimiter(requests_per_second=50)
+        call_times = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(5):
+                limiter.wait()
+                with lock:
+                    call_times.append(time.monotonic())
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 20 calls at 50 per second must take at least 19 intervals
+        call_times.sort()
+        self.assertGreaterEqual(call_times[-1] - call_times[0], 19 * limiter.interval * 0.95)
+
+    def test_rejects_non_positive_rate(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+    def test_host_rate_limiter_shared_at_lowest_rate(self):
+        limiter = host_rate_limiter("https://votes.example.test/data/divisions.json", 20)
+
+        self.assertIs(host_rate_limiter("votes.example.test", 50), limiter)
+        self.assertAlmostEqual(limiter.interval, 1 / 20)
+
+        self.assertIs(host_rate_limiter("https://votes.example.test/data/division/1.json", 5), limiter)
+        self.assertAlmostEqual(limiter.interval, 1 / 5)
+        self.assertIsNot(host_rate_limiter("members.example.test", 5), limiter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import datetime
+import tempfile
+import unittest
+
+from parlpy.utils.state_store import StateStore, LocalFileStateStore, FsspecStateStore, InMemoryStateStore
+
+
+class StateStoreTests():
+    # mixin run against each backend, make_store is provided by the subclass
+    def test_load_default_when_empty(self):
+        store = self.make_store()
+
+        self.assertEqual(store.load(default={}), {})
+        self.assertFalse(store.delete())
+
+    def test_save_load_delete(self):
+        store = self.make_store()
+        value = {"2021-22": datetime.datetime(2021, 9, 16, 18), None: datetime.datetime(2021, 1, 1)}
+
+        store.save(value)
+        self.assertEqual(store.load(), value)
+
+        store.save({})
+        self.assertEqual(store.load(), {})
+
+        self.assertTrue(store.delete())
+        self.assertIsNone(store.load())
+
+
+class TestLocalFileStateStore(StateStoreTests, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_store(self):
+        return LocalFileStateStore(os.path.join(self.tmp.name, "state.p"))
+
+    def test_no_temporary_files_left(self):
+        store = self.make_store()
+        store.save(1)
+        store.save(2)
+
+        self.assertEqual(os.listdir(self.tmp.name), ["state.p"])
+
+
+class TestFsspecStateStore(StateStoreTests, unittest.TestCase):
+    def make_store(self):
+        try:
+            import fsspec
+        except ImportError:
+            self.skipTest("fsspec not installed")
+
+        fs = fsspec.filesystem("memory")
+        path = f"/{self.id()}/state.p"
+        if fs.exists(path):
+            fs.rm(path)
+
+        return FsspecStateStore(fs, path)
+
+
+class TestInMemoryStateStore(StateStoreTests, unittest.TestCase):
+    def make_store(self):
+        return InMemoryStateStore()
+
+
+class TestIncompleteStateStore(unittest.TestCase):
+    def test_fails_when_created(self):
+        class LoadOnlyStateStore(StateStore):
+            def load(self, default=None):
+                return default
+
+        with self.assertRaises(TypeError):
+            LoadOnlyStateStore()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import gzip
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from parlpy.utils.transport import DEFAULT_POOL_MAXSIZE, Transport, default_transport
+
+
+# stub keep-alive server, /throttled answers 429 with Retry-After until it has been asked twice, /gzip compresses its
+# body if the client accepts it, records the client port of every request
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def do_GET(self):
+        StubHandler.requests_seen.append((self.path, self.client_address[1], time.monotonic()))
+        body = f"page {self.path}".encode()
+
+        if self.path == "/throttled" and len([p for (p, _, _) in StubHandler.requests_seen if p == self.path]) <= 2:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        if self.path == "/gzip" and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.requests_seen = []
+        self.transport = Transport(backoff_factor=0)
+        self.addCleanup(self.transport.close)
+
+    def test_connection_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.transport.get(self.base_url + "/plain").text, "page /plain")
+
+        self.assertEqual(len({port for (_, port, _) in StubHandler.requests_seen}), 1)
+
+    def test_gzip_response_decompressed(self):
+        response = self.transport.get(self.base_url + "/gzip")
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.text, "page /gzip")
+
+    def test_retries_honour_retry_after(self):
+        response = self.transport.get(self.base_url + "/throttled")
+
+        self.assertEqual(response.status_code, 200)
+        times = [t for (_, _, t) in StubHandler.requests_seen]
+        self.assertEqual(len(times), 3)
+        self.assertGreaterEqual(times[1] - times[0], 0.9)
+        self.assertGreaterEqual(times[2] - times[1], 0.9)
+
+    def test_last_response_returned_when_retries_run_out(self):
+        transport = Transport(retries=1, backoff_factor=0)
+        self.addCleanup(transport.close)
+
+        response = transport.get(self.base_url + "/throttled")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(StubHandler.requests_seen), 2)
+
+    def test_grow_pool_keeps_retries(self):
+        self.transport.grow_pool(DEFAULT_POOL_MAXSIZE + 4)
+        self.transport.grow_pool(2)
+
+        self.assertEqual(self.transport.pool_maxsize, DEFAULT_POOL_MAXSIZE + 4)
+        self.assertEqual(self.transport.get(self.base_url + "/throttled").status_code, 200)
+
+    def test_default_transport_grown_to_pool_maxsize(self):
+        transport = default_transport(pool_maxsize=DEFAULT_POOL_MAXSIZE + 8)
+
+        self.assertIs(default_transport(), transport)
+        self.assertGreaterEqual(transport.pool_maxsize, DEFAULT_POOL_MAXSIZE + 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,36 @@
-import requests
+"""
+Contains functions to get the constituencies of post codes, and a resolver caching them for many post codes at once
 
+Classes (public):
+    ConstituencyResolver
 
-def get_constituencies_from_post_code(pc: str) -> [dict]:
+Functions (public):
+    get_constituencies_from_post_code
+    normalize_post_code
+    default_constituency_resolver
+"""
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
+from parlpy.utils.disk_cache import DiskCache
+from parlpy.utils.lru_cache import LRUCache
+from parlpy.utils.transport import Transport, default_transport
+
+# a whole post code without its space, such as BA27AY, as opposed to only the outward code, such as BA2
+__full_post_code = re.compile(r"^[A-Z]{1,2}[0-9][A-Z0-9]?[0-9][A-Z]{2}$")
+
+
+def get_constituencies_from_post_code(pc: str, transport: Transport = None) -> [dict]:
     """
     Utility function to get constituency data for a given post code. Uses the government's API.
     The more precise the postcode, the better.
     :param pc: Post code
+    :param transport: Transport to make the request with, None for the shared default transport
     :return: List of constituencies.
+    :raises requests.HTTPError: if the API answers with an error status, such as 429 or 5xx once retries run out
     """
     params = {
         "searchText": pc
@@ -14,7 +38,10 @@ def get_constituencies_from_post_code(pc: str) -> [dict]:
 
     url = "https://members-api.parliament.uk/api/Location/Constituency/Search"
 
-    response = requests.get(url, params=params)
+    if transport is None:
+        transport = default_transport()
+    response = transport.get(url, params=params)
+    response.raise_for_status()
 
     results = [
         item["value"]
@@ -22,3 +49,187 @@ def get_constituencies_from_post_code(pc: str) -> [dict]:
     ]
 
     return results
+
+
+def normalize_post_code(pc: str) -> str:
+    """
+    Put a post code in the form the API and caches are given it, upper case with a single space before the inward code
+    of a whole post code, so " ba2  7ay" becomes "BA2 7AY" and an outward code such as "ba2" becomes "BA2"
+    :param pc: Post code, or outward code
+    :return: normalized post code, empty if pc has no characters other than spaces
+    """
+    compact = "".join(pc.split()).upper()
+    if __full_post_code.match(compact):
+        return f"{compact[:-3]} {compact[-3:]}"
+
+    return compact
+
+
+class ConstituencyResolver():
+    """
+    Class getting the constituencies of post codes through an in-process LRU cache and optionally a DiskCache, safe to
+    share between threads
+
+    Post codes are normalized first, so differently written forms of the same post code share one cache entry and one
+    request. Post codes the API finds no constituency for are cached too, for negative_ttl seconds, and a post code
+    already being fetched by another thread is waited for rather than fetched again.
+
+    Attributes (public):
+    ---------
+    ttl: float
+        seconds the constituencies of a post code are cached for
+    negative_ttl: float
+        seconds a post code with no constituencies is cached for
+    max_workers: int
+        number of post codes resolve_many fetches at once
+    """
+    def __init__(self, transport: Transport = None, cache_size: int = 4096, ttl: float = 7 * 24 * 60 * 60,
+                 negative_ttl: float = 24 * 60 * 60, disk_cache: DiskCache = None, max_workers: int = 8):
+        """
+        :param transport: Transport to make requests with, None for the shared default transport, whose pool is grown to
+            max_workers connections
+        :param cache_size: number of post codes held in memory
+        :param ttl: seconds the constituencies of a post code are cached for
+        :param negative_ttl: seconds a post code with no constituencies is cached for
+        :param disk_cache: DiskCache to also keep results in, so that they outlive the process, None to only keep them
+            in memory
+        :param max_workers: number of post codes resolve_many fetches at once
+        """
+        self.transport = transport if transport is not None else default_transport(pool_maxsize=max_workers)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+
+        # normalized post code -> (time.time() the entry expires, constituencies), wall clock time so that entries on
+        # disk expire across runs
+        self.__memory_cache = LRUCache(maxsize=cache_size)
+        self.__disk_cache = disk_cache
+
+        self.__lock = threading.Lock()
+        # normalized post code -> Future of its constituencies, for post codes being fetched
+        self.__in_flight = {}
+
+    def __disk_key(self, post_code):
+        return f"constituency:{post_code}"
+
+    # constituencies cached for post_code, None if there are none or they have expired
+    def __cached(self, post_code):
+        entry = self.__memory_cache.get(post_code)
+        if entry is None and self.__disk_cache is not None:
+            entry = self.__disk_cache.get(self.__disk_key(post_code))
+            if entry is not None:
+                self.__memory_cache.set(post_code, entry)
+
+        if entry is None:
+            return None
+
+        expires, constituencies = entry
+        if expires <= time.time():
+            return None
+
+        return constituencies
+
+    def __store(self, post_code, constituencies):
+        entry = (time.time() + (self.ttl if constituencies else self.negative_ttl), constituencies)
+
+        self.__memory_cache.set(post_code, entry)
+        if self.__disk_cache is not None:
+            self.__disk_cache.set(self.__disk_key(post_code), entry)
+
+    # get the constituencies of a normalized post code, from the cache or by fetching them once between all threads
+    def __resolve_normalized(self, post_code):
+        if not post_code:
+            return []
+
+        constituencies = self.__cached(post_code)
+        if constituencies is not None:
+            return constituencies
+
+        with self.__lock:
+            future = self.__in_flight.get(post_code)
+            fetching = future is None
+            if fetching:
+                future = self.__in_flight[post_code] = Future()
+
+        if not fetching:
+            return future.result()
+
+        try:
+            constituencies = get_constituencies_from_post_code(post_code, self.transport)
+            self.__store(post_code, constituencies)
+            future.set_result(constituencies)
+        except BaseException as e:
+            # errors are passed on to the threads waiting, but not cached
+            future.set_exception(e)
+            raise
+        finally:
+            with self.__lock:
+                del self.__in_flight[post_code]
+
+        return constituencies
+
+    def resolve(self, pc: str) -> [dict]:
+        """
+        Get the constituencies of a post code
+        :param pc: Post code, in any case and spacing
+        :return: List of constituencies, empty if the API finds none
+        """
+        return self.__resolve_normalized(normalize_post_code(pc))
+
+    # (constituencies, None) of a normalized post code, or (None, exception) if it could not be resolved
+    def __try_resolve_normalized(self, post_code):
+        try:
+            return self.__resolve_normalized(post_code), None
+        except Exception as e:
+            return None, e
+
+    def resolve_many(self, post_codes: Iterable[str], errors: dict = None) -> dict:
+        """
+        Get the constituencies of many post codes, fetching each distinct post code not cached once, up to max_workers
+        at a time
+        Every post code is looked up even if some fail, and those resolved are cached, so looking the batch up again
+        only fetches the post codes that failed.
+        :param post_codes: Post codes, in any case and spacing
+        :param errors: If given, each post code that could not be resolved is left out of the result and set here to
+            its exception. Otherwise the first exception is raised once every post code has been looked up
+        :return: dict of each post code given to its list of constituencies
+        """
+        post_codes = list(post_codes)
+        normalized = {pc: normalize_post_code(pc) for pc in post_codes}
+        unique = list(dict.fromkeys(normalized.values()))
+
+        if self.max_workers > 1 and len(unique) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique))) as executor:
+                outcomes = dict(zip(unique, executor.map(self.__try_resolve_normalized, unique)))
+        else:
+            outcomes = {post_code: self.__try_resolve_normalized(post_code) for post_code in unique}
+
+        resolved = {}
+        for pc in post_codes:
+            constituencies, error = outcomes[normalized[pc]]
+            if error is None:
+                resolved[pc] = constituencies
+            elif errors is None:
+                raise error
+            else:
+                errors[pc] = error
+
+        return resolved
+
+
+__default_constituency_resolver = None
+__default_constituency_resolver_lock = threading.Lock()
+
+
+def default_constituency_resolver() -> ConstituencyResolver:
+    """
+    Get a ConstituencyResolver caching in memory shared by the whole process, created on first use
+    :return: the process wide ConstituencyResolver
+    """
+    global __default_constituency_resolver
+
+    with __default_constituency_resolver_lock:
+        if __default_constituency_resolver is None:
+            __default_constituency_resolver = ConstituencyResolver()
+
+        return __default_constituency_resolver
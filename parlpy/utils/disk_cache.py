@@ -0,0 +1,173 @@
+"""
+Contains a persistent key-value cache stored as one pickle per entry in a directory, evicting the least recently used
+entries once the directory grows beyond a size limit
+
+Classes (public):
+    DiskCache
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class DiskCache():
+    """
+    Class representing a directory of pickled values keyed by strings, safe to share between threads
+
+    Attributes (public):
+    ---------
+    directory: str
+        directory holding the entries
+    max_bytes: int
+        total size of entries above which the least recently used are evicted
+    """
+    __suffix = ".p"
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        # file name -> size in bytes, from least to most recently used
+        self.__entries = OrderedDict()
+        self.__total_bytes = 0
+
+        # pick up entries left by earlier runs, using modification time as the time last used
+        existing = []
+        for name in os.listdir(directory):
+            if name.endswith(DiskCache.__suffix):
+                stat = os.stat(os.path.join(directory, name))
+                existing.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self.__entries[name] = size
+            self.__total_bytes += size
+
+        self.__evict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return self.__file_name(key) in self.__entries
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        Total size of all entries in bytes
+        """
+        return self.__total_bytes
+
+    def __file_name(self, key):
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + DiskCache.__suffix
+
+    def get(self, key: str, default=None):
+        """
+        Get the value stored for key, marking it as recently used
+
+        :param key: key the value was stored with
+        :param default: value to return if nothing is stored for key
+        :return: the stored value, or default
+        """
+        name = self.__file_name(key)
+        path = os.path.join(self.directory, name)
+
+        with self.__lock:
+            if name not in self.__entries:
+                return default
+            self.__entries.move_to_end(name)
+
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            # removed or truncated from outside this process
+            self.delete(key)
+            return default
+
+        # record the use so that the order survives a restart
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return value
+
+    def set(self, key: str, value) -> None:
+        """
+        Store value for key, replacing any value already stored, then evict entries until within max_bytes
+
+        Values that are larger than max_bytes on their own are not stored.
+
+        :param key: key to store the value with
+        :param value: picklable value
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            self.delete(key)
+            return
+
+        name = self.__file_name(key)
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, os.path.join(self.directory, name))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        with self.__lock:
+            self.__total_bytes += len(data) - self.__entries.pop(name, 0)
+            self.__entries[name] = len(data)
+
+        self.__evict()
+
+    def delete(self, key: str) -> None:
+        """
+        Remove the value stored for key, if any
+        """
+        name = self.__file_name(key)
+
+        with self.__lock:
+            self.__total_bytes -= self.__entries.pop(name, 0)
+
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """
+        Remove every entry
+        """
+        with self.__lock:
+            names = list(self.__entries)
+            self.__entries.clear()
+            self.__total_bytes = 0
+
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    # remove least recently used entries until the total size is within max_bytes
+    def __evict(self):
+        evicted = []
+        with self.__lock:
+            while self.__total_bytes > self.max_bytes and self.__entries:
+                name, size = self.__entries.popitem(last=False)
+                self.__total_bytes -= size
+                evicted.append(name)
+
+        for name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,133 @@
+"""
+Contains a persistent cache of parsed web pages, revalidated with conditional requests
+
+Each page is requested with the ETag and Last-Modified validators of the stored copy. When the server answers 304 Not
+Modified, the stored parsed result is reused without downloading or parsing the page again.
+
+Classes (public):
+    CacheStats
+    ConditionalHTTPCache
+"""
+import threading
+from typing import Callable
+
+from parlpy.utils.disk_cache import DiskCache
+from parlpy.utils.transport import Transport, default_transport
+
+
+class CacheStats():
+    """
+    Class counting the outcomes of cache lookups, safe to share between threads
+
+    Attributes (public):
+    ---------
+    hits: int
+        lookups answered from the cache
+    misses: int
+        lookups that downloaded and parsed the page
+    saved_bytes: int
+        bytes of page bodies not downloaded thanks to hits
+    """
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_bytes = 0
+
+    def record_hit(self, saved_bytes: int = 0) -> None:
+        with self.__lock:
+            self.hits += 1
+            self.saved_bytes += saved_bytes
+
+    def record_miss(self) -> None:
+        with self.__lock:
+            self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of lookups that were hits, 0 if there have been none
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.hits = 0
+            self.misses = 0
+            self.saved_bytes = 0
+
+    def __repr__(self):
+        return f"CacheStats(hits={self.hits}, misses={self.misses}, saved_bytes={self.saved_bytes})"
+
+
+class ConditionalHTTPCache():
+    """
+    Class caching the parsed result of each page on disk, alongside the validators needed to revalidate it
+
+    Attributes (public):
+    ---------
+    disk_cache: parlpy.utils.disk_cache.DiskCache
+        where entries are stored
+    stats: CacheStats
+        hit, miss and saved bytes counters
+    transport: parlpy.utils.transport.Transport
+        what pages are requested with
+    """
+    def __init__(self, directory: str, max_bytes: int = 64 * 2**20, timeout: float = None,
+                 transport: Transport = None):
+        """
+        :param directory: directory to store entries in, created if it does not exist
+        :param max_bytes: total size of stored entries above which the least recently used are evicted
+        :param timeout: seconds to wait for a response, None for the transport's timeouts
+        :param transport: what pages are requested with, None for the shared default transport
+        """
+        self.disk_cache = DiskCache(directory, max_bytes)
+        self.stats = CacheStats()
+        self.timeout = timeout
+        self.transport = transport if transport is not None else default_transport()
+
+    def fetch(self, url: str, parse: Callable[[bytes], object], namespace: str = ""):
+        """
+        Get the parsed page at url, revalidating any stored copy with the server
+
+        :param url: url of the page
+        :param parse: function turning the page body into the result to return and store, must return a picklable
+            value
+        :param namespace: distinguishes results of different parse functions for the same url, change it when the
+            parse function changes so that old results are not reused
+        :return: parsed page
+        """
+        key = f"{namespace}\n{url}"
+        entry = self.disk_cache.get(key)
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"] is not None:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"] is not None:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.transport.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry is not None:
+            self.stats.record_hit(entry["body_bytes"])
+            return entry["parsed"]
+        response.raise_for_status()
+
+        body = response.content
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        parsed = parse(body)
+        self.stats.record_miss()
+
+        # nothing to revalidate with, so storing the result would never lead to a hit
+        if etag is not None or last_modified is not None:
+            self.disk_cache.set(key, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "body_bytes": len(body),
+                "parsed": parsed,
+            })
+
+        return parsed
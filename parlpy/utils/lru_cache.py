@@ -0,0 +1,79 @@
+"""
+Contains an in-process least recently used cache, safe to share between threads, whose values may also expire
+
+Classes (public):
+    LRUCache
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache():
+    """
+    Class holding up to maxsize values, discarding the least recently used once full, and values held for longer than
+    ttl seconds
+
+    Attributes (public):
+    ---------
+    maxsize: int
+        number of values held at most
+    ttl: float
+        seconds a value is held for after it is set, None to hold values until they are discarded
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self.__lock = threading.Lock()
+        # key -> (time the value expires, or None, value)
+        self.__values = OrderedDict()
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def get(self, key, default=None):
+        """
+        Get the value held for key, marking it as recently used
+
+        :return: the value, or default if none is held or it has expired
+        """
+        with self.__lock:
+            try:
+                self.__values.move_to_end(key)
+            except KeyError:
+                return default
+
+            expires, value = self.__values[key]
+            if expires is not None and expires <= time.monotonic():
+                del self.__values[key]
+                return default
+
+            return value
+
+    def set(self, key, value) -> None:
+        """
+        Hold value for key, discarding the least recently used value if full
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self.__lock:
+            self.__values[key] = (expires, value)
+            self.__values.move_to_end(key)
+
+            while len(self.__values) > self.maxsize:
+                self.__values.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self.__lock:
+            self.__values.pop(key, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__values.clear()
@@ -0,0 +1,86 @@
+"""
+Contains a thread-safe rate limiter, shared between workers that make requests to the same site
+
+Classes (public):
+    RateLimiter
+
+Functions (public):
+    host_rate_limiter
+"""
+import threading
+import time
+import urllib.parse
+
+
+class RateLimiter():
+    """
+    Class that spaces out calls to wait() so that no more than requests_per_second calls return per second, across all
+    threads sharing the object
+
+    Attributes (public):
+    ---------
+    interval: float
+        minimum number of seconds between two calls to wait() returning
+    """
+    def __init__(self, requests_per_second: float):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+
+        self.interval = 1.0 / requests_per_second
+
+        self.__lock = threading.Lock()
+        # the earliest time at which the next caller may proceed
+        self.__next_slot = time.monotonic()
+
+    def restrict(self, requests_per_second: float) -> None:
+        """
+        Lower the rate to requests_per_second, if that is lower than the current rate
+        """
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+
+        with self.__lock:
+            self.interval = max(self.interval, 1.0 / requests_per_second)
+
+    def wait(self) -> None:
+        """
+        Block until the caller is allowed to make its request
+        """
+        # reserve a slot while holding the lock, then sleep outside of it so that other threads can reserve theirs
+        with self.__lock:
+            now = time.monotonic()
+            slot = max(now, self.__next_slot)
+            self.__next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+__host_rate_limiters = {}
+__host_rate_limiters_lock = threading.Lock()
+
+
+def host_rate_limiter(url_or_host: str, requests_per_second: float) -> RateLimiter:
+    """
+    Get the RateLimiter shared by every caller limiting requests to the same host, so that together they make no more
+    requests than the lowest rate any of them asked for
+
+    The limiter is kept for the rest of the process and its rate is only ever lowered, so a caller asking for a higher
+    rate than an earlier caller is held to the earlier rate. Callers whose limit should not affect others make their own
+    RateLimiter instead
+
+    :param url_or_host: url of a request, or the host name itself
+    :param requests_per_second: rate limit for the host, the limiter is restricted to it if it is lower than its rate
+    :return: RateLimiter for the host
+    """
+    host = urllib.parse.urlparse(url_or_host).netloc or url_or_host
+
+    with __host_rate_limiters_lock:
+        rate_limiter = __host_rate_limiters.get(host)
+        if rate_limiter is None:
+            rate_limiter = __host_rate_limiters[host] = RateLimiter(requests_per_second)
+        else:
+            rate_limiter.restrict(requests_per_second)
+
+        return rate_limiter
@@ -0,0 +1,154 @@
+"""
+Contains classes to persist a single picklable value between runs, eg the datetime bills were last scraped
+
+Each store holds one value. Writes are atomic where the backend allows it, so a run that dies mid-write leaves the
+previous value in place rather than a truncated pickle.
+
+Classes (public):
+    StateStore
+    LocalFileStateStore
+    FsspecStateStore
+    InMemoryStateStore
+"""
+import abc
+import os
+import pickle
+import tempfile
+import uuid
+
+
+class StateStore(abc.ABC):
+    """
+    Base class for a store holding one picklable value, subclasses must implement load, save and delete
+    """
+    @abc.abstractmethod
+    def load(self, default=None):
+        """
+        Get the stored value
+
+        :param default: value to return if nothing has been stored
+        :return: the stored value, or default
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save(self, value) -> None:
+        """
+        Replace the stored value
+
+        :param value: picklable value to store
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self) -> bool:
+        """
+        Remove the stored value
+
+        :return: whether there was a value to remove
+        """
+        raise NotImplementedError
+
+
+class LocalFileStateStore(StateStore):
+    """
+    Store pickling its value to a file on the local filesystem, writing to a temporary file then renaming it over the
+    old one
+
+    Attributes (public):
+    ---------
+    path: str
+        path of the pickle file
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, default=None):
+        try:
+            with open(self.path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            # this is the case if the file has been manually deleted, or if nothing has been stored yet
+            return default
+
+    def save(self, value) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def delete(self) -> bool:
+        try:
+            os.remove(self.path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class FsspecStateStore(StateStore):
+    """
+    Store pickling its value to a file on an fsspec filesystem, eg a gcsfs.GCSFileSystem, writing to a temporary file
+    then moving it over the old one
+
+    Attributes (public):
+    ---------
+    fs: fsspec.AbstractFileSystem
+        filesystem holding the pickle file
+    path: str
+        path of the pickle file on fs
+    """
+    def __init__(self, fs, path: str):
+        self.fs = fs
+        self.path = path
+
+    def load(self, default=None):
+        try:
+            with self.fs.open(self.path, "rb") as handle:
+                return pickle.load(handle)
+        except FileNotFoundError:
+            # this is the case if the file has been manually deleted, or if nothing has been stored yet
+            return default
+
+    def save(self, value) -> None:
+        temp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with self.fs.open(temp_path, "wb") as handle:
+            pickle.dump(value, handle)
+        self.fs.mv(temp_path, self.path)
+
+    def delete(self) -> bool:
+        if self.fs.exists(self.path):
+            self.fs.rm(self.path)
+            return True
+
+        return False
+
+
+class InMemoryStateStore(StateStore):
+    """
+    Store keeping its value in memory, for tests and for runs that should not persist anything
+    """
+    def __init__(self):
+        self.__pickled_value = None
+
+    def load(self, default=None):
+        if self.__pickled_value is None:
+            return default
+
+        # stored pickled so that callers can not mutate the stored value, as with the file backed stores
+        return pickle.loads(self.__pickled_value)
+
+    def save(self, value) -> None:
+        self.__pickled_value = pickle.dumps(value)
+
+    def delete(self) -> bool:
+        had_value = self.__pickled_value is not None
+        self.__pickled_value = None
+
+        return had_value
@@ -0,0 +1,146 @@
+"""
+Contains the HTTP transport shared by every fetcher
+
+A Transport keeps a pool of keep-alive connections per host, asks for compressed responses, applies timeouts, and
+retries failed requests with exponential backoff, waiting as long as a 429 or 503 response's Retry-After header asks.
+
+Classes (public):
+    Transport
+
+Functions (public):
+    default_transport
+
+Variables (public):
+    DEFAULT_POOL_MAXSIZE
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# connections kept per host by default, enough for the most threads any fetcher shares a host with by default: the
+# 2 * max_concurrency threads of bill_details_iterator.aget_bill_details
+DEFAULT_POOL_MAXSIZE = 16
+
+
+class Transport():
+    """
+    Class making GET requests over pooled keep-alive connections, safe to share between threads
+
+    Attributes (public):
+    ---------
+    session: requests.Session
+        session holding the connection pools
+    timeout: tuple
+        (connect, read) timeouts in seconds used when a request does not give its own
+    pool_maxsize: int
+        number of connections kept open per host, threads beyond this many open connections that are discarded after
+        their request
+    """
+    # responses with these statuses are retried, honouring Retry-After when the server sends it
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self,
+                 connect_timeout: float = 10,
+                 read_timeout: float = 60,
+                 retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 headers: dict = None):
+        """
+        :param connect_timeout: seconds to wait for a connection to be established
+        :param read_timeout: seconds to wait between bytes of the response
+        :param retries: number of times a failed request is retried
+        :param backoff_factor: retries wait backoff_factor * 2 ** (retry number - 1) seconds, unless Retry-After is given
+        :param pool_maxsize: number of connections kept open per host, set to at least the number of threads sharing
+            the transport
+        :param headers: headers sent with every request
+        """
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.__retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=Transport.retry_statuses,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            # return the last response once retries run out, callers check its status as before
+            raise_on_status=False,
+        )
+        self.__pool_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.__mount(pool_maxsize)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        if headers is not None:
+            self.session.headers.update(headers)
+
+    def __mount(self, pool_maxsize):
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=self.__retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_maxsize = pool_maxsize
+
+    def grow_pool(self, pool_maxsize: int) -> None:
+        """
+        Keep at least pool_maxsize connections open per host, the pool is never shrunk. Connections already open are
+        closed once their request finishes, and opened again as needed
+        :param pool_maxsize: number of threads about to share the transport
+        """
+        with self.__pool_lock:
+            if pool_maxsize <= self.pool_maxsize:
+                return
+
+            old_adapter = self.session.get_adapter("https://")
+            self.__mount(pool_maxsize)
+            old_adapter.close()
+
+    def get(self, url: str, params: dict = None, headers: dict = None, timeout=None) -> requests.Response:
+        """
+        Make a GET request, the body of a compressed response is decompressed
+
+        :param url: url to request
+        :param params: query string parameters
+        :param headers: headers sent with this request only
+        :param timeout: (connect, read) timeouts in seconds, or a single timeout for both, None for the transport's
+        :return: the response
+        """
+        return self.session.get(url, params=params, headers=headers,
+                                timeout=self.timeout if timeout is None else timeout)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+__default_transport = None
+__default_transport_lock = threading.Lock()
+
+
+def default_transport(pool_maxsize: int = None) -> Transport:
+    """
+    Get the Transport used by fetchers that are not given one, created on first use with DEFAULT_POOL_MAXSIZE
+    connections per host
+
+    :param pool_maxsize: number of threads about to share the transport, its pool is grown to at least this many
+        connections per host, None to leave it as it is
+    :return: the process wide Transport
+    """
+    global __default_transport
+
+    with __default_transport_lock:
+        if __default_transport is None:
+            __default_transport = Transport()
+
+        transport = __default_transport
+
+    if pool_maxsize is not None:
+        transport.grow_pool(pool_maxsize)
+
+    return transport